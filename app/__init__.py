@@ -38,6 +38,42 @@ def create_app(config_name='default'):
     migrate.init_app(app, db)
     login_manager.init_app(app)
     
+    # 任务事件推送（SSE）
+    from app.utils.event_hub import event_hub
+    event_hub.init_app(app)
+    
+    # 任务列表页缓存
+    from app.utils.page_cache import page_cache
+    page_cache.init_app(app)
+    
+    # Azure OpenAI 配额限流（跨进程共享）
+    from app.utils.rate_limiter import rate_limiter
+    rate_limiter.init_app(app)
+    
+    # Azure OpenAI 客户端（进程内共享连接池）
+    from app.utils.openai_client import openai_client
+    openai_client.init_app(app)
+    
+    # 需求验证结果缓存
+    from app.utils.verification_cache import verification_cache
+    verification_cache.init_app(app)
+    
+    # 需求验证后台任务
+    from app.utils.verification_jobs import verification_pool
+    verification_pool.init_app(app)
+    
+    # 相似需求检测（MinHash/LSH 索引）
+    from app.utils.duplicates import duplicate_index
+    duplicate_index.init_app(app)
+    
+    # 文件存储后端（本地目录或 Azure Blob Storage）
+    from app.utils.storage import storage
+    storage.init_app(app)
+    
+    # 分块上传的后台存储
+    from app.utils.uploads import upload_finisher
+    upload_finisher.init_app(app)
+    
     # 注册模板过滤器
     from app.utils.template_filters import filters_bp
     app.register_blueprint(filters_bp)
@@ -55,6 +91,9 @@ def create_app(config_name='default'):
     from app.routes.files import files as files_blueprint
     app.register_blueprint(files_blueprint, url_prefix='/files')
     
+    from app.routes.api import api as api_blueprint
+    app.register_blueprint(api_blueprint, url_prefix='/api/v1')
+    
     # 添加错误处理器
     from app.routes.errors import errors as errors_blueprint
     app.register_blueprint(errors_blueprint)
@@ -64,6 +103,13 @@ def create_app(config_name='default'):
     
     return app
 
+def start_background_workers(app):
+    """启动后台工作线程（需求验证、分块上传的后台存储）；只由 web 入口 run.py 调用，脚本保持被动"""
+    from app.utils.verification_jobs import verification_pool
+    from app.utils.uploads import upload_finisher
+    verification_pool.ensure_started()
+    upload_finisher.ensure_started()
+
 def init_azure_services(app):
     """根据环境初始化Azure服务"""
     # 初始化Azure Application Insights
@@ -117,21 +163,16 @@ def init_azure_services(app):
                 entra_id_provider = None
         except ImportError:
             app.logger.warning("Microsoft Entra ID dependencies not installed, skipping initialization")
-    
-    # 初始化Azure Storage（仅在生产模式下使用）
-    if app.config.get('USE_AZURE_STORAGE') and app.config.get('AZURE_STORAGE_CONNECTION_STRING'):
-        try:
-            # 同样，这里延迟导入避免循环依赖
-            try:
-                from app.utils.azure_storage import init_blob_service
-                init_blob_service(app)
-                app.logger.info("Azure Blob Storage initialized")
-            except Exception as e:
-                app.logger.error(f"Azure Blob Storage initialization failed: {str(e)}")
-        except ImportError:
-            app.logger.warning("Azure Blob Storage dependencies not installed, skipping initialization")
 
 # 避免循环导入
 from app.models.user import User
 from app.models.task import Task
-from app.models.file import File 
\ No newline at end of file
+from app.models.file import File, FileBlob
+from app.models.stats import UserTaskStats
+from app.models.change import TaskChange
+from app.models.cache import CacheGeneration
+from app.models.verification import VerificationJob, VerificationBatch
+from app.models.verification_cache import VerificationCacheEntry
+from app.models.rate_limit import RateLimitBucket
+from app.models.duplicate import TaskSignature, TaskLshBand
+from app.models.upload import UploadSession
\ No newline at end of file
@@ -1,3 +1,11 @@
 from app.models.user import User, UserRole
 from app.models.task import Task, TaskPriority, TaskStatus, OutputType
-from app.models.file import File 
\ No newline at end of file
+from app.models.file import File, FileBlob
+from app.models.stats import UserTaskStats
+from app.models.change import TaskChange, ChangeAction
+from app.models.cache import CacheGeneration
+from app.models.verification import VerificationJob, JobStatus, VerificationBatch, BatchStatus
+from app.models.verification_cache import VerificationCacheEntry
+from app.models.rate_limit import RateLimitBucket
+from app.models.duplicate import TaskSignature, TaskLshBand
+from app.models.upload import UploadSession, UploadStatus
@@ -0,0 +1,11 @@
+from app import db
+
+class CacheGeneration(db.Model):
+    """页面缓存的版本号；写操作在同一事务内递增相关标签的版本，各进程据此判断缓存是否过期"""
+    __tablename__ = 'cache_generation'
+    
+    tag = db.Column(db.String(100), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<CacheGeneration {self.tag}={self.version}>'
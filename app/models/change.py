@@ -0,0 +1,37 @@
+from app import db
+from datetime import datetime
+import enum
+
+class ChangeAction(enum.Enum):
+    CREATED = 'created'
+    UPDATED = 'updated'
+    SUBMITTED = 'submitted'
+    VERIFIED = 'verified'
+    STATUS_CHANGED = 'status_changed'
+    DELETED = 'deleted'
+
+class TaskChange(db.Model):
+    """任务变更日志，只追加；自增id即变更流的游标"""
+    __tablename__ = 'task_change'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False, index=True)  # 任务删除后仍需保留记录，不设外键
+    action = db.Column(db.Enum(ChangeAction), nullable=False)
+    status = db.Column(db.String(20), nullable=True)
+    actor_id = db.Column(db.Integer, nullable=True)
+    
+    # 时间戳
+    changed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<TaskChange {self.id}: {self.task_id} {self.action.value}>'
+    
+    def to_dict(self):
+        return {
+            'cursor': str(self.id),
+            'task_id': self.task_id,
+            'action': self.action.value,
+            'status': self.status,
+            'actor_id': self.actor_id,
+            'changed_at': self.changed_at.isoformat()
+        }
@@ -0,0 +1,29 @@
+from app import db
+from datetime import datetime
+
+class TaskSignature(db.Model):
+    """任务标题和业务目标的 MinHash 签名；内容修改后删除旧行重新插入，自增id即LSH索引的同步游标"""
+    __tablename__ = 'task_signature'
+    # SQLite 默认会复用已删除的最大rowid，同步游标要求id单调递增
+    __table_args__ = {'sqlite_autoincrement': True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    task_id = db.Column(db.Integer, nullable=False, unique=True)  # 任务删除时由 after_delete 事件清理，不设外键
+    signature = db.Column(db.LargeBinary, nullable=False)
+
+    # 时间戳
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f'<TaskSignature {self.task_id}>'
+
+class TaskLshBand(db.Model):
+    """LSH 分桶：签名每个band的哈希一行，按 band_key 查找候选任务"""
+    __tablename__ = 'task_lsh_band'
+
+    band_key = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    signature_id = db.Column(db.Integer, primary_key=True, autoincrement=False, index=True)
+    task_id = db.Column(db.Integer, nullable=False)
+
+    def __repr__(self):
+        return f'<TaskLshBand {self.band_key}: {self.task_id}>'
@@ -4,12 +4,19 @@ import os
 from flask import current_app
 
 class File(db.Model):
+    # 创建上传会话时按 (校验和, 上传者) 查找本人上传过的相同内容
+    __table_args__ = (
+        db.Index('ix_file_sha256_uploader_id', 'sha256', 'uploader_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     filename = db.Column(db.String(255), nullable=False)
     original_filename = db.Column(db.String(255), nullable=False)
     file_path = db.Column(db.String(255), nullable=False)
-    file_size = db.Column(db.Integer, nullable=False)
+    file_size = db.Column(db.BigInteger, nullable=False)
     file_type = db.Column(db.String(100), nullable=False)
+    sha256 = db.Column(db.String(64), nullable=True)  # 上传时边写边计算；早期上传的文件为空
+    storage = db.Column(db.String(20), nullable=False, default='local', server_default='local')  # 内容所在的存储后端
     
     # 关系
     uploader_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
@@ -31,7 +38,24 @@ class File(db.Model):
             'filename': self.original_filename,
             'file_type': self.file_type,
             'file_size': self.file_size,
+            'sha256': self.sha256,
             'uploaded_at': self.uploaded_at.isoformat(),
             'uploader_id': self.uploader_id,
             'task_id': self.task_id
-        } 
\ No newline at end of file
+        } 
+
+class FileBlob(db.Model):
+    """按内容（SHA-256）去重保存的文件内容，由多个 File 记录共享；引用计数归零时删除物理文件"""
+    __tablename__ = 'file_blob'
+    
+    sha256 = db.Column(db.String(64), primary_key=True)
+    path = db.Column(db.String(255), nullable=False)  # 存储后端中的key；每次重新写入使用新路径
+    storage = db.Column(db.String(20), nullable=False, default='local', server_default='local')
+    size = db.Column(db.BigInteger, nullable=False)
+    ref_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    # 时间戳
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    def __repr__(self):
+        return f'<FileBlob {self.sha256[:12]} x{self.ref_count}>'
@@ -0,0 +1,12 @@
+from app import db
+
+class RateLimitBucket(db.Model):
+    """跨进程共享的令牌桶状态；桶容量和补充速率来自配置，这里只保存当前余量"""
+    __tablename__ = 'rate_limit_bucket'
+    
+    name = db.Column(db.String(50), primary_key=True)
+    tokens = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.Float, nullable=False)  # Unix时间戳（秒）
+    
+    def __repr__(self):
+        return f'<RateLimitBucket {self.name}={self.tokens:.1f}>'
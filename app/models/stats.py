@@ -0,0 +1,26 @@
+from app import db
+from datetime import datetime
+
+class UserTaskStats(db.Model):
+    """每个用户的仪表盘计数，由任务写操作在同一事务内增量维护"""
+    __tablename__ = 'user_task_stats'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    tasks_created = db.Column(db.Integer, nullable=False, default=0)
+    tasks_assigned = db.Column(db.Integer, nullable=False, default=0)
+    tasks_pending = db.Column(db.Integer, nullable=False, default=0)
+    tasks_in_progress = db.Column(db.Integer, nullable=False, default=0)
+    
+    # 时间戳
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f'<UserTaskStats {self.user_id}>'
+    
+    def to_dict(self):
+        return {
+            'tasks_created': self.tasks_created,
+            'tasks_assigned': self.tasks_assigned,
+            'tasks_pending': self.tasks_pending,
+            'tasks_in_progress': self.tasks_in_progress
+        }
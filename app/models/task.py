@@ -24,6 +24,22 @@ class OutputType(enum.Enum):
     OTHER = 'other'
 
 class Task(db.Model):
+    # 列表页按 (created_at, id) 倒序做键集分页，索引与常用过滤条件对应
+    __table_args__ = (
+        db.Index('ix_task_created_at_id', 'created_at', 'id'),
+        db.Index('ix_task_status_priority_created_at', 'status', 'priority', 'created_at', 'id'),
+        db.Index('ix_task_assignee_status_created_at', 'assignee_id', 'status', 'created_at', 'id'),
+        db.Index('ix_task_assignee_created_at', 'assignee_id', 'created_at', 'id'),
+        # 仪表盘“最近任务”按 creator_id/assignee_id 过滤并按 updated_at 排序
+        db.Index('ix_task_creator_updated_at', 'creator_id', 'updated_at'),
+        db.Index('ix_task_assignee_updated_at', 'assignee_id', 'updated_at'),
+        # 按验证分数排序/筛选（如“待处理且清晰度低于60”），分数为空的任务不参与
+        db.Index('ix_task_clarity_score_id', 'clarity_score', 'id'),
+        db.Index('ix_task_feasibility_score_id', 'feasibility_score', 'id'),
+        db.Index('ix_task_status_clarity_score_id', 'status', 'clarity_score', 'id'),
+        db.Index('ix_task_status_feasibility_score_id', 'status', 'feasibility_score', 'id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     business_goal = db.Column(db.Text, nullable=True)
@@ -42,6 +58,10 @@ class Task(db.Model):
     
     # 验证结果
     verification_result = db.Column(db.Text, nullable=True)
+    clarity_score = db.Column(db.Integer, nullable=True)
+    feasibility_score = db.Column(db.Integer, nullable=True)
+    verified_at = db.Column(db.DateTime, nullable=True)
+    verification_model = db.Column(db.String(100), nullable=True)
     
     # 任务关联的文件
     files = db.relationship('File', backref='task', lazy='dynamic', cascade='all, delete-orphan')
@@ -61,5 +81,9 @@ class Task(db.Model):
             'creator_id': self.creator_id,
             'assignee_id': self.assignee_id,
             'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'updated_at': self.updated_at.isoformat(),
+            'clarity_score': self.clarity_score,
+            'feasibility_score': self.feasibility_score,
+            'verified_at': self.verified_at.isoformat() if self.verified_at else None,
+            'verification_model': self.verification_model
         } 
\ No newline at end of file
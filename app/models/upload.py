@@ -0,0 +1,59 @@
+from app import db
+from datetime import datetime
+import enum
+
+class UploadStatus(enum.Enum):
+    ACTIVE = 'active'
+    PROCESSING = 'processing'  # 全部字节已到达，后台正在写入存储
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+    ABORTED = 'aborted'
+    EXPIRED = 'expired'
+
+class UploadSession(db.Model):
+    """分块上传会话：已接收的字节数即断点，客户端从该偏移继续上传"""
+    __tablename__ = 'upload_session'
+    # 定期清理过期未完成的会话
+    __table_args__ = (
+        db.Index('ix_upload_session_status_expires_at', 'status', 'expires_at'),
+    )
+
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.Enum(UploadStatus), nullable=False, default=UploadStatus.ACTIVE)
+    filename = db.Column(db.String(255), nullable=False)
+    content_type = db.Column(db.String(100), nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+    received = db.Column(db.BigInteger, nullable=False, default=0)
+    sha256 = db.Column(db.String(64), nullable=True)  # 客户端声明的整个文件的校验和（可选）；分块上传全部到达后为实际的校验和
+    error = db.Column(db.String(500), nullable=True)
+    lease_until = db.Column(db.DateTime, nullable=True)  # 正在写入的请求或后台处理持有的租约
+    # 浏览器直接上传到存储后端（Blob SAS）时内容所在的位置；为空时字节经应用分块写入
+    storage = db.Column(db.String(20), nullable=True)
+    storage_key = db.Column(db.String(255), nullable=True)
+
+    # 关系
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=True)
+    file_id = db.Column(db.Integer, db.ForeignKey('file.id'), nullable=True)
+
+    # 时间戳
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+    def __repr__(self):
+        return f'<UploadSession {self.id} {self.received}/{self.size}>'
+
+    def to_dict(self):
+        return {
+            'upload_id': self.id,
+            'status': self.status.value,
+            'filename': self.filename,
+            'size': self.size,
+            'offset': self.received,
+            'direct': self.storage_key is not None,
+            'task_id': self.task_id,
+            'file_id': self.file_id,
+            'error': self.error,
+            'expires_at': self.expires_at.isoformat()
+        }
@@ -0,0 +1,114 @@
+from app import db
+from datetime import datetime
+import enum
+import json
+
+class JobStatus(enum.Enum):
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+
+class VerificationJob(db.Model):
+    """需求验证任务，由后台线程池执行；状态与结果落库，进程重启后可恢复"""
+    __tablename__ = 'verification_job'
+    # 工作线程按创建顺序领取排队中的任务
+    __table_args__ = (
+        db.Index('ix_verification_job_status_created_at', 'status', 'created_at'),
+        # 提交时查找相同输入的进行中任务（合并重复请求）
+        db.Index('ix_verification_job_cache_key_status', 'cache_key', 'status'),
+    )
+    
+    id = db.Column(db.String(32), primary_key=True)
+    status = db.Column(db.Enum(JobStatus), nullable=False, default=JobStatus.QUEUED)
+    title = db.Column(db.String(200), nullable=False)
+    business_goal = db.Column(db.Text, nullable=False)
+    cache_key = db.Column(db.String(64), nullable=True)
+    result = db.Column(db.Text, nullable=True)
+    error = db.Column(db.String(500), nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    worker = db.Column(db.String(64), nullable=True)
+    lease_until = db.Column(db.DateTime, nullable=True)  # 执行中的工作线程定期续约，过期视为工作进程已退出
+    
+    # 关系
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    
+    # 时间戳
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    started_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<VerificationJob {self.id} {self.status.value}>'
+    
+    @property
+    def is_finished(self):
+        return self.status in (JobStatus.SUCCEEDED, JobStatus.FAILED)
+    
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status.value,
+            'result': json.loads(self.result) if self.result else None,
+            'error': self.error,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+class BatchStatus(enum.Enum):
+    RUNNING = 'running'
+    PAUSED = 'paused'
+    COMPLETED = 'completed'
+
+class VerificationBatch(db.Model):
+    """批量验证任务；按任务id顺序处理，last_task_id 为断点，中断后从断点继续"""
+    __tablename__ = 'verification_batch'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    status = db.Column(db.Enum(BatchStatus), nullable=False, default=BatchStatus.RUNNING)
+    filters = db.Column(db.Text, nullable=False)  # JSON
+    concurrency = db.Column(db.Integer, nullable=False)
+    
+    # 进度：只处理创建时已存在的任务（id <= max_task_id）
+    max_task_id = db.Column(db.Integer, nullable=False, default=0)
+    last_task_id = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    succeeded = db.Column(db.Integer, nullable=False, default=0)
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    skipped = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.String(500), nullable=True)
+    active_seconds = db.Column(db.Float, nullable=False, default=0)
+    worker = db.Column(db.String(64), nullable=True)
+    
+    # 关系
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    
+    # 时间戳
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    heartbeat_at = db.Column(db.DateTime, nullable=True)
+    finished_at = db.Column(db.DateTime, nullable=True)
+    
+    def __repr__(self):
+        return f'<VerificationBatch {self.id} {self.status.value}>'
+    
+    @property
+    def processed(self):
+        return self.succeeded + self.failed + self.skipped
+    
+    def to_dict(self):
+        return {
+            'batch_id': self.id,
+            'status': self.status.value,
+            'filters': json.loads(self.filters),
+            'concurrency': self.concurrency,
+            'total': self.total,
+            'processed': self.processed,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'progress': round(self.processed / self.total, 4) if self.total else 1.0,
+            'throughput_per_second': round(self.processed / self.active_seconds, 3) if self.active_seconds else None,
+            'last_error': self.last_error,
+            'created_at': self.created_at.isoformat(),
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
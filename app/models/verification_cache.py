@@ -0,0 +1,16 @@
+from app import db
+from datetime import datetime
+
+class VerificationCacheEntry(db.Model):
+    """需求验证结果缓存，键为规范化输入、模型部署和提示词版本的哈希"""
+    __tablename__ = 'verification_cache'
+    
+    key = db.Column(db.String(64), primary_key=True)
+    result = db.Column(db.Text, nullable=False)
+    
+    # 时间戳
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<VerificationCacheEntry {self.key}>'
@@ -0,0 +1,306 @@
+from flask import Blueprint, request, current_app
+from flask_login import login_required, current_user
+from sqlalchemy import insert, update
+from app.models import Task, TaskPriority, TaskStatus, OutputType, User, ChangeAction
+from app.utils.pagination import keyset_paginate, InvalidCursor
+from app.utils.task_queries import get_task_files
+from app.utils.task_hooks import on_task_created, on_tasks_created, on_task_changed, on_tasks_changed
+from app.utils.serializers import json_response
+from app.utils.duplicates import duplicate_index
+from app.utils.verification import verification_cache_key, apply_verification, clear_verification
+from app.utils.verification_cache import verification_cache
+from app import db
+from datetime import datetime, date
+
+api = Blueprint('api', __name__)
+
+# 单条 IN (...) 查询的最大参数个数
+ID_CHUNK_SIZE = 500
+
+def _error(message, status=400, **extra):
+    payload = {'status': 'error', 'message': message}
+    payload.update(extra)
+    return json_response(payload, status)
+
+def _chunks(items, size=ID_CHUNK_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _parse_enum(enum_cls, value, field, errors):
+    try:
+        return enum_cls(value)
+    except ValueError:
+        errors[field] = f"Must be one of: {', '.join(e.value for e in enum_cls)}"
+
+def _parse_task_payload(data, partial=False):
+    """校验任务字段，返回 (values, errors)；partial=True 时只校验出现的字段"""
+    values = {}
+    errors = {}
+
+    if not isinstance(data, dict):
+        return values, {'_': 'Expected a JSON object'}
+
+    if 'title' in data or not partial:
+        title = data.get('title')
+        if not isinstance(title, str) or not 5 <= len(title.strip()) <= 200:
+            errors['title'] = 'Title must be between 5 and 200 characters'
+        else:
+            values['title'] = title.strip()
+
+    if 'business_goal' in data:
+        if data['business_goal'] is not None and not isinstance(data['business_goal'], str):
+            errors['business_goal'] = 'Must be a string'
+        else:
+            values['business_goal'] = data['business_goal']
+
+    if 'priority' in data or not partial:
+        values['priority'] = _parse_enum(TaskPriority, data.get('priority', TaskPriority.MEDIUM.value), 'priority', errors)
+
+    if 'output_type' in data or not partial:
+        values['output_type'] = _parse_enum(OutputType, data.get('output_type', OutputType.REPORT.value), 'output_type', errors)
+
+    if 'status' in data and partial:
+        values['status'] = _parse_enum(TaskStatus, data['status'], 'status', errors)
+
+    if 'deadline' in data:
+        try:
+            values['deadline'] = date.fromisoformat(data['deadline']) if data['deadline'] else None
+        except (TypeError, ValueError):
+            errors['deadline'] = 'Must be a date in YYYY-MM-DD format'
+
+    if 'assignee_id' in data:
+        assignee_id = data['assignee_id']
+        if assignee_id is not None and (not isinstance(assignee_id, int) or isinstance(assignee_id, bool)):
+            errors['assignee_id'] = 'Must be an integer or null'
+        else:
+            values['assignee_id'] = assignee_id or None
+
+    return values, errors
+
+def _existing_user_ids(user_ids):
+    user_ids = list({uid for uid in user_ids if uid})
+    existing = set()
+    for chunk in _chunks(user_ids):
+        existing.update(uid for (uid,) in db.session.query(User.id).filter(User.id.in_(chunk)))
+    return existing
+
+def _task_detail(task):
+    data = task.to_dict()
+    data['verification_result'] = task.verification_result
+    data['files'] = [f.to_dict() for f in get_task_files(task.id)]
+    return data
+
+@api.route('/tasks', methods=['GET'])
+@login_required
+def list_tasks():
+    limit = min(request.args.get('limit', current_app.config['API_PAGE_SIZE'], type=int),
+                current_app.config['API_MAX_PAGE_SIZE'])
+
+    query = Task.query
+
+    errors = {}
+    if request.args.get('status'):
+        query = query.filter(Task.status == _parse_enum(TaskStatus, request.args['status'], 'status', errors))
+    if request.args.get('priority'):
+        query = query.filter(Task.priority == _parse_enum(TaskPriority, request.args['priority'], 'priority', errors))
+    if request.args.get('assignee_id', type=int):
+        query = query.filter(Task.assignee_id == request.args.get('assignee_id', type=int))
+    if request.args.get('creator_id', type=int):
+        query = query.filter(Task.creator_id == request.args.get('creator_id', type=int))
+    if errors:
+        return _error('Invalid filter', errors=errors)
+
+    try:
+        page = keyset_paginate(query, Task.created_at, Task.id,
+                               after=request.args.get('after'), per_page=max(limit, 1))
+    except InvalidCursor:
+        return _error('Invalid cursor')
+
+    return json_response({
+        'items': [task.to_dict() for task in page.items],
+        'next_cursor': page.next_cursor
+    })
+
+@api.route('/tasks/<int:task_id>', methods=['GET'])
+@login_required
+def get_task(task_id):
+    task = db.session.get(Task, task_id)
+    if task is None:
+        return _error('Task not found', 404)
+
+    return json_response(_task_detail(task))
+
+@api.route('/tasks', methods=['POST'])
+@login_required
+def create_task():
+    values, errors = _parse_task_payload(request.get_json(silent=True))
+    if not errors and values.get('assignee_id') and not _existing_user_ids([values['assignee_id']]):
+        errors['assignee_id'] = 'Unknown user'
+    if errors:
+        return _error('Validation failed', errors=errors)
+
+    task = Task(creator_id=current_user.id, status=TaskStatus.DRAFT, **values)
+    db.session.add(task)
+    db.session.flush()
+    on_task_created(task)
+    db.session.commit()
+
+    return json_response(_task_detail(task), 201)
+
+@api.route('/tasks/<int:task_id>', methods=['PATCH'])
+@login_required
+def update_task(task_id):
+    task = db.session.get(Task, task_id)
+    if task is None:
+        return _error('Task not found', 404)
+
+    values, errors = _parse_task_payload(request.get_json(silent=True), partial=True)
+    if 'assignee_id' in values and values['assignee_id'] != task.assignee_id:
+        # 计数按负责人维护，改派需要走单独的流程
+        errors['assignee_id'] = 'Reassigning tasks is not supported'
+    if errors:
+        return _error('Validation failed', errors=errors)
+
+    old_status, old_priority = task.status, task.priority
+    old_content = (task.title, task.business_goal)
+    for field, value in values.items():
+        setattr(task, field, value)
+    if (task.title, task.business_goal) != old_content:
+        duplicate_index.index_tasks([(task.id, task.title, task.business_goal)])
+        # 旧分数评估的是修改前的内容：缓存中有新内容的验证结果时直接使用，否则清除
+        verified = verification_cache.get(verification_cache_key(task.title, task.business_goal))
+        if verified is not None:
+            apply_verification(task, verified)
+        else:
+            clear_verification(task)
+    on_task_changed(task, ChangeAction.STATUS_CHANGED if task.status != old_status else ChangeAction.UPDATED,
+                    old_status, old_priority)
+    db.session.commit()
+
+    return json_response(_task_detail(task))
+
+@api.route('/tasks/bulk', methods=['POST'])
+@login_required
+def bulk_create_tasks():
+    """在一个事务中批量创建任务，返回逐条结果"""
+    items = (request.get_json(silent=True) or {}).get('tasks')
+    if not isinstance(items, list):
+        return _error("Expected a 'tasks' array")
+    if len(items) > current_app.config['API_BULK_MAX_ITEMS']:
+        return _error(f"At most {current_app.config['API_BULK_MAX_ITEMS']} tasks per request", 413)
+
+    parsed = [_parse_task_payload(item) for item in items]
+    known_users = _existing_user_ids(values.get('assignee_id') for values, _ in parsed)
+
+    now = datetime.utcnow()
+    rows = []
+    results = []
+    for index, (values, errors) in enumerate(parsed):
+        if values.get('assignee_id') and values['assignee_id'] not in known_users:
+            errors['assignee_id'] = 'Unknown user'
+        if errors:
+            results.append({'index': index, 'status': 'error', 'errors': errors})
+            continue
+
+        # executemany 要求每行的键一致
+        rows.append({
+            'title': values['title'],
+            'business_goal': values.get('business_goal'),
+            'priority': values['priority'],
+            'output_type': values['output_type'],
+            'deadline': values.get('deadline'),
+            'assignee_id': values.get('assignee_id'),
+            'creator_id': current_user.id,
+            'status': TaskStatus.DRAFT,
+            'created_at': now,
+            'updated_at': now
+        })
+        results.append({'index': index, 'status': 'created'})
+
+    if rows:
+        new_ids = db.session.execute(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+        on_tasks_created(dict(row, id=task_id) for task_id, row in zip(new_ids, rows))
+        db.session.commit()
+
+        created = iter(new_ids)
+        for result in results:
+            if result['status'] == 'created':
+                result['id'] = next(created)
+
+    return json_response({
+        'created': len(rows),
+        'failed': len(results) - len(rows),
+        'results': results
+    })
+
+@api.route('/tasks/bulk-status', methods=['POST'])
+@login_required
+def bulk_update_status():
+    """在一个事务中批量变更任务状态，返回逐条结果"""
+    items = (request.get_json(silent=True) or {}).get('transitions')
+    if not isinstance(items, list):
+        return _error("Expected a 'transitions' array")
+    if len(items) > current_app.config['API_BULK_MAX_ITEMS']:
+        return _error(f"At most {current_app.config['API_BULK_MAX_ITEMS']} transitions per request", 413)
+
+    results = []
+    pending = []
+    for index, item in enumerate(items):
+        errors = {}
+        item = item if isinstance(item, dict) else {}
+        task_id = item.get('id')
+        if not isinstance(task_id, int) or isinstance(task_id, bool):
+            errors['id'] = 'Must be an integer'
+        new_status = _parse_enum(TaskStatus, item.get('status'), 'status', errors)
+
+        result = {'index': index, 'id': task_id}
+        results.append(result)
+        if errors:
+            result.update(status='error', errors=errors)
+        else:
+            pending.append((result, new_status))
+
+    # 一次性读取当前状态
+    current = {}
+    ids = list({result['id'] for result, _ in pending})
+    for chunk in _chunks(ids):
+        query = db.session.query(Task.id, Task.status, Task.assignee_id, Task.priority).filter(Task.id.in_(chunk))
+        for task_id, status, assignee_id, priority in query:
+            current[task_id] = (status, assignee_id, priority)
+
+    final_status = {}
+    changes = []
+    for result, new_status in pending:
+        task_id = result['id']
+        if task_id not in current:
+            result.update(status='error', errors={'id': 'Task not found'})
+            continue
+        old_status, assignee_id, priority = current[task_id]
+        if old_status == new_status:
+            result['status'] = 'unchanged'
+            continue
+        changes.append((task_id, assignee_id, priority, priority, old_status, new_status))
+        current[task_id] = (new_status, assignee_id, priority)
+        final_status[task_id] = new_status
+        result['status'] = 'updated'
+
+    by_status = {}
+    for task_id, new_status in final_status.items():
+        by_status.setdefault(new_status, []).append(task_id)
+
+    now = datetime.utcnow()
+    for new_status, task_ids in by_status.items():
+        for chunk in _chunks(task_ids):
+            db.session.execute(
+                update(Task).where(Task.id.in_(chunk)).values(status=new_status, updated_at=now),
+                execution_options={'synchronize_session': False}
+            )
+    on_tasks_changed(changes, ChangeAction.STATUS_CHANGED)
+    db.session.commit()
+
+    return json_response({
+        'updated': len(changes),
+        'results': results
+    })
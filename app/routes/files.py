@@ -1,10 +1,12 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app, send_from_directory
+from flask import Blueprint, render_template, redirect, url_for, request, flash, current_app, jsonify, abort
 from flask_login import login_required, current_user
-from app.models import File
+from app.models import File, Task, UploadSession, UploadStatus
 from app import db
-import os
-from werkzeug.utils import secure_filename
-import uuid
+from app.utils.conditional import make_etag, is_not_modified, not_modified_response
+from app.utils.downloads import send_upload
+from app.utils.uploads import save_file, create_session, write_chunk, finalize_direct, abort_session, UploadError
+from app.utils.storage import storage
+import re
 
 files = Blueprint('files', __name__)
 
@@ -37,55 +39,150 @@ def upload_file():
                 continue
             
             if file:
-                filename = secure_filename(file.filename)
-                unique_filename = str(uuid.uuid4()) + '_' + filename
-                file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
-                file.save(file_path)
-                
-                # 创建文件记录
-                file_record = File(
-                    filename=unique_filename,
-                    original_filename=filename,
-                    file_path=unique_filename,
-                    file_size=os.path.getsize(file_path),
-                    file_type=file.content_type,
-                    uploader_id=current_user.id
-                )
+                # 边写边计算大小和校验和
+                file_record = save_file(file, current_user.id)
                 db.session.add(file_record)
-                uploaded_files.append(filename)
+                uploaded_files.append(file_record.original_filename)
         
         if uploaded_files:
             db.session.commit()
             flash(f'Uploaded {len(uploaded_files)} files successfully', 'success')
             return redirect(url_for('files.file_explorer'))
     
-    return render_template('files/upload.html')
+    return render_template('files/upload.html', direct_upload=storage.default.direct_uploads)
+
+CONTENT_RANGE_PATTERN = re.compile(r'^bytes (\d+)-(\d+)/(\d+|\*)$')
+
+def _upload_error(e):
+    payload = {'status': 'error', 'message': str(e)}
+    if e.offset is not None:
+        payload['offset'] = e.offset
+    return jsonify(payload), e.status_code
+
+def _get_upload_or_404(upload_id):
+    session = db.session.get(UploadSession, upload_id)
+    if session is None or session.created_by != current_user.id:
+        abort(404)
+    return session
+
+def _upload_response(session, status_code=200):
+    payload = session.to_dict()
+    payload['upload_url'] = url_for('files.upload_session', upload_id=session.id)
+    payload['chunk_size'] = current_app.config['FILE_UPLOAD_CHUNK_SIZE']
+    if session.storage_key is not None and session.status == UploadStatus.ACTIVE:
+        # 每次查询都返回有效的地址，上传途中 SAS 过期时客户端重新查询
+        payload['blob_url'] = storage.backend(session.storage).upload_url(session.storage_key)
+        payload['block_size'] = current_app.config['AZURE_STORAGE_BLOCK_SIZE']
+        payload['finalize_url'] = url_for('files.finalize_upload', upload_id=session.id)
+    if session.file_id:
+        payload['file_url'] = url_for('files.download_file', file_id=session.file_id)
+    response = jsonify(payload)
+    response.status_code = status_code
+    response.headers['Upload-Offset'] = str(session.received)
+    return response
+
+@files.route('/uploads', methods=['POST'])
+@login_required
+def create_upload():
+    """Start a chunked upload; the client then PUTs the bytes to upload_url in order.
+    
+    The last chunk answers 202 with status "processing" while the file is stored in the background;
+    GET upload_url until the status is "completed" (file_url is set) or "failed".
+    
+    With "direct": true the response carries a write-only blob_url instead: the client uploads
+    blocks straight to blob storage, commits the block list, then POSTs to finalize_url and polls the same way.
+    """
+    data = request.get_json(silent=True) or {}
+    task_id = data.get('task_id')
+    if task_id is not None and db.session.get(Task, task_id) is None:
+        return jsonify({'status': 'error', 'message': 'Task not found'}), 400
+    
+    try:
+        session = create_session(data.get('filename'), data.get('size'), data.get('content_type'),
+                                 current_user.id, task_id=task_id, sha256=data.get('sha256'),
+                                 direct=bool(data.get('direct')))
+    except UploadError as e:
+        return _upload_error(e)
+    
+    response = _upload_response(session, 201)
+    response.headers['Location'] = url_for('files.upload_session', upload_id=session.id)
+    return response
+
+@files.route('/uploads/<upload_id>', methods=['GET'])
+@login_required
+def upload_session(upload_id):
+    """Upload status; 'offset' is where an interrupted upload resumes"""
+    return _upload_response(_get_upload_or_404(upload_id))
+
+@files.route('/uploads/<upload_id>', methods=['PUT'])
+@login_required
+def upload_chunk(upload_id):
+    """Write one chunk at the offset given by Content-Range (bytes start-end/total) or Upload-Offset"""
+    session = _get_upload_or_404(upload_id)
+    
+    content_range = request.headers.get('Content-Range')
+    if content_range:
+        match = CONTENT_RANGE_PATTERN.match(content_range.strip())
+        if not match:
+            return jsonify({'status': 'error', 'message': 'Malformed Content-Range'}), 400
+        offset, end = int(match.group(1)), int(match.group(2))
+        if end < offset or (request.content_length is not None and request.content_length != end - offset + 1):
+            return jsonify({'status': 'error', 'message': 'Content-Range does not match the body length'}), 400
+    else:
+        offset = request.headers.get('Upload-Offset', type=int)
+        if offset is None:
+            return jsonify({'status': 'error', 'message': 'Content-Range or Upload-Offset header required'}), 400
+    
+    try:
+        session = write_chunk(session, offset, request.stream, request.content_length,
+                              request.headers.get('X-Chunk-SHA256'))
+    except UploadError as e:
+        return _upload_error(e)
+    
+    if session.status == UploadStatus.FAILED:
+        return _upload_response(session, 422)
+    if session.status == UploadStatus.PROCESSING:
+        return _upload_response(session, 202)
+    return _upload_response(session, 201 if session.file_id else 200)
+
+@files.route('/uploads/<upload_id>/finalize', methods=['POST'])
+@login_required
+def finalize_upload(upload_id):
+    """Hand a committed direct upload to the background worker, which copies and verifies it (size and SHA-256)
+    and creates its File record; answers 202 with status "processing", then GET upload_url until it finishes"""
+    try:
+        session = finalize_direct(_get_upload_or_404(upload_id))
+    except UploadError as e:
+        return _upload_error(e)
+    
+    if session.status == UploadStatus.PROCESSING:
+        return _upload_response(session, 202)
+    return _upload_response(session, 201)
+
+@files.route('/uploads/<upload_id>', methods=['DELETE'])
+@login_required
+def cancel_upload(upload_id):
+    return _upload_response(abort_session(_get_upload_or_404(upload_id)))
 
 @files.route('/<int:file_id>')
 @login_required
 def download_file(file_id):
     file = File.query.get_or_404(file_id)
     
-    return send_from_directory(
-        directory=current_app.config['UPLOAD_FOLDER'],
-        path=file.filename,
-        as_attachment=True,
-        download_name=file.original_filename
-    )
+    # 上传后的文件内容不再变化，用记录元数据生成强ETag，命中时不访问磁盘
+    etag = make_etag(file.id, file.filename, file.file_size, file.uploaded_at)
+    if is_not_modified(etag, file.uploaded_at):
+        return not_modified_response(etag, file.uploaded_at)
+    
+    # 支持 Range / If-Range；本地文件在配置了 FILE_DOWNLOAD_OFFLOAD 时由前端 Web 服务器发送
+    return send_upload(file, etag)
 
 @files.route('/<int:file_id>/delete', methods=['POST'])
 @login_required
 def delete_file(file_id):
     file = File.query.get_or_404(file_id)
     
-    try:
-        # 删除物理文件
-        os.remove(os.path.join(current_app.config['UPLOAD_FOLDER'], file.filename))
-    except Exception as e:
-        # 文件可能已经不存在，记录错误但继续
-        print(f"Error deleting file: {e}")
-    
-    # 删除数据库记录
+    # 删除数据库记录；内容不再被引用时，物理文件在提交后由 content_store 删除
     db.session.delete(file)
     db.session.commit()
     
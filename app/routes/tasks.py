@@ -1,71 +1,270 @@
-from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, current_app
+from flask import Blueprint, render_template, redirect, url_for, request, flash, jsonify, current_app, abort, Response, session, make_response, stream_with_context
 from flask_login import login_required, current_user
-from app.models import Task, TaskPriority, TaskStatus, OutputType, User
+from app.models import Task, TaskPriority, TaskStatus, OutputType, User, ChangeAction, VerificationJob, VerificationBatch
 from app.utils.forms import TaskForm
+from app.utils.pagination import keyset_paginate, keyset_paginate_by_value, InvalidCursor
+from app.utils.task_queries import task_list_query, get_task_detail_or_404, get_task_files
+from app.utils.task_search import search_tasks
+from app.utils.task_changes import get_changes_since
+from app.utils.task_hooks import on_task_created, on_task_changed
+from app.utils.serializers import json_response
+from app.utils.event_hub import event_hub, format_sse, task_channel, user_channel
+from app.utils.conditional import make_etag, is_not_modified, set_validators, not_modified_response
+from app.utils.page_cache import page_cache, list_tag, mine_tag
+from app.utils.verification_jobs import verification_pool, QueueFull
+from app.utils.verification_cache import verification_cache
+from app.utils.verification_batch import parse_filters, create_batch, start_batch, active_batch_for_task, BatchBusy
+from app.utils.verification import verification_cache_key, stream_requirement, apply_verification
+from app.utils.openai_client import openai_client, AzureOpenAIError
+from app.utils.rate_limiter import rate_limiter
+from app.utils.duplicates import duplicate_index
+from app.utils.uploads import save_file
+from app.utils.storage import backend_for
+from app.utils.archives import stream_zip, unique_names
+from markupsafe import Markup
+from sqlalchemy import func
 from app import db
 from datetime import datetime
-import os
-from werkzeug.utils import secure_filename
+from functools import partial
 from app.models import File
-import uuid
 import json
-import requests
-import random  # Temporary use, can be removed after connecting to Azure OpenAI
 
 tasks = Blueprint('tasks', __name__)
 
+# ?sort= options for the task lists: (value, label, column, descending)
+SCORE_SORTS = [
+    ('', 'Newest', None, None),
+    ('clarity', 'Clarity (low first)', Task.clarity_score, False),
+    ('clarity_desc', 'Clarity (high first)', Task.clarity_score, True),
+    ('feasibility', 'Feasibility (low first)', Task.feasibility_score, False),
+    ('feasibility_desc', 'Feasibility (high first)', Task.feasibility_score, True),
+]
+
+def _score_sort():
+    for value, _, column, descending in SCORE_SORTS:
+        if column is not None and value == request.args.get('sort'):
+            return column, descending
+    return None, None
+
+def _filter_by_scores(query):
+    """Apply the ?clarity_below= / ?feasibility_below= filters; unverified tasks never match"""
+    clarity_below = request.args.get('clarity_below', type=int)
+    feasibility_below = request.args.get('feasibility_below', type=int)
+    if clarity_below is not None:
+        query = query.filter(Task.clarity_score < clarity_below)
+    if feasibility_below is not None:
+        query = query.filter(Task.feasibility_score < feasibility_below)
+    return query
+
+def _paginate_tasks(query, per_page=10):
+    """Paginate a task list, by page number if ?page= is given, otherwise by the ?after= cursor"""
+    page = request.args.get('page', type=int)
+    score_col, descending = _score_sort()
+    
+    if page:
+        if score_col is None:
+            query = query.order_by(Task.created_at.desc(), Task.id.desc())
+        elif descending:
+            query = query.filter(score_col.isnot(None)).order_by(score_col.desc(), Task.id.desc())
+        else:
+            query = query.filter(score_col.isnot(None)).order_by(score_col.asc(), Task.id.asc())
+        return query.paginate(page=page, per_page=per_page)
+    
+    try:
+        if score_col is not None:
+            return keyset_paginate_by_value(query, score_col, Task.id, after=request.args.get('after'),
+                                            per_page=per_page, descending=descending)
+        return keyset_paginate(query, Task.created_at, Task.id,
+                               after=request.args.get('after'), per_page=per_page)
+    except InvalidCursor:
+        abort(400)
+
+def _list_cache_key(route):
+    return (route, request.args.get('page'), request.args.get('after'), request.args.get('sort'),
+            request.args.get('clarity_below', type=int), request.args.get('feasibility_below', type=int))
+
 @tasks.route('/')
 @login_required
 def all_tasks():
-    page = request.args.get('page', 1, type=int)
-    per_page = 10
-    
     # Filter conditions
     status_filter = request.args.get('status')
     priority_filter = request.args.get('priority')
+    status = TaskStatus(status_filter) if status_filter else None
+    priority = TaskPriority(priority_filter) if priority_filter else None
     
-    # Build query
-    query = Task.query
-    
-    if status_filter:
-        query = query.filter(Task.status == TaskStatus(status_filter))
-    
-    if priority_filter:
-        query = query.filter(Task.priority == TaskPriority(priority_filter))
+    def render_list():
+        # Build query
+        query = task_list_query()
+        
+        if status:
+            query = query.filter(Task.status == status)
+        
+        if priority:
+            query = query.filter(Task.priority == priority)
+        
+        query = _filter_by_scores(query)
+        
+        return render_template('tasks/_all_tasks_list.html', tasks=_paginate_tasks(query))
     
-    tasks_list = query.order_by(Task.created_at.desc()).paginate(page=page, per_page=per_page)
+    # 列表区域对所有用户相同，按过滤条件和页码缓存
+    task_list_html = page_cache.get_or_render(_list_cache_key('all_tasks'), list_tag(status, priority), render_list)
     
     return render_template('tasks/all_tasks.html', 
-                           tasks=tasks_list,
+                           task_list_html=Markup(task_list_html),
                            statuses=TaskStatus,
-                           priorities=TaskPriority)
+                           priorities=TaskPriority,
+                           score_sorts=[(value, label) for value, label, _, _ in SCORE_SORTS])
 
 @tasks.route('/my-tasks')
 @login_required
 def my_tasks():
-    page = request.args.get('page', 1, type=int)
-    per_page = 10
-    
     # Filter conditions
     status_filter = request.args.get('status')
     priority_filter = request.args.get('priority')
+    status = TaskStatus(status_filter) if status_filter else None
+    priority = TaskPriority(priority_filter) if priority_filter else None
     
-    # Build query - get tasks assigned to current user
-    query = Task.query.filter_by(assignee_id=current_user.id)
+    def render_list():
+        # Build query - get tasks assigned to current user
+        query = task_list_query().filter(Task.assignee_id == current_user.id)
+        
+        if status:
+            query = query.filter(Task.status == status)
+        
+        if priority:
+            query = query.filter(Task.priority == priority)
+        
+        query = _filter_by_scores(query)
+        
+        return render_template('tasks/_my_tasks_list.html', tasks=_paginate_tasks(query))
+    
+    task_list_html = page_cache.get_or_render(_list_cache_key('my_tasks'),
+                                              mine_tag(current_user.id, status, priority), render_list)
     
-    if status_filter:
-        query = query.filter(Task.status == TaskStatus(status_filter))
+    return render_template('tasks/my_tasks.html', 
+                           task_list_html=Markup(task_list_html),
+                           statuses=TaskStatus,
+                           priorities=TaskPriority,
+                           score_sorts=[(value, label) for value, label, _, _ in SCORE_SORTS])
+
+@tasks.route('/cache-stats')
+@login_required
+def cache_stats():
+    """当前进程的列表页缓存和验证结果缓存命中统计"""
+    stats = page_cache.stats()
+    stats['verification'] = verification_cache.stats()
+    stats['duplicates'] = duplicate_index.stats()
+    return jsonify(stats)
+
+@tasks.route('/search')
+@login_required
+def search():
+    q = request.args.get('q', '').strip()
+    page = request.args.get('page', 1, type=int)
+    per_page = 20
     
-    if priority_filter:
-        query = query.filter(Task.priority == TaskPriority(priority_filter))
+    # Filter conditions
+    status_filter = request.args.get('status')
+    priority_filter = request.args.get('priority')
     
-    tasks_list = query.order_by(Task.created_at.desc()).paginate(page=page, per_page=per_page)
+    hits = search_tasks(q,
+                        status=TaskStatus(status_filter) if status_filter else None,
+                        priority=TaskPriority(priority_filter) if priority_filter else None,
+                        limit=per_page + 1,
+                        offset=(page - 1) * per_page)
+    has_next = len(hits) > per_page
     
-    return render_template('tasks/my_tasks.html', 
-                           tasks=tasks_list,
+    return render_template('tasks/search.html',
+                           q=q,
+                           hits=hits[:per_page],
+                           page=page,
+                           has_next=has_next,
                            statuses=TaskStatus,
                            priorities=TaskPriority)
 
+@tasks.route('/changes')
+@login_required
+def changes():
+    """增量变更流：返回 since 游标之后的变更，下一次请求使用返回的 next_cursor"""
+    since = request.args.get('since', '0')
+    if not since.isdigit():
+        return jsonify({
+            'status': 'error',
+            'message': 'Invalid cursor'
+        }), 400
+    limit = min(request.args.get('limit', 100, type=int), current_app.config['CHANGE_FEED_MAX_BATCH'])
+    
+    change_list, task_map, has_more = get_changes_since(int(since), max(limit, 1))
+    
+    items = []
+    for change in change_list:
+        item = change.to_dict()
+        task = task_map.get(change.task_id)
+        item['task'] = task.to_dict() if task else None
+        items.append(item)
+    
+    return json_response({
+        'changes': items,
+        'next_cursor': str(change_list[-1].id) if change_list else since,
+        'has_more': has_more
+    })
+
+def _event_stream(channel):
+    """SSE响应：先补发 Last-Event-ID 之后的事件，再推送实时事件"""
+    # 每个连接在整个生命周期占用一个服务器线程，超过每进程上限时拒绝，页面退回手动刷新；
+    # 名额在返回响应之前占用（并发连接不会超出上限），响应关闭时释放
+    if not event_hub.reserve():
+        return Response('Too many event streams', status=503, mimetype='text/plain',
+                        headers={'Retry-After': '60'})
+    app = current_app._get_current_object()
+    last_id = request.headers.get('Last-Event-ID', type=int)
+    keepalive = current_app.config['SSE_KEEPALIVE_INTERVAL']
+    
+    def generate(last_id):
+        # 在生成器内订阅：响应体没有被读取（客户端提前断开）时不会留下订阅
+        sub = None
+        try:
+            sub = event_hub.subscribe(channel)
+            # 先订阅再补发，两者之间的事件由 last_id 去重
+            with app.app_context():
+                backlog = event_hub.replay(channel, last_id) if last_id is not None else []
+            yield 'retry: 3000\n\n'
+            for event in backlog:
+                last_id = event['id']
+                yield format_sse(event)
+            while True:
+                event = sub.get(timeout=keepalive)
+                if event is None:
+                    yield ': keepalive\n\n'
+                    continue
+                if last_id is not None and event['id'] <= last_id:
+                    continue
+                last_id = event['id']
+                yield format_sse(event)
+        finally:
+            if sub is not None:
+                event_hub.unsubscribe(sub)
+    
+    response = Response(generate(last_id), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+    response.call_on_close(event_hub.release)
+    return response
+
+@tasks.route('/events')
+@login_required
+def inbox_events():
+    return _event_stream(user_channel(current_user.id))
+
+@tasks.route('/<int:task_id>/events')
+@login_required
+def task_events(task_id):
+    if db.session.query(Task.id).filter_by(id=task_id).first() is None:
+        abort(404)
+    
+    return _event_stream(task_channel(task_id))
+
 @tasks.route('/create', methods=['GET', 'POST'])
 @login_required
 def create_task():
@@ -76,11 +275,22 @@ def create_task():
     ]
     
     if form.validate_on_submit():
+        # 已有相似需求时先列出来，用户确认后（ignore_duplicates）再提交才创建
+        duplicates = [] if request.form.get('ignore_duplicates') else \
+            duplicate_index.find_similar(form.title.data, form.business_goal.data)
+        if duplicates:
+            flash('Similar requirements already exist. Review them below, or submit again to create this one anyway.', 'warning')
+            return render_template('tasks/create_task.html',
+                                   form=form,
+                                   priorities=TaskPriority,
+                                   output_types=OutputType,
+                                   duplicates=duplicates)
+        
         task = Task(
             title=form.title.data,
             business_goal=form.business_goal.data,
-            priority=form.priority.data,
-            output_type=form.output_type.data,
+            priority=TaskPriority(form.priority.data),
+            output_type=OutputType(form.output_type.data),
             deadline=form.deadline.data,
             creator_id=current_user.id,
             status=TaskStatus.DRAFT
@@ -89,7 +299,14 @@ def create_task():
         if form.assignee_id.data > 0:
             task.assignee_id = form.assignee_id.data
         
+        # 在表单中验证过相同内容时，结果已在缓存中，直接保存分数
+        verified = verification_cache.get(verification_cache_key(task.title, task.business_goal))
+        if verified is not None:
+            apply_verification(task, verified)
+        
         db.session.add(task)
+        db.session.flush()
+        on_task_created(task)
         db.session.commit()
         
         # Process uploaded files
@@ -97,22 +314,7 @@ def create_task():
             files = request.files.getlist('supporting_files')
             for file in files:
                 if file and file.filename:
-                    filename = secure_filename(file.filename)
-                    unique_filename = str(uuid.uuid4()) + '_' + filename
-                    file_path = os.path.join(current_app.config['UPLOAD_FOLDER'], unique_filename)
-                    file.save(file_path)
-                    
-                    # Create file record
-                    file_record = File(
-                        filename=unique_filename,
-                        original_filename=filename,
-                        file_path=unique_filename,
-                        file_size=os.path.getsize(file_path),
-                        file_type=file.content_type,
-                        uploader_id=current_user.id,
-                        task_id=task.id
-                    )
-                    db.session.add(file_record)
+                    db.session.add(save_file(file, current_user.id, task.id))
             
             db.session.commit()
         
@@ -127,13 +329,50 @@ def create_task():
 @tasks.route('/<int:task_id>')
 @login_required
 def view_task(task_id):
+    # 先用一条聚合查询取出任务和附件列表的版本信息，命中缓存时不加载任务也不渲染模板
+    version = db.session.query(
+        Task.updated_at, Task.creator_id, Task.assignee_id,
+        func.count(File.id), func.sum(File.id), func.max(File.uploaded_at), func.sum(File.file_size)
+    ).outerjoin(File, File.task_id == Task.id).filter(Task.id == task_id).group_by(Task.id).first()
+    if version is None:
+        abort(404)
+    
+    last_modified = max(filter(None, (version[0], version[5])), default=None)
+    etag = make_etag(current_app.config['PAGE_ETAG_VERSION'], current_user.id, task_id, *version)
+    
+    # 有待显示的flash消息时页面内容不同，不能返回304
+    if not session.get('_flashes') and is_not_modified(etag, last_modified, weak=True):
+        return not_modified_response(etag, last_modified, weak=True)
+    
+    task = get_task_detail_or_404(task_id)
+    task_files = get_task_files(task.id)
+    
+    response = make_response(render_template('tasks/view_task.html', task=task, task_files=task_files))
+    return set_validators(response, etag, last_modified, weak=True)
+
+@tasks.route('/<int:task_id>/files.zip')
+@login_required
+def download_task_files(task_id):
+    """Stream every file attached to the task as one ZIP, built on the fly"""
     task = Task.query.get_or_404(task_id)
+    task_files = get_task_files(task.id)
+    if not task_files:
+        abort(404)
     
-    return render_template('tasks/view_task.html', task=task)
+    # 响应开始发送后才读取内容：先确定每个文件的后端和key，不在生成器中访问数据库
+    names = unique_names([file.original_filename for file in task_files])
+    entries = [
+        (name, file.file_size, file.uploaded_at, partial(backend_for(file).iter_chunks, file.file_path))
+        for name, file in zip(names, task_files)
+    ]
+    response = Response(stream_zip(entries), mimetype='application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename=task-{task.id}-files.zip'
+    return response
 
 @tasks.route('/api/verify', methods=['POST'])
 @login_required
 def api_verify_task():
+    """Queue a requirement verification and return the job id immediately (or the cached result) with any similar existing tasks"""
     data = request.json
     title = data.get('title', '')
     business_goal = data.get('business_goal', '')
@@ -145,104 +384,191 @@ def api_verify_task():
         }), 400
     
     try:
-        # Azure OpenAI API call
-        # Configure your Azure OpenAI API key and endpoint here
-        azure_api_key = os.environ.get('AZURE_OPENAI_API_KEY', '')
-        azure_endpoint = os.environ.get('AZURE_OPENAI_ENDPOINT', '')
-        azure_deployment_name = os.environ.get('AZURE_OPENAI_DEPLOYMENT_NAME', 'gpt-4o-mini')
-        azure_api_version = os.environ.get('AZURE_OPENAI_API_VERSION', '2025-04-15')
-        
-        if azure_api_key and azure_endpoint:
-            # Build API request
-            url = f"{azure_endpoint}/openai/deployments/{azure_deployment_name}/chat/completions?api-version={azure_api_version}"
-            headers = {
-                "Content-Type": "application/json",
-                "api-key": azure_api_key
-            }
-            
-            # Build request content for Azure OpenAI
-            payload = {
-                "messages": [
-                    {
-                        "role": "system", 
-                        "content": "You are a senior data scientist and researcher at a large technology company. You are evaluating the clarity and feasibility of a new requirement. Please provide a clarity score (0-100) and a feasibility score (0-100), along with detailed feedback. Your feedback should identify any areas of ambiguity, suggest what additional information might be needed, and assess if the requirement is technically feasible with current technologies."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Please evaluate this requirement:\nTitle: {title}\nBusiness Goal: {business_goal}\n\nProvide your analysis in this JSON format:\n```json\n{{\"clarity_score\": (number 0-100), \"feasibility_score\": (number 0-100), \"feedback\": \"Your detailed feedback here\"}}\n```"
-                    }
-                ],
-                "temperature": 0.7,
-                "max_tokens": 800,
-                "n": 1
-            }
-            
-            # Send request to Azure OpenAI
-            response = requests.post(url, headers=headers, json=payload)
-            
-            if response.status_code == 200:
-                response_data = response.json()
-                assistant_message = response_data['choices'][0]['message']['content']
-                
-                # Extract JSON part from response
-                try:
-                    # Find JSON formatted string
-                    json_start = assistant_message.find('{')
-                    json_end = assistant_message.rfind('}') + 1
-                    if json_start >= 0 and json_end > json_start:
-                        json_str = assistant_message[json_start:json_end]
-                        result = json.loads(json_str)
-                        
-                        # Ensure all required fields are present
-                        if all(k in result for k in ['clarity_score', 'feasibility_score', 'feedback']):
-                            return jsonify(result)
-                except Exception as e:
-                    current_app.logger.error(f"Error parsing AI response: {str(e)}")
-            
-            # If Azure OpenAI call fails or parsing fails, return mock data
-            current_app.logger.warning("Failed to get valid response from Azure OpenAI, using mock data")
-        
-        # Use mock data (when Azure OpenAI API is unavailable)
-        # This part can be removed in actual deployment
-        clarity_score = random.randint(65, 95)
-        feasibility_score = random.randint(60, 90)
-        
-        feedback_templates = [
-            "The requirement is generally clear but could benefit from more specific metrics for success. Consider defining key performance indicators (KPIs) that would demonstrate successful implementation. The feasibility is good, though implementation timeline might need adjustment based on available resources.",
-            "Your business goal is well-defined, but the scope needs more precise boundaries. Try specifying which data sources will be used and exact time ranges. From a technical perspective, this is feasible but would require significant data processing capabilities.",
-            "This requirement has good clarity in terms of the business objective, but lacks detail on technical requirements. The feasibility depends on data availability and quality. Please provide more information about existing data infrastructure and quality."
-        ]
-        
+        job = verification_pool.submit(title, business_goal, current_user.id)
+    except QueueFull:
+        return jsonify({
+            'status': 'error',
+            'message': 'Verification queue is full, please try again later'
+        }), 503
+    
+    payload = job.to_dict()
+    payload['poll_url'] = url_for('tasks.api_verify_job', job_id=job.id)
+    payload['duplicates'] = _similar_tasks(title, business_goal)
+    response = jsonify(payload)
+    # 缓存命中时任务已完成，结果直接随响应返回
+    response.status_code = 200 if job.is_finished else 202
+    response.headers['Location'] = url_for('tasks.api_verify_job', job_id=job.id)
+    return response
+
+def _similar_tasks(title, business_goal):
+    return [{
+        'id': task.id,
+        'title': task.title,
+        'status': task.status.value,
+        'similarity': round(score, 2),
+        'url': url_for('tasks.view_task', task_id=task.id)
+    } for task, score in duplicate_index.find_similar(title, business_goal)]
+
+def _sse_message(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@tasks.route('/api/verify/stream', methods=['POST'])
+@login_required
+def api_verify_stream():
+    """Verify a requirement and relay the model output as Server-Sent Events"""
+    data = request.get_json(silent=True) or {}
+    title = data.get('title', '')
+    business_goal = data.get('business_goal', '')
+    
+    if not title or not business_goal:
         return jsonify({
-            'clarity_score': clarity_score,
-            'feasibility_score': feasibility_score,
-            'feedback': random.choice(feedback_templates)
-        })
+            'status': 'error',
+            'message': 'Missing required fields'
+        }), 400
+    
+    cache_key = verification_cache_key(title, business_goal)
+    cached = verification_cache.get(cache_key)
+    duplicates = _similar_tasks(title, business_goal)
+    
+    def generate():
+        if duplicates:
+            yield _sse_message('duplicates', {'tasks': duplicates})
+        if cached is not None:
+            yield _sse_message('result', cached)
+            yield _sse_message('done', {})
+            return
         
-    except Exception as e:
-        current_app.logger.error(f"Error during verification: {str(e)}")
+        try:
+            for kind, value in stream_requirement(title, business_goal):
+                if kind == 'token':
+                    yield _sse_message('token', {'text': value})
+                    continue
+                # 分数解析出来后立即缓存并发送，客户端可以不等剩余输出就断开
+                if openai_client.configured:
+                    verification_cache.put(cache_key, value)
+                yield _sse_message('result', value)
+            yield _sse_message('done', {})
+        except AzureOpenAIError as e:
+            current_app.logger.warning(f"Streaming verification failed: {str(e)}")
+            yield _sse_message('error', {'message': str(e)})
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+@tasks.route('/api/verify/<job_id>')
+@login_required
+def api_verify_job(job_id):
+    """Return a verification job; with ?wait=N, block up to N seconds until it finishes"""
+    wait = min(max(request.args.get('wait', 0, type=float), 0), current_app.config['VERIFICATION_LONG_POLL_MAX'])
+    
+    if wait:
+        job = verification_pool.wait(job_id, wait)
+    else:
+        job = db.session.get(VerificationJob, job_id)
+    if job is None or job.created_by != current_user.id:
+        abort(404)
+    
+    return jsonify(job.to_dict())
+
+@tasks.route('/api/openai-usage')
+@login_required
+def api_openai_usage():
+    """How close the shared Azure OpenAI quota is to its limits"""
+    return jsonify(rate_limiter.usage())
+
+@tasks.route('/verify-batch', methods=['POST'])
+@login_required
+def create_verification_batch():
+    """Start verifying every task that matches the filter in the background"""
+    data = request.get_json(silent=True) or {}
+    try:
+        filters = parse_filters(data)
+    except (ValueError, TypeError) as e:
         return jsonify({
             'status': 'error',
-            'message': 'Internal server error during verification'
-        }), 500
+            'message': f'Invalid filter: {str(e)}'
+        }), 400
+    
+    concurrency = data.get('concurrency') or current_app.config['VERIFICATION_BATCH_CONCURRENCY']
+    if not isinstance(concurrency, int) or concurrency < 1:
+        return jsonify({
+            'status': 'error',
+            'message': 'concurrency must be a positive integer'
+        }), 400
+    concurrency = min(concurrency, current_app.config['VERIFICATION_BATCH_MAX_CONCURRENCY'])
+    
+    batch = create_batch(filters, concurrency, current_user.id)
+    start_batch(current_app._get_current_object(), batch.id)
+    
+    response = jsonify(batch.to_dict())
+    response.status_code = 202
+    response.headers['Location'] = url_for('tasks.verification_batch', batch_id=batch.id)
+    return response
+
+def _get_batch_or_404(batch_id):
+    batch = db.session.get(VerificationBatch, batch_id)
+    if batch is None or batch.created_by != current_user.id:
+        abort(404)
+    return batch
+
+@tasks.route('/verify-batch/<int:batch_id>')
+@login_required
+def verification_batch(batch_id):
+    """Batch progress and throughput"""
+    return jsonify(_get_batch_or_404(batch_id).to_dict())
+
+@tasks.route('/verify-batch/<int:batch_id>/resume', methods=['POST'])
+@login_required
+def resume_verification_batch(batch_id):
+    """Continue an interrupted batch from its last committed task"""
+    batch = _get_batch_or_404(batch_id)
+    try:
+        start_batch(current_app._get_current_object(), batch.id)
+    except BatchBusy:
+        return jsonify({
+            'status': 'error',
+            'message': 'Batch is already running or has completed'
+        }), 409
+    
+    db.session.refresh(batch)
+    return jsonify(batch.to_dict()), 202
+
+def _wants_json():
+    accept = request.accept_mimetypes
+    return request.is_json or (accept.accept_json and not accept.accept_html)
 
 @tasks.route('/<int:task_id>/verify', methods=['POST'])
 @login_required
 def verify_task(task_id):
+    """Verify one task in the background; scores are saved on the task when the batch completes"""
     task = Task.query.get_or_404(task_id)
+    app = current_app._get_current_object()
     
-    # Should call Azure OpenAI API for verification
-    # Using simple simulation for now
-    verification_result = "Task verification completed. The requirement is clear and feasible."
+    # A running batch that still has this task ahead of it will verify it; don't pay for a second call
+    batch = active_batch_for_task(app, task.id)
+    queued = batch is None
+    if queued:
+        batch = create_batch({'task_id': task.id}, 1, current_user.id)
+        start_batch(app, batch.id)
     
-    task.verification_result = verification_result
-    task.status = TaskStatus.VERIFIED
-    db.session.commit()
+    if not _wants_json():
+        if queued:
+            flash('Verification started, the scores will appear on this page when it finishes', 'info')
+        else:
+            flash('This task is already being verified', 'info')
+        return redirect(url_for('tasks.view_task', task_id=task.id))
     
-    return jsonify({
-        'status': 'success',
-        'result': verification_result
-    })
+    payload = {
+        'status': 'queued' if queued else 'running',
+        'batch_id': batch.id
+    }
+    if batch.created_by == current_user.id:
+        payload['progress_url'] = url_for('tasks.verification_batch', batch_id=batch.id)
+    response = jsonify(payload)
+    response.status_code = 202
+    return response
 
 @tasks.route('/<int:task_id>/submit', methods=['POST'])
 @login_required
@@ -250,7 +576,9 @@ def submit_task(task_id):
     task = Task.query.get_or_404(task_id)
     
     if task.status == TaskStatus.DRAFT or task.status == TaskStatus.VERIFIED:
+        old_status = task.status
         task.status = TaskStatus.PENDING
+        on_task_changed(task, ChangeAction.SUBMITTED, old_status)
         db.session.commit()
         flash('Task submitted successfully', 'success')
     else:
@@ -265,7 +593,9 @@ def update_task_status(task_id):
     new_status = request.form.get('status')
     
     if new_status and new_status in [s.value for s in TaskStatus]:
+        old_status = task.status
         task.status = TaskStatus(new_status)
+        on_task_changed(task, ChangeAction.STATUS_CHANGED, old_status)
         db.session.commit()
         flash('Task status updated', 'success')
     else:
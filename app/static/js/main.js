@@ -61,4 +61,14 @@ function submitFormWithAjax(formId, successCallback) {
             console.error('Error:', error);
         });
     });
-} 
\ No newline at end of file
+} 
+// 订阅任务事件（SSE），断线后浏览器会携带 Last-Event-ID 自动重连
+function subscribeTaskEvents(url, onEvent) {
+    if (typeof EventSource === 'undefined') return null;
+    
+    const source = new EventSource(url);
+    source.addEventListener('task', function(e) {
+        onEvent(JSON.parse(e.data));
+    });
+    return source;
+}
@@ -1,131 +1,166 @@
 """
 Azure Blob Storage工具
+
+存储后端的 Blob 实现（见 app/utils/storage.py）。上传从请求流按块读取，多个块并行上传
+（max_concurrency 个并发请求，每块 AZURE_STORAGE_BLOCK_SIZE 字节），最后提交块列表；
+内存占用约为 块大小 × 并发数，与文件大小无关。小于 AZURE_STORAGE_SINGLE_PUT_SIZE 的文件一次请求上传。
+下载按块读取，每次请求最多取 AZURE_STORAGE_DOWNLOAD_CHUNK_SIZE 字节。
+
+下载可以改为重定向到短期有效的 SAS URL（AZURE_STORAGE_DOWNLOAD_REDIRECT），由浏览器直接从 Blob Storage 读取。
+SAS URL 按 (blob名称, 权限, Content-Disposition) 缓存在进程内，剩余有效期不足 AZURE_STORAGE_SAS_REFRESH 秒时重新签名，
+签名不需要访问网络，也不再为每次请求创建 BlobClient。
+
+浏览器直接上传时使用只写（create + write）的 SAS URL 逐块 Put Block，再 Put Block List 提交，字节不经过应用服务器；
+跨域上传需要在存储账户上配置 CORS（允许应用的源使用 PUT 和 x-ms-* 请求头）。
+上传完成后内容在服务端复制（Copy Blob，同一存储账户内不经过应用）到另一个key再登记，上传用的 SAS 无法修改登记的内容。
+
+本地开发可以连接 Azurite（AZURE_STORAGE_CONNECTION_STRING 使用 devstoreaccount1 的连接字符串）。
 """
-from azure.storage.blob import BlobServiceClient, BlobClient, ContainerClient
-from flask import current_app
-import uuid
 import os
-from datetime import datetime, timedelta
-from azure.storage.blob import generate_blob_sas, BlobSasPermissions
-
-# 全局变量
-blob_service_client = None
-container_client = None
-
-def init_blob_service(app):
-    """初始化Blob Storage服务"""
-    global blob_service_client, container_client
-    
-    connection_string = app.config.get('AZURE_STORAGE_CONNECTION_STRING')
-    container_name = app.config.get('AZURE_STORAGE_CONTAINER_NAME', 'file-uploads')
-    
-    if not connection_string:
-        app.logger.warning("Azure Storage connection string not configured.")
-        return
-        
-    try:
-        # 创建BlobServiceClient对象
-        blob_service_client = BlobServiceClient.from_connection_string(connection_string)
-        
-        # 获取或创建容器
-        try:
-            container_client = blob_service_client.get_container_client(container_name)
-            # 检查容器是否存在，如果不存在会引发异常
-            container_client.get_container_properties()
-        except Exception:
-            # 容器不存在，创建新容器
-            container_client = blob_service_client.create_container(
-                name=container_name,
-                public_access='blob'  # 设置为blob级别的公共访问
-            )
-            app.logger.info(f"Created new container: {container_name}")
-            
-        app.logger.info(f"Azure Blob Storage initialized with container: {container_name}")
-    except Exception as e:
-        app.logger.error(f"Failed to initialize Azure Blob Storage: {str(e)}")
-        blob_service_client = None
-        container_client = None
-        
-def upload_file_to_blob(file_data, original_filename, content_type=None):
-    """上传文件到Blob Storage"""
-    if not blob_service_client or not container_client:
-        current_app.logger.error("Azure Blob Storage not initialized")
-        return None
-        
-    try:
-        # 生成唯一的blob名称
-        unique_filename = f"{str(uuid.uuid4())}_{original_filename}"
-        
-        # 创建blob客户端
-        blob_client = blob_service_client.get_blob_client(
-            container=container_client.container_name,
-            blob=unique_filename
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from urllib.parse import quote
+from azure.core.exceptions import ResourceExistsError, ResourceNotFoundError
+from azure.storage.blob import BlobSasPermissions, BlobServiceClient, ContentSettings, generate_blob_sas
+
+
+class _HashingReader:
+    """按顺序读取请求流并更新哈希；不支持 seek，SDK 因此顺序读取各块再并行上传"""
+
+    def __init__(self, stream, hashers):
+        self._stream = stream
+        self._hashers = hashers
+        self.size = 0
+
+    def read(self, size=-1):
+        data = self._stream.read(size)
+        for hasher in self._hashers:
+            hasher.update(data)
+        self.size += len(data)
+        return data
+
+
+class AzureBlobStorage:
+    name = 'azure'
+    local = False
+
+    def __init__(self, app):
+        config = app.config
+        self.max_concurrency = config['AZURE_STORAGE_MAX_CONCURRENCY']
+        self.service_client = BlobServiceClient.from_connection_string(
+            config['AZURE_STORAGE_CONNECTION_STRING'],
+            max_block_size=config['AZURE_STORAGE_BLOCK_SIZE'],
+            max_single_put_size=config['AZURE_STORAGE_SINGLE_PUT_SIZE'],
+            max_single_get_size=config['AZURE_STORAGE_DOWNLOAD_CHUNK_SIZE'],
+            max_chunk_get_size=config['AZURE_STORAGE_DOWNLOAD_CHUNK_SIZE']
         )
-        
-        # 上传文件
-        blob_client.upload_blob(file_data, overwrite=True, content_settings={
-            'content_type': content_type,
-            'content_disposition': f'attachment; filename="{original_filename}"'
-        })
-        
-        # 返回blob的URL和唯一文件名
-        return {
-            'url': blob_client.url,
-            'filename': unique_filename,
-            'blob_name': unique_filename
-        }
-    except Exception as e:
-        current_app.logger.error(f"Error uploading file to Azure Blob Storage: {str(e)}")
-        return None
-        
-def get_blob_url(blob_name, with_sas_token=False, expiry_hours=1):
-    """获取blob的URL，可选带SAS令牌"""
-    if not blob_service_client or not container_client:
-        current_app.logger.error("Azure Blob Storage not initialized")
-        return None
-    
-    try:
-        blob_client = blob_service_client.get_blob_client(
-            container=container_client.container_name,
-            blob=blob_name
+        self.container_client = self.service_client.get_container_client(config['AZURE_STORAGE_CONTAINER_NAME'])
+
+        # 只有账户密钥（连接字符串中的 AccountKey）可以签发 SAS
+        self.account_key = getattr(self.service_client.credential, 'account_key', None)
+        self.sas_ttl = timedelta(seconds=config['AZURE_STORAGE_SAS_TTL'])
+        self.sas_refresh = timedelta(seconds=config['AZURE_STORAGE_SAS_REFRESH'])
+        self.sas_max_entries = config['AZURE_STORAGE_SAS_CACHE_MAX_ENTRIES']
+        self._sas_urls = OrderedDict()
+        self._sas_lock = threading.Lock()
+
+        try:
+            # 文件只能通过应用下载，容器不开放公共访问
+            self.container_client.create_container()
+            app.logger.info(f"Created new container: {self.container_client.container_name}")
+        except ResourceExistsError:
+            pass
+        except Exception as e:
+            app.logger.error(f"Failed to initialize Azure Blob Storage container: {str(e)}")
+
+    def _blob(self, key):
+        return self.container_client.get_blob_client(key)
+
+    def save(self, key, stream, hashers=(), content_type=None):
+        reader = _HashingReader(stream, hashers)
+        self._blob(key).upload_blob(
+            reader,
+            overwrite=True,
+            max_concurrency=self.max_concurrency,
+            content_settings=ContentSettings(content_type=content_type)
         )
-        
-        if with_sas_token:
-            # 生成SAS令牌
-            sas_token = generate_blob_sas(
-                account_name=blob_service_client.account_name,
-                container_name=container_client.container_name,
-                blob_name=blob_name,
-                account_key=blob_service_client.credential.account_key,
-                permission=BlobSasPermissions(read=True),
-                expiry=datetime.utcnow() + timedelta(hours=expiry_hours)
+        return reader.size
+
+    def put_file(self, key, source_path, content_type=None):
+        # 本地文件可以定位读取，SDK 并行读取并上传各块
+        with open(source_path, 'rb') as source:
+            self._blob(key).upload_blob(
+                source,
+                length=os.path.getsize(source_path),
+                overwrite=True,
+                max_concurrency=self.max_concurrency,
+                content_settings=ContentSettings(content_type=content_type)
             )
-            
-            # 返回带有SAS令牌的URL
-            return f"{blob_client.url}?{sas_token}"
-        else:
-            # 返回公共URL
-            return blob_client.url
-    
-    except Exception as e:
-        current_app.logger.error(f"Error generating blob URL: {str(e)}")
-        return None
-        
-def delete_blob(blob_name):
-    """删除blob"""
-    if not blob_service_client or not container_client:
-        current_app.logger.error("Azure Blob Storage not initialized")
-        return False
-        
-    try:
-        blob_client = blob_service_client.get_blob_client(
-            container=container_client.container_name,
-            blob=blob_name
+        os.remove(source_path)
+
+    def iter_chunks(self, key, start=0, length=None):
+        downloader = self._blob(key).download_blob(offset=start, length=length)
+        yield from downloader.chunks()
+
+    @property
+    def direct_uploads(self):
+        return bool(self.account_key)
+
+    def upload_url(self, key):
+        """浏览器直接上传用的只写 SAS URL"""
+        return self.sas_url(key, 'cw')
+
+    def copy(self, source_key, target_key):
+        """在服务端把 source_key 复制为 target_key（已存在时覆盖），等待复制完成；复制失败时抛出 RuntimeError"""
+        target = self._blob(target_key)
+        status = target.start_copy_from_url(self.sas_url(source_key, 'r'))['copy_status']
+        while status == 'pending':
+            time.sleep(1)
+            status = target.get_blob_properties().copy.status
+        if status != 'success':
+            raise RuntimeError(f'Copy of {source_key} to {target_key} ended with status {status}')
+
+    def size(self, key):
+        """已提交内容的大小，不存在时返回None"""
+        try:
+            return self._blob(key).get_blob_properties().size
+        except ResourceNotFoundError:
+            return None
+
+    def sas_url(self, key, permission='r', content_disposition=None):
+        """blob 的 SAS URL，没有账户密钥时返回None；缓存的 URL 在剩余有效期不足 sas_refresh 时重新签名"""
+        if not self.account_key:
+            return None
+        cache_key = (key, permission, content_disposition)
+        now = datetime.now(timezone.utc)
+        with self._sas_lock:
+            entry = self._sas_urls.get(cache_key)
+            if entry is not None and entry[1] - now > self.sas_refresh:
+                self._sas_urls.move_to_end(cache_key)
+                return entry[0]
+
+        expiry = now + self.sas_ttl
+        token = generate_blob_sas(
+            account_name=self.service_client.account_name,
+            container_name=self.container_client.container_name,
+            blob_name=key,
+            account_key=self.account_key,
+            permission=BlobSasPermissions.from_string(permission),
+            expiry=expiry,
+            content_disposition=content_disposition
         )
-        
-        # 删除blob
-        blob_client.delete_blob()
-        return True
-    except Exception as e:
-        current_app.logger.error(f"Error deleting blob: {str(e)}")
-        return False 
\ No newline at end of file
+        url = f'{self.container_client.url}/{quote(key)}?{token}'
+        with self._sas_lock:
+            self._sas_urls[cache_key] = (url, expiry)
+            self._sas_urls.move_to_end(cache_key)
+            while len(self._sas_urls) > self.sas_max_entries:
+                self._sas_urls.popitem(last=False)
+        return url
+
+    def delete(self, key):
+        try:
+            self._blob(key).delete_blob()
+        except ResourceNotFoundError:
+            pass
@@ -0,0 +1,47 @@
+"""
+条件请求（ETag / Last-Modified）工具
+
+验证器由数据库中的时间戳等元数据计算，命中时直接返回304，不渲染模板也不读取文件。
+"""
+import hashlib
+from datetime import timezone
+from flask import current_app, request
+
+
+def make_etag(*parts):
+    """把若干元数据拼接后取哈希作为ETag"""
+    raw = '|'.join('' if part is None else str(part) for part in parts)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def _as_utc(value):
+    if value is None:
+        return None
+    return value.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def is_not_modified(etag, last_modified=None, weak=False):
+    """请求携带的验证器与当前资源一致时返回True；有If-None-Match时忽略If-Modified-Since"""
+    if request.if_none_match:
+        if weak:
+            return request.if_none_match.contains_weak(etag)
+        return request.if_none_match.contains(etag)
+
+    if request.if_modified_since and last_modified is not None:
+        return _as_utc(last_modified) <= request.if_modified_since
+
+    return False
+
+
+def set_validators(response, etag, last_modified=None, weak=False):
+    response.set_etag(etag, weak=weak)
+    if last_modified is not None:
+        response.last_modified = _as_utc(last_modified)
+    # 页面因用户而异，只允许浏览器缓存，并且每次使用前都要验证
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def not_modified_response(etag, last_modified=None, weak=False):
+    return set_validators(current_app.response_class(status=304), etag, last_modified, weak)
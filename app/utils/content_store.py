@@ -0,0 +1,95 @@
+"""
+内容寻址的文件存储
+
+上传的文件按 SHA-256 只保存一份（file_blob 表），File 记录的 file_path 指向共享的内容，
+file_blob.ref_count 记录引用它的 File 数。相同内容再次上传时只增加引用计数，新写入的副本随即删除；
+File 被删除（包括随任务级联删除）时减少计数，归零后在事务提交之后从存储后端删除内容。
+
+内容写入存储后端（见 app/utils/storage.py）时使用随机的key：写入前还不知道校验和，
+并且计数归零删除后又上传相同内容时不会与正在进行的删除冲突。
+没有 file_blob 记录的早期文件按原来的方式单独删除。
+"""
+import uuid
+from flask import current_app
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.models import File, FileBlob
+from app.utils.storage import storage
+
+
+def new_key():
+    """新内容在存储后端中的key"""
+    key = uuid.uuid4().hex
+    return f'{key[:2]}/{key}'
+
+
+def acquire(digest):
+    """内容已存在时增加引用计数并返回 (key, 存储后端名称)，否则返回None"""
+    claimed = db.session.execute(
+        update(FileBlob).where(FileBlob.sha256 == digest).values(ref_count=FileBlob.ref_count + 1)
+    ).rowcount
+    if not claimed:
+        return None
+    return db.session.execute(select(FileBlob.path, FileBlob.storage).where(FileBlob.sha256 == digest)).first()
+
+
+def store(backend, key, digest, size):
+    """登记已经写入 backend 的内容，返回 File 应引用的 (key, 存储后端名称)；
+    相同内容已存在时引用已有的那份并删除刚写入的副本（调用方提交）"""
+    for _ in range(3):
+        existing = acquire(digest)
+        if existing is not None:
+            backend.delete(key)
+            return tuple(existing)
+
+        try:
+            with db.session.begin_nested():
+                db.session.add(FileBlob(sha256=digest, path=key, storage=backend.name, size=size, ref_count=1))
+            return key, backend.name
+        except IntegrityError:
+            # 并发上传了相同内容并先提交：改为引用已有的那份
+            continue
+    raise RuntimeError(f'Could not store content {digest}')
+
+
+def _pending_removals(session):
+    return session.info.setdefault('content_store_removals', [])
+
+
+@event.listens_for(File, 'after_delete')
+def _release_content(mapper, connection, target):
+    """File 删除时释放对内容的引用；内容等事务提交后再删除"""
+    released = connection.execute(update(FileBlob).where(
+        FileBlob.sha256 == target.sha256, FileBlob.path == target.file_path
+    ).values(ref_count=FileBlob.ref_count - 1)).rowcount if target.sha256 else 0
+
+    if released:
+        removed = connection.execute(delete(FileBlob).where(
+            FileBlob.sha256 == target.sha256, FileBlob.path == target.file_path, FileBlob.ref_count <= 0
+        )).rowcount
+        if not removed:
+            return
+    session = object_session(target)
+    if session is not None:
+        _pending_removals(session).append((target.storage, target.file_path))
+
+
+@event.listens_for(Session, 'after_commit')
+def _remove_released_files(session):
+    # 保存点提交也会触发，等最外层事务提交后再删除
+    if session.in_nested_transaction():
+        return
+    removals = session.info.pop('content_store_removals', None)
+    for name, key in removals or ():
+        try:
+            storage.backend(name).delete(key)
+        except Exception as e:
+            current_app.logger.error(f"Error deleting file {key} from {name} storage: {str(e)}")
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_released_files(session, previous_transaction):
+    if previous_transaction.parent is None:
+        session.info.pop('content_store_removals', None)
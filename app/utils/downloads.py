@@ -0,0 +1,122 @@
+"""
+文件下载
+
+由 Python 进程发送时支持单个字节范围的 Range / If-Range 请求（206），客户端可以断点续传或分段并行下载。
+
+配置 FILE_DOWNLOAD_OFFLOAD 后，视图只做权限检查和元数据处理，响应中返回 X-Sendfile（Apache mod_xsendfile、
+lighttpd）或 X-Accel-Redirect（nginx internal location）头，由前端 Web 服务器读取文件并处理 Range，
+大文件下载不再占用 Python 工作进程。
+
+保存在其他存储后端（Azure Blob）中的文件按块读取后流式发送，只读取请求的字节范围；
+开启 AZURE_STORAGE_DOWNLOAD_REDIRECT 时改为302重定向到短期有效的只读 SAS URL，
+浏览器直接从 Blob Storage 下载（Range 也由 Blob Storage 处理），文件内容不经过应用服务器。
+"""
+import mimetypes
+import os
+from datetime import timezone
+from urllib.parse import quote
+from flask import current_app, redirect, request, send_from_directory
+from werkzeug.datastructures import ContentRange
+from werkzeug.exceptions import RequestedRangeNotSatisfiable
+from werkzeug.http import dump_options_header
+from app.utils.conditional import set_validators
+from app.utils.storage import backend_for
+
+OFFLOAD_MODES = ('x-sendfile', 'x-accel-redirect')
+
+
+def send_upload(file, etag):
+    """把 File 记录的内容作为附件发送"""
+    backend = backend_for(file)
+    path, download_name, last_modified = file.file_path, file.original_filename, file.uploaded_at
+    if not backend.local:
+        if current_app.config['AZURE_STORAGE_DOWNLOAD_REDIRECT']:
+            url = backend.sas_url(path, 'r', content_disposition=_content_disposition(download_name))
+            if url is not None:
+                response = redirect(url)
+                # 重定向地址很快过期，不允许缓存
+                response.cache_control.private = True
+                response.cache_control.no_store = True
+                return response
+        return set_validators(_stream_response(backend, file, etag), etag, last_modified)
+
+    mode = current_app.config['FILE_DOWNLOAD_OFFLOAD']
+    if mode in OFFLOAD_MODES:
+        return set_validators(_offload_response(mode, path, download_name), etag, last_modified)
+
+    response = send_from_directory(
+        directory=backend.folder,
+        path=path,
+        as_attachment=True,
+        download_name=download_name,
+        etag=etag,
+        last_modified=last_modified
+    )
+    # werkzeug 只在206响应中带 Accept-Ranges，完整响应也声明，客户端据此断点续传
+    response.headers['Accept-Ranges'] = 'bytes'
+    return set_validators(response, etag, last_modified)
+
+
+def _mimetype(download_name):
+    # 与 send_file 一致，按下载文件名推断类型
+    return mimetypes.guess_type(download_name)[0] or 'application/octet-stream'
+
+
+def _byte_range(size, etag, last_modified):
+    """请求的字节范围 (start, stop)；没有 Range、If-Range 不匹配或请求多个范围时返回None，发送完整内容"""
+    byte_range = request.range
+    if byte_range is None or size == 0 or len(byte_range.ranges) != 1:
+        return None
+    if_range = request.if_range
+    if if_range.etag is not None and if_range.etag != etag:
+        return None
+    if if_range.date is not None and (
+            last_modified is None or last_modified.replace(tzinfo=timezone.utc, microsecond=0) > if_range.date):
+        return None
+
+    result = byte_range.range_for_length(size)
+    if result is None:
+        # 416 响应带 Content-Range: bytes */<size>，客户端据此得知文件的实际大小
+        raise RequestedRangeNotSatisfiable(length=size)
+    return result
+
+
+def _stream_response(backend, file, etag):
+    size = file.file_size
+    byte_range = _byte_range(size, etag, file.uploaded_at)
+    start, stop = byte_range or (0, size)
+    response = current_app.response_class(
+        backend.iter_chunks(file.file_path, start, stop - start),
+        mimetype=_mimetype(file.original_filename),
+        direct_passthrough=True
+    )
+    response.content_length = stop - start
+    if byte_range is not None:
+        response.status_code = 206
+        response.content_range = ContentRange('bytes', start, stop, size)
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Content-Disposition'] = _content_disposition(file.original_filename)
+    return response
+
+
+def _offload_response(mode, path, download_name):
+    response = current_app.response_class(mimetype=_mimetype(download_name))
+    if mode == 'x-sendfile':
+        response.headers['X-Sendfile'] = os.path.abspath(os.path.join(current_app.config['UPLOAD_FOLDER'], path))
+    else:
+        prefix = current_app.config['FILE_DOWNLOAD_ACCEL_PREFIX'].rstrip('/')
+        response.headers['X-Accel-Redirect'] = f'{prefix}/{quote(path)}'
+    response.headers['Accept-Ranges'] = 'bytes'
+    response.headers['Content-Disposition'] = _content_disposition(download_name)
+    return response
+
+
+def _content_disposition(download_name):
+    try:
+        download_name.encode('ascii')
+        return dump_options_header('attachment', {'filename': download_name})
+    except UnicodeEncodeError:
+        # 非ASCII文件名按 RFC 5987 编码，并提供ASCII回退名
+        fallback = download_name.encode('ascii', 'ignore').decode('ascii') or 'download'
+        return dump_options_header('attachment', {'filename': fallback,
+                                                  'filename*': f"UTF-8''{quote(download_name, safe='')}"})
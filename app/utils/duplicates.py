@@ -0,0 +1,291 @@
+"""
+相似需求检测（MinHash + LSH）
+
+对规范化后的标题和业务目标取字符5-gram，计算64个哈希函数的 MinHash 签名，签名的估计 Jaccard 相似度
+即两个需求的相似度。签名切成16个band，每个band哈希成一个 band_key 存入 task_lsh_band 表；
+查询时只取与输入共享至少一个 band_key 的任务作为候选，再用签名精确估计相似度，
+查找代价与历史任务总数无关。
+
+默认直接按 task_lsh_band 的主键查找候选。DUPLICATE_INDEX_IN_MEMORY 打开时每个进程在内存中保存一份 band_key → 任务 的索引
+（每10万个任务约250MB，只适合任务不多的部署）：首次使用时在后台线程中从数据库加载，
+之后每次查询前按 task_signature 的自增id增量同步其他进程新写入的签名。加载完成之前查询直接走数据库索引。
+id 在插入时分配，较小的id可能晚提交：游标越过但还没有读到的id记为空洞，之后的同步继续查询这些id，
+直到读到或超过 _GAP_SECONDS 秒（已删除或回滚的id）。同步查询不持有锁，只在合并结果时加锁。
+任务内容修改后重新签名（旧签名删除、新签名获得更大的id），内存中残留的旧分桶只会产生多余的候选，
+在用签名核对时被过滤掉。
+"""
+import random
+import re
+import struct
+import threading
+import time
+import unicodedata
+import zlib
+from collections import Counter
+from hashlib import blake2b
+from sqlalchemy import delete, event, insert, or_, select
+from app import db
+from app.models import Task, TaskSignature, TaskLshBand
+
+# 修改这些参数后需要用 index_duplicates.py --rebuild 重建签名
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+# 固定种子：所有进程以及重启前后必须使用同一组哈希函数
+_rng = random.Random(1746)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_SIGNATURE_FORMAT = f'<{NUM_PERM}I'
+
+# 后台加载每次读取的分桶行数
+_LOAD_CHUNK = 50000
+
+# 同步游标之下的空洞只跟踪最近 _GAP_IDS 个id，超过 _GAP_SECONDS 秒仍未出现的不再查询
+_GAP_IDS = 1000
+_GAP_SECONDS = 120
+
+
+def shingles(title, business_goal):
+    """规范化（NFKC、小写、合并空白）后的字符 n-gram 集合，对中英文都适用"""
+    text = unicodedata.normalize('NFKC', f'{title or ""} {business_goal or ""}').lower()
+    text = re.sub(r'\s+', ' ', text).strip()
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(title, business_goal):
+    """返回 NUM_PERM 个整数组成的签名，文本为空时返回None"""
+    hashes = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingles(title, business_goal)]
+    if not hashes:
+        return None
+    return [min((a * h + b) % _PRIME for h in hashes) & _MAX_HASH for a, b in _PERMUTATIONS]
+
+
+def pack_signature(signature):
+    return struct.pack(_SIGNATURE_FORMAT, *signature)
+
+
+def unpack_signature(data):
+    return struct.unpack(_SIGNATURE_FORMAT, data)
+
+
+def band_keys(signature):
+    """每个band一个有符号64位键（与 BigInteger 列兼容），band序号参与哈希，不同band之间不会混淆"""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = blake2b(struct.pack(f'<B{ROWS}I', band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+
+def similarity(left, right):
+    """两个签名的估计 Jaccard 相似度"""
+    return sum(1 for a, b in zip(left, right) if a == b) / NUM_PERM
+
+
+class DuplicateIndex:
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self.in_memory = False
+        self._buckets = {}
+        self._synced_id = 0
+        self._gaps = {}  # 游标之下尚未读到的签名id → 发现的时间
+        self._ready = False
+        self._loader = None
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.memory_lookups = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('DUPLICATE_DETECTION_ENABLED', False)
+        self.in_memory = app.config.get('DUPLICATE_INDEX_IN_MEMORY', False)
+        app.extensions['duplicate_index'] = self
+
+    def index_tasks(self, rows):
+        """为任务计算并保存签名和分桶，rows 为 (task_id, title, business_goal)；已有签名的任务重新签名，调用方负责提交"""
+        if not self.enabled:
+            return
+
+        entries = []
+        for task_id, title, business_goal in rows:
+            signature = minhash(title, business_goal)
+            if signature is not None:
+                entries.append((task_id, signature))
+        if not entries:
+            return
+
+        task_ids = [task_id for task_id, _ in entries]
+        old_ids = db.session.execute(
+            select(TaskSignature.id).where(TaskSignature.task_id.in_(task_ids))
+        ).scalars().all()
+        if old_ids:
+            db.session.execute(delete(TaskLshBand).where(TaskLshBand.signature_id.in_(old_ids)))
+            db.session.execute(delete(TaskSignature).where(TaskSignature.id.in_(old_ids)))
+
+        signature_ids = db.session.execute(
+            insert(TaskSignature).returning(TaskSignature.id, sort_by_parameter_order=True),
+            [{'task_id': task_id, 'signature': pack_signature(signature)} for task_id, signature in entries]
+        ).scalars().all()
+        db.session.execute(insert(TaskLshBand), [
+            {'band_key': key, 'signature_id': signature_id, 'task_id': task_id}
+            for signature_id, (task_id, signature) in zip(signature_ids, entries)
+            for key in set(band_keys(signature))
+        ])
+
+    def _add(self, rows):
+        for band_key, task_id in rows:
+            bucket = self._buckets.get(band_key)
+            if bucket is None:
+                self._buckets[band_key] = [task_id]
+            elif task_id not in bucket:
+                bucket.append(task_id)
+
+    def _merge(self, rows):
+        """合并按 signature_id 排序的分桶行并推进游标，调用方持有锁"""
+        self._add((band_key, task_id) for _, band_key, task_id in rows)
+        seen = {row.signature_id for row in rows}
+        for signature_id in seen:
+            self._gaps.pop(signature_id, None)
+        now = time.monotonic()
+        if rows and rows[-1].signature_id > self._synced_id:
+            high = rows[-1].signature_id
+            for signature_id in range(max(self._synced_id, high - _GAP_IDS) + 1, high):
+                if signature_id not in seen:
+                    self._gaps.setdefault(signature_id, now)
+            self._synced_id = high
+        if self._gaps:
+            self._gaps = {signature_id: found for signature_id, found in self._gaps.items()
+                          if now - found < _GAP_SECONDS and signature_id > self._synced_id - _GAP_IDS}
+
+    def _load(self, app):
+        """后台线程：分块加载全部分桶，完成后切换到内存查询"""
+        with app.app_context():
+            try:
+                while True:
+                    rows = db.session.execute(
+                        select(TaskLshBand.signature_id, TaskLshBand.band_key, TaskLshBand.task_id)
+                        .where(TaskLshBand.signature_id > self._synced_id)
+                        .order_by(TaskLshBand.signature_id)
+                        .limit(_LOAD_CHUNK)
+                    ).all()
+                    complete = len(rows) < _LOAD_CHUNK
+                    if not complete:
+                        # 整块读满时最后一个签名的分桶可能被截断，留到下一块重新读取
+                        last_id = rows[-1].signature_id
+                        rows = [row for row in rows if row.signature_id != last_id]
+                    with self._lock:
+                        self._merge(rows)
+                        if complete:
+                            self._ready = True
+                            break
+                    db.session.remove()
+                app.logger.info(f"Duplicate index loaded: {len(self._buckets)} buckets")
+            except Exception as e:
+                app.logger.error(f"Duplicate index load failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._loader = None
+                db.session.remove()
+
+    def _sync(self):
+        """内存索引可用时同步新签名并返回True；尚未加载完成时启动后台加载并返回False"""
+        if not self.in_memory:
+            return False
+        with self._lock:
+            if not self._ready:
+                if self._loader is None:
+                    self._loader = threading.Thread(target=self._load, args=(self.app,),
+                                                    name='duplicate-index-loader', daemon=True)
+                    self._loader.start()
+                return False
+            condition = TaskLshBand.signature_id > self._synced_id
+            if self._gaps:
+                condition = or_(condition, TaskLshBand.signature_id.in_(list(self._gaps)))
+
+        rows = db.session.execute(
+            select(TaskLshBand.signature_id, TaskLshBand.band_key, TaskLshBand.task_id)
+            .where(condition)
+            .order_by(TaskLshBand.signature_id)
+        ).all()
+        with self._lock:
+            self._merge(rows)
+        return True
+
+    def _candidates(self, keys):
+        """共享band数 → 候选任务的计数"""
+        counts = Counter()
+        if self._sync():
+            with self._lock:
+                self.memory_lookups += 1
+                for key in keys:
+                    counts.update(self._buckets.get(key, ()))
+            return counts
+
+        counts.update(db.session.execute(
+            select(TaskLshBand.task_id).where(TaskLshBand.band_key.in_(keys))
+        ).scalars())
+        return counts
+
+    def find_similar(self, title, business_goal, exclude_task_id=None):
+        """返回与输入相似度不低于阈值的任务列表 [(task, similarity)]，按相似度从高到低"""
+        if not self.enabled:
+            return []
+        signature = minhash(title, business_goal)
+        if signature is None:
+            return []
+
+        config = self.app.config
+        with self._lock:
+            self.lookups += 1
+        counts = self._candidates(set(band_keys(signature)))
+        counts.pop(exclude_task_id, None)
+        if not counts:
+            return []
+
+        # 共享band越多越可能相似，候选过多时只核对最可能的那些
+        candidate_ids = [task_id for task_id, _ in counts.most_common(config['DUPLICATE_MAX_CANDIDATES'])]
+        scored = []
+        for task_id, data in db.session.execute(
+            select(TaskSignature.task_id, TaskSignature.signature).where(TaskSignature.task_id.in_(candidate_ids))
+        ):
+            score = similarity(signature, unpack_signature(data))
+            if score >= config['DUPLICATE_THRESHOLD']:
+                scored.append((score, task_id))
+        scored.sort(reverse=True)
+        scored = scored[:config['DUPLICATE_MAX_RESULTS']]
+        if not scored:
+            return []
+
+        tasks = {task.id: task for task in Task.query.filter(Task.id.in_([task_id for _, task_id in scored]))}
+        return [(tasks[task_id], score) for score, task_id in scored if task_id in tasks]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'in_memory': self.in_memory,
+                'ready': self._ready,
+                'buckets': len(self._buckets),
+                'synced_signature_id': self._synced_id,
+                'lookups': self.lookups,
+                'memory_lookups': self.memory_lookups
+            }
+
+
+duplicate_index = DuplicateIndex()
+
+
+@event.listens_for(Task, 'after_delete')
+def _remove_task_signature(mapper, connection, target):
+    signature_ids = select(TaskSignature.id).where(TaskSignature.task_id == target.id).scalar_subquery()
+    connection.execute(delete(TaskLshBand).where(TaskLshBand.signature_id.in_(signature_ids)))
+    connection.execute(delete(TaskSignature).where(TaskSignature.task_id == target.id))
@@ -0,0 +1,159 @@
+"""
+Server-Sent Events 推送中心
+
+每个进程只有一个后台线程轮询 task_change 变更日志（即跨进程共享的通知源），
+再把事件分发到订阅者各自的有界队列。客户端连接只在自己的队列上等待，不访问数据库。
+
+每个打开的事件流在整个连接期间占用一个服务器线程（run.py 的多线程服务器；gunicorn 需要 gthread worker，
+sync worker 会被一个连接占满），每个进程最多 SSE_MAX_CONNECTIONS 个连接：名额在返回响应之前于锁内占用，
+响应关闭时释放，超出时返回503。
+web.config 运行4个进程，同时接收实时推送的客户端最多为 4 × SSE_MAX_CONNECTIONS；
+更多空闲连接需要改用 gevent 等协程 worker 部署。
+"""
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from sqlalchemy import or_
+from app import db
+from app.models import Task, TaskChange
+
+
+def task_channel(task_id):
+    return f'task:{task_id}'
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def format_sse(event):
+    """按SSE格式编码一个事件，id 为变更游标，浏览器重连时通过 Last-Event-ID 续传"""
+    return f"id: {event['id']}\nevent: task\ndata: {json.dumps(event)}\n\n"
+
+
+def _event_from_row(change, title):
+    return {
+        'id': change.id,
+        'task_id': change.task_id,
+        'title': title,
+        'action': change.action.value,
+        'status': change.status,
+        'changed_at': change.changed_at.isoformat()
+    }
+
+
+class Subscription:
+    def __init__(self, channel, maxsize):
+        self.channel = channel
+        self._events = deque(maxlen=maxsize)  # 慢客户端只保留最近的事件
+        self._cond = threading.Condition()
+
+    def put(self, event):
+        with self._cond:
+            self._events.append(event)
+            self._cond.notify()
+
+    def get(self, timeout):
+        """等待下一个事件，超时返回None"""
+        with self._cond:
+            if not self._events:
+                self._cond.wait(timeout)
+            return self._events.popleft() if self._events else None
+
+
+class EventHub:
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+        self._thread = None
+        self._last_id = 0
+        self._connections = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['event_hub'] = self
+
+    def subscribe(self, channel):
+        sub = Subscription(channel, self.app.config['SSE_QUEUE_SIZE'])
+        with self._lock:
+            self._subscribers[channel].add(sub)
+        self._ensure_started()
+        return sub
+
+    def reserve(self):
+        """为一个事件流占用连接名额，已达 SSE_MAX_CONNECTIONS 时返回False；连接结束时调用 release"""
+        with self._lock:
+            if self._connections >= self.app.config['SSE_MAX_CONNECTIONS']:
+                return False
+            self._connections += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._connections -= 1
+
+    def connection_count(self):
+        with self._lock:
+            return self._connections
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subscribers.get(sub.channel)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[sub.channel]
+
+    def replay(self, channel, after_id, limit=100):
+        """从变更日志补发 after_id 之后属于该频道的事件（断线重连时使用）"""
+        query = db.session.query(TaskChange, Task.title).outerjoin(Task, Task.id == TaskChange.task_id)
+        kind, _, key = channel.partition(':')
+        if kind == 'task':
+            query = query.filter(TaskChange.task_id == int(key))
+        else:
+            query = query.filter(or_(Task.creator_id == int(key), Task.assignee_id == int(key)))
+        rows = query.filter(TaskChange.id > after_id).order_by(TaskChange.id).limit(limit).all()
+        return [_event_from_row(change, title) for change, title in rows]
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            with self.app.app_context():
+                self._last_id = db.session.query(db.func.max(TaskChange.id)).scalar() or 0
+                db.session.remove()
+            self._thread = threading.Thread(target=self._run, name='sse-event-hub', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        interval = self.app.config['SSE_POLL_INTERVAL']
+        while True:
+            try:
+                with self.app.app_context():
+                    self._poll_once()
+                    db.session.remove()
+            except Exception as e:
+                self.app.logger.error(f"SSE event hub poll failed: {str(e)}")
+            time.sleep(interval)
+
+    def _poll_once(self):
+        rows = db.session.query(TaskChange, Task.title, Task.creator_id, Task.assignee_id).outerjoin(
+            Task, Task.id == TaskChange.task_id
+        ).filter(TaskChange.id > self._last_id).order_by(TaskChange.id).limit(1000).all()
+
+        for change, title, creator_id, assignee_id in rows:
+            event = _event_from_row(change, title)
+            channels = {task_channel(change.task_id)}
+            channels.update(user_channel(uid) for uid in (creator_id, assignee_id) if uid)
+            with self._lock:
+                targets = [sub for channel in channels for sub in self._subscribers.get(channel, ())]
+            for sub in targets:
+                sub.put(event)
+            self._last_id = change.id
+
+
+event_hub = EventHub()
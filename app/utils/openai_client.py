@@ -0,0 +1,176 @@
+"""
+Azure OpenAI HTTP 客户端
+
+每个进程共用一个 requests.Session（连接池 + keep-alive），避免每次调用都重新建立TCP/TLS连接。
+请求带连接/读取超时；429、5xx 和网络错误按指数退避加随机抖动重试，服务端给出
+Retry-After（或 Azure 的 retry-after-ms）时按其等待。重试耗尽后抛出 AzureOpenAIError。
+每次发送前先向跨进程共享的 rate_limiter 申请配额。
+"""
+import json
+import math
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import requests
+from requests.adapters import HTTPAdapter
+from app.utils.rate_limiter import rate_limiter, estimate_tokens, RateLimitExceeded
+
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class AzureOpenAIError(Exception):
+    """调用 Azure OpenAI 失败（重试耗尽或不可重试的错误）"""
+
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def retry_after_seconds(response):
+    """解析 retry-after-ms / Retry-After 响应头，无法解析时返回None"""
+    value = response.headers.get('retry-after-ms')
+    if value:
+        try:
+            return max(float(value) / 1000, 0)
+        except ValueError:
+            pass
+
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+class AzureOpenAIClient:
+    def __init__(self, app=None):
+        self.app = None
+        self._session = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['azure_openai_client'] = self
+
+    @property
+    def configured(self):
+        return bool(self.app.config.get('AZURE_OPENAI_API_KEY') and self.app.config.get('AZURE_OPENAI_ENDPOINT'))
+
+    @property
+    def session(self):
+        with self._lock:
+            if self._session is None:
+                pool_size = self.app.config['AZURE_OPENAI_POOL_SIZE']
+                session = requests.Session()
+                session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+                session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+                session.headers.update({
+                    'Content-Type': 'application/json',
+                    'api-key': self.app.config['AZURE_OPENAI_API_KEY']
+                })
+                self._session = session
+            return self._session
+
+    def chat_url(self):
+        config = self.app.config
+        return (f"{config['AZURE_OPENAI_ENDPOINT'].rstrip('/')}/openai/deployments/"
+                f"{config['AZURE_OPENAI_DEPLOYMENT_NAME']}/chat/completions"
+                f"?api-version={config['AZURE_OPENAI_API_VERSION']}")
+
+    def _backoff(self, attempt, response=None):
+        """第attempt次重试前的等待时间：优先使用服务端的Retry-After，否则为带完全抖动的指数退避"""
+        cap = self.app.config['AZURE_OPENAI_BACKOFF_MAX']
+        if response is not None:
+            retry_after = retry_after_seconds(response)
+            if retry_after is not None:
+                return min(retry_after, cap)
+        return random.uniform(0, min(cap, self.app.config['AZURE_OPENAI_BACKOFF_BASE'] * 2 ** attempt))
+
+    def _post(self, payload, stream=False):
+        """发送请求，返回状态码为200的响应；可重试的失败按退避重试，耗尽后抛出 AzureOpenAIError"""
+        config = self.app.config
+        timeout = (config['AZURE_OPENAI_CONNECT_TIMEOUT'], config['AZURE_OPENAI_READ_TIMEOUT'])
+        max_retries = config['AZURE_OPENAI_MAX_RETRIES']
+        tokens = estimate_tokens(payload)
+
+        for attempt in range(max_retries + 1):
+            try:
+                rate_limiter.acquire(tokens)
+            except RateLimitExceeded as e:
+                raise AzureOpenAIError(
+                    f'Azure OpenAI quota is exhausted, please try again in {math.ceil(e.retry_after)}s', 429
+                )
+
+            try:
+                response = self.session.post(self.chat_url(), json=payload, timeout=timeout, stream=stream)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt == max_retries:
+                    raise AzureOpenAIError(f'Azure OpenAI request failed: {e.__class__.__name__}')
+                self.app.logger.warning(f"Azure OpenAI request failed ({str(e)}), retrying")
+                time.sleep(self._backoff(attempt))
+                continue
+
+            rate_limiter.record_response(response)
+            if response.status_code == 200:
+                return response
+
+            response.close()
+            if response.status_code not in RETRYABLE_STATUS or attempt == max_retries:
+                if response.status_code == 429:
+                    raise AzureOpenAIError('Azure OpenAI is throttling requests, please try again later', 429)
+                raise AzureOpenAIError(f'Azure OpenAI returned HTTP {response.status_code}', response.status_code)
+
+            delay = self._backoff(attempt, response)
+            self.app.logger.warning(f"Azure OpenAI returned HTTP {response.status_code}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    def chat_completion(self, payload):
+        """发送 chat completions 请求并返回解析后的JSON"""
+        data = self._post(payload).json()
+        used = (data.get('usage') or {}).get('total_tokens')
+        if used:
+            rate_limiter.adjust(estimate_tokens(payload) - used)
+        return data
+
+    def chat_completion_stream(self, payload):
+        """以 stream=True 发送请求，逐个产出回复内容的增量文本
+
+        只有在收到响应头之前的失败会重试；开始产出内容后的网络错误抛出 AzureOpenAIError。
+        """
+        response = self._post(dict(payload, stream=True), stream=True)
+        # text/event-stream 总是 UTF-8；响应头不带 charset 时 requests 会按 ISO-8859-1 解码，中文内容变成乱码
+        response.encoding = 'utf-8'
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith('data:'):
+                    continue
+                data = line[len('data:'):].strip()
+                if data == '[DONE]':
+                    return
+                try:
+                    chunk = json.loads(data)
+                except ValueError:
+                    raise AzureOpenAIError('Azure OpenAI returned a malformed stream event')
+                # Azure 会先发送只含内容过滤结果、choices 为空的块
+                for choice in chunk.get('choices') or []:
+                    content = (choice.get('delta') or {}).get('content')
+                    if content:
+                        yield content
+        except (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError) as e:
+            raise AzureOpenAIError(f'Azure OpenAI stream interrupted: {e.__class__.__name__}')
+        finally:
+            response.close()
+
+
+openai_client = AzureOpenAIClient()
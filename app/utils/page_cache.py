@@ -0,0 +1,132 @@
+"""
+任务列表页渲染缓存
+
+缓存列表区域渲染后的HTML（导航栏、flash消息等仍按请求渲染），每个进程一个有界LRU。
+缓存项按 (路由, 状态, 优先级[, 负责人]) 打标签，键中带上标签当前的版本号；写操作在
+同一事务内递增受影响标签的版本（cache_generation 表），所有进程随后自然错过旧的缓存项。
+"""
+import os
+import threading
+from collections import OrderedDict
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import CacheGeneration
+
+
+def list_tag(status, priority):
+    return f"all:{status.value if status else '*'}:{priority.value if priority else '*'}"
+
+
+def mine_tag(user_id, status, priority):
+    return f"mine:{user_id}:{status.value if status else '*'}:{priority.value if priority else '*'}"
+
+
+def task_tags(assignee_id, statuses, priorities):
+    """一次任务变更会影响的所有列表标签：不过滤的列表，以及按变更前后状态/优先级过滤的列表"""
+    tags = set()
+    for status in {None, *statuses}:
+        for priority in {None, *priorities}:
+            tags.add(list_tag(status, priority))
+            if assignee_id:
+                tags.add(mine_tag(assignee_id, status, priority))
+    return tags
+
+
+class PageCache:
+    def __init__(self, app=None):
+        self.enabled = False
+        self.max_entries = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.enabled = app.config.get('PAGE_CACHE_ENABLED', False)
+        self.max_entries = app.config.get('PAGE_CACHE_MAX_ENTRIES', 1000)
+        app.extensions['page_cache'] = self
+
+    def _version(self, tag):
+        row = db.session.get(CacheGeneration, tag)
+        return row.version if row else 0
+
+    def get_or_render(self, key, tag, render):
+        """命中则返回缓存的HTML，否则调用render()渲染并缓存"""
+        if not self.enabled:
+            return render()
+
+        key = (key, tag, self._version(tag))
+        with self._lock:
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return html
+            self.misses += 1
+
+        html = render()
+
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return html
+
+    def invalidate(self, tags):
+        """在当前事务中递增标签版本，提交后所有进程的相关缓存项失效"""
+        if not self.enabled or not tags:
+            return
+
+        tags = sorted(tags)
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('sqlite', 'postgresql'):
+            if dialect == 'sqlite':
+                from sqlalchemy.dialects.sqlite import insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert
+            stmt = insert(CacheGeneration).values([{'tag': tag, 'version': 1} for tag in tags])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['tag'],
+                set_={'version': CacheGeneration.__table__.c.version + 1}
+            )
+            db.session.execute(stmt)
+            return
+
+        CacheGeneration.query.filter(CacheGeneration.tag.in_(tags)).update(
+            {CacheGeneration.version: CacheGeneration.version + 1}, synchronize_session=False
+        )
+        existing = {tag for (tag,) in db.session.query(CacheGeneration.tag).filter(CacheGeneration.tag.in_(tags))}
+        for tag in tags:
+            if tag not in existing:
+                try:
+                    with db.session.begin_nested():
+                        db.session.add(CacheGeneration(tag=tag, version=1))
+                except IntegrityError:
+                    # 并发写入已经创建了该标签，版本已变化
+                    pass
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'pid': os.getpid(),
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else None
+            }
+
+
+page_cache = PageCache()
@@ -0,0 +1,117 @@
+"""
+Keyset (cursor) pagination helpers
+"""
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    """Raised when an ``after`` cursor cannot be decoded"""
+
+
+def encode_cursor(created_at, item_id):
+    """Build an opaque cursor from a (created_at, id) pair"""
+    raw = f"{created_at.isoformat()}|{item_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_parts(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    raw = base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8')
+    return raw.split('|', 1)
+
+
+def decode_cursor(cursor):
+    """Decode a cursor back into a (created_at, id) pair"""
+    try:
+        created_at, item_id = _decode_parts(cursor)
+        return datetime.fromisoformat(created_at), int(item_id)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(str(e))
+
+
+def encode_value_cursor(value, item_id):
+    """Build an opaque cursor from an (integer sort value, id) pair"""
+    raw = f"{value}|{item_id}".encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_value_cursor(cursor):
+    """Decode a cursor back into an (integer sort value, id) pair"""
+    try:
+        value, item_id = _decode_parts(cursor)
+        return int(value), int(item_id)
+    except (ValueError, UnicodeError) as e:
+        raise InvalidCursor(str(e))
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query
+
+    Exposes the subset of the Flask-SQLAlchemy ``Pagination`` interface the
+    templates rely on (``items``, ``has_next``, ``has_prev``) plus
+    ``next_cursor`` for the link to the following page.
+    """
+
+    is_keyset = True
+
+    def __init__(self, items, per_page, has_next, after=None, cursor_for=None):
+        self.items = items
+        self.per_page = per_page
+        self.has_next = has_next
+        self.has_prev = after is not None
+        self.after = after
+        self._cursor_for = cursor_for or (lambda item: encode_cursor(item.created_at, item.id))
+
+    @property
+    def next_cursor(self):
+        if not self.has_next or not self.items:
+            return None
+        return self._cursor_for(self.items[-1])
+
+
+def keyset_paginate(query, created_col, id_col, after=None, per_page=10):
+    """Return the page of ``query`` that follows the ``after`` cursor
+
+    Rows are ordered newest first by ``(created_col, id_col)``. Instead of an
+    OFFSET scan and a ``COUNT(*)``, the page is located with a range predicate
+    on the sort key and one extra row is fetched to tell whether a next page
+    exists, so the cost is the same for the first page and the ten-thousandth.
+    """
+    if after:
+        created_at, item_id = decode_cursor(after)
+        query = query.filter(or_(
+            created_col < created_at,
+            and_(created_col == created_at, id_col < item_id)
+        ))
+
+    rows = query.order_by(created_col.desc(), id_col.desc()).limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+
+    return KeysetPage(rows[:per_page], per_page, has_next, after=after or None)
+
+
+def keyset_paginate_by_value(query, value_col, id_col, after=None, per_page=10, descending=False):
+    """Return the page of ``query`` ordered by an integer column such as a score
+
+    Ties are broken by ``id_col`` in the same direction. Rows where the
+    column is NULL have no position in the ordering and are left out.
+    """
+    query = query.filter(value_col.isnot(None))
+    if after:
+        value, item_id = decode_value_cursor(after)
+        if descending:
+            query = query.filter(or_(value_col < value, and_(value_col == value, id_col < item_id)))
+        else:
+            query = query.filter(or_(value_col > value, and_(value_col == value, id_col > item_id)))
+
+    if descending:
+        query = query.order_by(value_col.desc(), id_col.desc())
+    else:
+        query = query.order_by(value_col.asc(), id_col.asc())
+    rows = query.limit(per_page + 1).all()
+    has_next = len(rows) > per_page
+
+    return KeysetPage(rows[:per_page], per_page, has_next, after=after or None,
+                      cursor_for=lambda item: encode_value_cursor(getattr(item, value_col.key), item.id))
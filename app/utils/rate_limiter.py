@@ -0,0 +1,193 @@
+"""
+Azure OpenAI 配额限流
+
+Azure OpenAI 部署同时有每分钟请求数（RPM）和每分钟令牌数（TPM）配额，而 web.config 启动的多个进程
+各自调用接口。这里用两个令牌桶在所有进程间共享配额：桶的余量保存在 rate_limit_bucket 表中，
+补充和扣减在一条条件UPDATE中完成，不需要额外的锁。每次调用按估算的提示词令牌数加 max_tokens 扣减，
+拿到实际用量后再多退少补。桶中余量不足时短暂等待，预计等待超过上限则立即拒绝。
+超过桶容量的调用在桶满时放行并把余量扣成负数，配额很小时调用仍然可以进行，平均速率不超过配额。
+"""
+import os
+import random
+import threading
+import time
+from sqlalchemy import case, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import RateLimitBucket
+
+
+class RateLimitExceeded(Exception):
+    """本地配额在允许的等待时间内无法满足"""
+
+    def __init__(self, retry_after):
+        super().__init__(f'Rate limit exceeded, retry in {retry_after:.1f}s')
+        self.retry_after = retry_after
+
+
+def estimate_tokens(payload):
+    """粗略估算一次调用消耗的令牌：每4个字符约1个令牌，另加每条消息的固定开销和补全上限"""
+    prompt = sum(len(message.get('content') or '') for message in payload.get('messages', []))
+    return prompt // 4 + 4 * len(payload.get('messages', [])) + payload.get('max_tokens', 0)
+
+
+class RateLimiter:
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._initialized = set()
+        self.acquired = 0
+        self.rejected = 0
+        self.waited_seconds = 0.0
+        self.last_remaining = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['rate_limiter'] = self
+
+    def _buckets(self):
+        """返回 {桶名: (每秒补充量, 容量)}，配额为0的桶不启用"""
+        config = self.app.config
+        burst = config['AZURE_OPENAI_RATE_LIMIT_BURST_SECONDS']
+        buckets = {}
+        for name, limit in (('requests', config['AZURE_OPENAI_RPM_LIMIT']),
+                            ('tokens', config['AZURE_OPENAI_TPM_LIMIT'])):
+            if limit:
+                rate = limit / 60.0
+                buckets[name] = (rate, rate * burst)
+        return buckets
+
+    @property
+    def enabled(self):
+        return bool(self._buckets())
+
+    def _ensure_rows(self, buckets):
+        missing = [name for name in buckets if name not in self._initialized]
+        for name in missing:
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(insert(RateLimitBucket).values(
+                        name=name, tokens=buckets[name][1], updated_at=time.time()
+                    ))
+            except IntegrityError:
+                pass
+            self._initialized.add(name)
+
+    @staticmethod
+    def _level(rate, capacity, now):
+        """当前余量（含补充）的SQL表达式，不超过容量"""
+        # 各进程的时钟不完全一致，时钟落后的进程看到的经过时间可能为负，按0计算
+        elapsed = case((RateLimitBucket.updated_at < now, now - RateLimitBucket.updated_at), else_=0)
+        refilled = RateLimitBucket.tokens + elapsed * rate
+        return case((refilled > capacity, capacity), else_=refilled)
+
+    @staticmethod
+    def _updated_at(now):
+        """补充时间只前进不后退：时钟落后的进程不会把 updated_at 写回更早的时间"""
+        return case((RateLimitBucket.updated_at > now, RateLimitBucket.updated_at), else_=now)
+
+    def _try_acquire(self, costs):
+        """尝试从各个桶中扣减，全部成功返回0，否则返回预计需要等待的秒数（不扣减任何桶）"""
+        buckets = self._buckets()
+        self._ensure_rows(buckets)
+        now = time.time()
+
+        with db.engine.connect() as conn:
+            trans = conn.begin()
+            for name, (rate, capacity) in buckets.items():
+                cost = costs.get(name, 0)
+                # 单次调用超过桶容量（配额很小时）：等桶补满后扣减全部，余量变为负数，之后的调用相应等待更久
+                required = min(cost, capacity)
+
+                level = self._level(rate, capacity, now)
+                result = conn.execute(update(RateLimitBucket).where(
+                    RateLimitBucket.name == name, level >= required
+                ).values(tokens=level - cost, updated_at=self._updated_at(now)))
+                if result.rowcount == 0:
+                    available = conn.execute(select(level).where(RateLimitBucket.name == name)).scalar() or 0
+                    trans.rollback()
+                    return max((required - available) / rate, 0.01)
+            trans.commit()
+        return 0
+
+    def acquire(self, tokens):
+        """为一次调用申请1个请求和tokens个令牌；超过最长等待时间时抛出 RateLimitExceeded"""
+        if not self.enabled:
+            return
+
+        max_wait = self.app.config['AZURE_OPENAI_RATE_LIMIT_MAX_WAIT']
+        deadline = time.monotonic() + max_wait
+        waited = 0.0
+        while True:
+            wait = self._try_acquire({'requests': 1, 'tokens': tokens})
+            if wait == 0:
+                with self._lock:
+                    self.acquired += 1
+                    self.waited_seconds += waited
+                return
+            if time.monotonic() + wait > deadline:
+                with self._lock:
+                    self.rejected += 1
+                raise RateLimitExceeded(wait)
+            # 加一点抖动，避免多个等待者同时醒来争抢
+            delay = wait + random.uniform(0, 0.05)
+            time.sleep(delay)
+            waited += delay
+
+    def adjust(self, tokens):
+        """按实际用量修正令牌桶：tokens 为正表示多扣了需要退回，为负表示少扣了需要补扣"""
+        buckets = self._buckets()
+        if not tokens or 'tokens' not in buckets:
+            return
+
+        rate, capacity = buckets['tokens']
+        refunded = RateLimitBucket.tokens + tokens
+        with db.engine.begin() as conn:
+            conn.execute(update(RateLimitBucket).where(RateLimitBucket.name == 'tokens').values(
+                tokens=case((refunded > capacity, capacity), else_=refunded)
+            ))
+
+    def record_response(self, response):
+        """记录 Azure 返回的剩余配额响应头"""
+        remaining = {key: response.headers[header] for key, header in (
+            ('requests', 'x-ratelimit-remaining-requests'),
+            ('tokens', 'x-ratelimit-remaining-tokens')
+        ) if header in response.headers}
+        if remaining:
+            with self._lock:
+                self.last_remaining = remaining
+
+    def usage(self):
+        """各个桶的当前余量以及本进程的统计"""
+        buckets = self._buckets()
+        now = time.time()
+        levels = {}
+        if buckets:
+            self._ensure_rows(buckets)
+            with db.engine.connect() as conn:
+                for name, (rate, capacity) in buckets.items():
+                    available = conn.execute(
+                        select(self._level(rate, capacity, now)).where(RateLimitBucket.name == name)
+                    ).scalar() or 0
+                    levels[name] = {
+                        'limit_per_minute': round(rate * 60),
+                        'capacity': round(capacity, 1),
+                        'available': round(available, 1),
+                        'utilization': round(1 - available / capacity, 4)
+                    }
+
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'enabled': bool(buckets),
+                'buckets': levels,
+                'acquired': self.acquired,
+                'rejected': self.rejected,
+                'waited_seconds': round(self.waited_seconds, 3),
+                'azure_remaining': dict(self.last_remaining)
+            }
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,127 @@
+"""
+文件存储后端
+
+上传和下载都通过 storage 访问文件内容，按配置写入本地上传目录（local）或 Azure Blob Storage（azure）。
+文件内容由 key（相对路径 / blob 名称）标识，File 和 FileBlob 记录保存内容所在的后端名称，
+切换后端后早期文件仍从原来的后端读取。
+
+后端接口：
+    save(key, stream, hashers, content_type)  从流按块写入，同时更新哈希，返回字节数
+    put_file(key, source_path, content_type)   把本地文件存为 key，成功后源文件不再保留
+    iter_chunks(key, start, length)            按块读取内容（可指定字节范围）
+    size(key)                                  内容的大小，不存在时返回None
+    delete(key)                                删除内容，不存在时忽略
+
+Azure 后端另外支持浏览器直接上传（direct_uploads）：upload_url(key) 返回只写的 SAS URL，
+copy(source_key, target_key) 在服务端复制上传完成的内容。
+"""
+import os
+
+READ_SIZE = 1024 * 1024
+
+
+class LocalStorage:
+    """本地上传目录；多实例部署时需要共享目录"""
+    name = 'local'
+    local = True
+    direct_uploads = False
+
+    def __init__(self, folder):
+        self.folder = folder
+
+    def path(self, key):
+        return os.path.join(self.folder, key)
+
+    def save(self, key, stream, hashers=(), content_type=None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        written = 0
+        with open(path, 'wb') as target:
+            while True:
+                data = stream.read(READ_SIZE)
+                if not data:
+                    break
+                target.write(data)
+                for hasher in hashers:
+                    hasher.update(data)
+                written += len(data)
+        return written
+
+    def put_file(self, key, source_path, content_type=None):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    def iter_chunks(self, key, start=0, length=None):
+        with open(self.path(key), 'rb') as source:
+            source.seek(start)
+            remaining = length
+            while remaining is None or remaining > 0:
+                data = source.read(READ_SIZE if remaining is None else min(READ_SIZE, remaining))
+                if not data:
+                    break
+                if remaining is not None:
+                    remaining -= len(data)
+                yield data
+
+    def size(self, key):
+        try:
+            return os.path.getsize(self.path(key))
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key):
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+
+class Storage:
+    """按名称提供存储后端；新内容写入 default 后端"""
+
+    def __init__(self, app=None):
+        self.app = None
+        self.default = None
+        self._backends = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self._backends = {'local': LocalStorage(app.config['UPLOAD_FOLDER'])}
+        self.default = self._backends['local']
+        app.extensions['storage'] = self
+
+        name = app.config.get('STORAGE_BACKEND') or ('azure' if app.config.get('USE_AZURE_STORAGE') else 'local')
+        if name == 'azure':
+            if not app.config.get('AZURE_STORAGE_CONNECTION_STRING'):
+                app.logger.error("STORAGE_BACKEND is azure but AZURE_STORAGE_CONNECTION_STRING is not set, "
+                                 "storing uploads locally")
+                return
+            try:
+                from app.utils.azure_storage import AzureBlobStorage
+            except ImportError:
+                app.logger.error("Azure Blob Storage dependencies not installed, storing uploads locally")
+                return
+            self._backends['azure'] = AzureBlobStorage(app)
+            self.default = self._backends['azure']
+            app.logger.info(f"Storing uploads in Azure Blob Storage container "
+                            f"{app.config['AZURE_STORAGE_CONTAINER_NAME']}")
+        elif name != 'local':
+            app.logger.error(f"Unknown STORAGE_BACKEND {name}, storing uploads locally")
+
+    def backend(self, name):
+        """返回保存内容的后端；未配置的后端（例如本地开发时读取 azure 的文件）抛出 LookupError"""
+        backend = self._backends.get(name or 'local')
+        if backend is None:
+            raise LookupError(f'Storage backend {name} is not configured')
+        return backend
+
+
+storage = Storage()
+
+
+def backend_for(record):
+    """File / FileBlob 记录所在的后端"""
+    return storage.backend(record.storage)
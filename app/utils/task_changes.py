@@ -0,0 +1,80 @@
+"""
+任务变更日志
+
+各写操作在提交前调用 record_task_changes，变更记录与任务修改处于同一事务；
+删除通过 ORM 的 after_delete 事件记录。下游系统通过 /tasks/changes 按游标增量拉取。
+
+游标是自增id，只有id按提交顺序变为可见时才不会漏读：id 在插入时分配，若较小的id晚提交，
+已经越过它的客户端（以及 SSE 推送中心）就再也读不到这条变更。SQLite 同一时刻只有一个写事务，
+id 天然按提交顺序可见；PostgreSQL 上写入变更前先取得事务级 advisory lock，持有到提交，
+各事务分配变更id和提交的顺序一致。
+"""
+from datetime import datetime
+from flask import has_request_context
+from flask_login import current_user
+from sqlalchemy import event, insert, text
+from app import db
+from app.models import Task, TaskChange, ChangeAction
+
+
+def _actor_id():
+    if has_request_context() and current_user.is_authenticated:
+        return current_user.id
+    return None
+
+
+# 变更日志写锁（PostgreSQL advisory lock 的key）
+_CHANGE_LOG_LOCK_KEY = 0x7461736b
+
+
+def _lock_change_log(connection):
+    """取得变更日志写锁直到事务结束，使变更id按提交顺序分配"""
+    if connection.dialect.name == 'postgresql':
+        connection.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': _CHANGE_LOG_LOCK_KEY})
+
+
+def _status_value(status):
+    return status.value if status is not None else None
+
+
+def record_task_changes(rows):
+    """记录任务变更，rows 为 (task_id, action, status) 元组"""
+    now = datetime.utcnow()
+    actor_id = _actor_id()
+    values = [{
+        'task_id': task_id,
+        'action': action,
+        'status': _status_value(status),
+        'actor_id': actor_id,
+        'changed_at': now
+    } for task_id, action, status in rows]
+
+    if values:
+        _lock_change_log(db.session.connection())
+        db.session.execute(insert(TaskChange), values)
+
+
+def get_changes_since(since, limit):
+    """返回游标之后的变更以及这些任务的当前快照"""
+    changes = TaskChange.query.filter(TaskChange.id > since).order_by(TaskChange.id).limit(limit + 1).all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    task_ids = list({change.task_id for change in changes if change.action != ChangeAction.DELETED})
+    tasks = {}
+    if task_ids:
+        tasks = {task.id: task for task in Task.query.filter(Task.id.in_(task_ids))}
+
+    return changes, tasks, has_more
+
+
+@event.listens_for(Task, 'after_delete')
+def _record_task_deleted(mapper, connection, target):
+    _lock_change_log(connection)
+    connection.execute(TaskChange.__table__.insert().values(
+        task_id=target.id,
+        action=ChangeAction.DELETED,
+        status=_status_value(target.status),
+        actor_id=_actor_id(),
+        changed_at=datetime.utcnow()
+    ))
@@ -0,0 +1,55 @@
+"""
+任务写操作的统一钩子
+
+所有修改任务的路由在提交前调用这里的函数，在同一事务内更新仪表盘计数、相似需求索引、
+写入变更日志，并使受影响的列表页缓存失效。
+"""
+from app.models import ChangeAction
+from app.utils.task_stats import record_tasks_created, record_status_changes
+from app.utils.task_changes import record_task_changes
+from app.utils.page_cache import page_cache, task_tags
+from app.utils.duplicates import duplicate_index
+
+
+def on_task_created(task):
+    on_tasks_created([{
+        'id': task.id,
+        'title': task.title,
+        'business_goal': task.business_goal,
+        'creator_id': task.creator_id,
+        'assignee_id': task.assignee_id,
+        'status': task.status,
+        'priority': task.priority
+    }])
+
+
+def on_tasks_created(rows):
+    """rows 为包含 id/title/business_goal/creator_id/assignee_id/status/priority 的字典"""
+    rows = list(rows)
+    record_tasks_created((row['creator_id'], row['assignee_id'], row['status']) for row in rows)
+    record_task_changes((row['id'], ChangeAction.CREATED, row['status']) for row in rows)
+    duplicate_index.index_tasks((row['id'], row['title'], row['business_goal']) for row in rows)
+
+    tags = set()
+    for row in rows:
+        tags.update(task_tags(row['assignee_id'], [row['status']], [row['priority']]))
+    page_cache.invalidate(tags)
+
+
+def on_task_changed(task, action, old_status, old_priority=None):
+    """任务状态或内容修改后调用，old_* 为修改前的值"""
+    on_tasks_changed([(task.id, task.assignee_id, old_priority or task.priority, task.priority,
+                       old_status, task.status)], action)
+
+
+def on_tasks_changed(changes, action):
+    """changes 为 (task_id, assignee_id, old_priority, new_priority, old_status, new_status) 元组"""
+    changes = list(changes)
+    record_status_changes((assignee_id, old_status, new_status)
+                          for _, assignee_id, _, _, old_status, new_status in changes)
+    record_task_changes((task_id, action, new_status) for task_id, _, _, _, _, new_status in changes)
+
+    tags = set()
+    for _, assignee_id, old_priority, new_priority, old_status, new_status in changes:
+        tags.update(task_tags(assignee_id, [old_status, new_status], [old_priority, new_priority]))
+    page_cache.invalidate(tags)
@@ -0,0 +1,31 @@
+"""
+任务列表与详情页的查询层
+
+列表页只渲染标题、人员和状态等短字段，这里统一预加载创建人/负责人并延迟加载
+大文本列，避免模板逐行触发懒加载查询。
+"""
+from sqlalchemy.orm import joinedload, defer
+from app.models import Task, File
+
+
+def task_list_query():
+    """任务列表查询：一次JOIN带出creator和assignee，不加载大文本列"""
+    return Task.query.options(
+        joinedload(Task.creator),
+        joinedload(Task.assignee),
+        defer(Task.business_goal),
+        defer(Task.verification_result)
+    )
+
+
+def get_task_detail_or_404(task_id):
+    """任务详情：任务和人员信息一次查询取回"""
+    return Task.query.options(
+        joinedload(Task.creator),
+        joinedload(Task.assignee)
+    ).filter(Task.id == task_id).first_or_404()
+
+
+def get_task_files(task_id):
+    """一次查询取回任务的全部附件"""
+    return File.query.filter_by(task_id=task_id).order_by(File.uploaded_at, File.id).all()
@@ -0,0 +1,137 @@
+"""
+任务全文检索
+
+SQLite 下使用 FTS5 外部内容表 task_fts（由迁移创建），task 表上的触发器在每次
+插入、删除以及 title/business_goal 更新时增量维护索引，无需整表重建。
+PostgreSQL 下使用 tsvector 表达式上的 GIN 索引 ix_task_fts（由迁移创建，查询中的表达式必须与索引一致），
+标题权重A、业务目标权重B，按 ts_rank 排序。其他数据库退化为 LIKE 查询。
+"""
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import desc, func, literal, literal_column, or_, table, column
+from sqlalchemy.orm import joinedload, defer
+from app import db
+from app.models import Task
+
+# 高亮标记使用控制字符，转义HTML之后再替换为<mark>，避免用户内容注入
+_HL_START = '\x02'
+_HL_END = '\x03'
+
+# bm25 列权重：标题命中比业务目标命中更重要
+TITLE_WEIGHT = 10.0
+GOAL_WEIGHT = 1.0
+
+_task_fts = table('task_fts', column('rowid'))
+
+# PostgreSQL 文本检索配置：simple 不做词干和停用词处理，中英文混合内容的前缀匹配行为可预期
+_PG_CONFIG = literal_column("'simple'::regconfig")
+# ts_rank 的权重依次对应 D、C、B、A
+_PG_WEIGHTS = literal_column(f"'{{0, 0, {GOAL_WEIGHT / TITLE_WEIGHT}, 1}}'::float4[]")
+
+
+def fts_enabled():
+    return db.engine.dialect.name == 'sqlite'
+
+
+def _pg_document():
+    """与迁移中 ix_task_fts 索引相同的表达式"""
+    title = func.setweight(func.to_tsvector(_PG_CONFIG, func.coalesce(Task.title, literal_column("''"))),
+                           literal_column("'A'"))
+    goal = func.setweight(func.to_tsvector(_PG_CONFIG, func.coalesce(Task.business_goal, literal_column("''"))),
+                          literal_column("'B'"))
+    return title.op('||')(goal)
+
+
+def build_match_query(text):
+    """把用户输入转换为FTS5查询：每个词加引号防止语法错误，并做前缀匹配"""
+    terms = re.findall(r'\w+', text or '')
+    return ' '.join('"{}"*'.format(term) for term in terms)
+
+
+def render_highlight(value):
+    """转义文本并把高亮标记替换为<mark>"""
+    if not value:
+        return Markup('')
+    html = str(escape(value))
+    return Markup(html.replace(_HL_START, '<mark>').replace(_HL_END, '</mark>'))
+
+
+class SearchHit:
+    def __init__(self, task, title_html, snippet_html):
+        self.task = task
+        self.title_html = title_html
+        self.snippet_html = snippet_html
+
+
+def search_tasks(text, status=None, priority=None, limit=20, offset=0):
+    """按bm25排序返回匹配的任务，可与状态/优先级过滤组合"""
+    match = build_match_query(text)
+    if not match:
+        return []
+
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        return _search_tasks_postgresql(text, status, priority, limit, offset)
+    if dialect != 'sqlite':
+        return _search_tasks_like(text, status, priority, limit, offset)
+
+    fts = literal_column('task_fts')
+    rank = func.bm25(fts, TITLE_WEIGHT, GOAL_WEIGHT)
+    title_hl = func.highlight(fts, 0, _HL_START, _HL_END)
+    snippet = func.snippet(fts, 1, _HL_START, _HL_END, '…', 24)
+
+    query = db.session.query(Task, title_hl, snippet).options(
+        joinedload(Task.creator),
+        joinedload(Task.assignee),
+        defer(Task.business_goal),
+        defer(Task.verification_result)
+    ).join(_task_fts, _task_fts.c.rowid == Task.id).filter(fts.op('MATCH')(match))
+
+    if status:
+        query = query.filter(Task.status == status)
+    if priority:
+        query = query.filter(Task.priority == priority)
+
+    rows = query.order_by(rank).limit(limit).offset(offset).all()
+    return [SearchHit(task, render_highlight(t), render_highlight(s)) for task, t, s in rows]
+
+
+def _search_tasks_postgresql(text, status, priority, limit, offset):
+    terms = re.findall(r'\w+', text)
+    tsquery = func.to_tsquery(_PG_CONFIG, literal(' & '.join(f'{term}:*' for term in terms)))
+    document = _pg_document()
+    rank = func.ts_rank(_PG_WEIGHTS, document, tsquery)
+    options = f'StartSel={_HL_START}, StopSel={_HL_END}'
+    title_hl = func.ts_headline(_PG_CONFIG, Task.title, tsquery, literal(options + ', HighlightAll=true'))
+    snippet = func.ts_headline(_PG_CONFIG, func.coalesce(Task.business_goal, literal_column("''")), tsquery,
+                               literal(options + ', MaxWords=24, MinWords=8'))
+
+    query = db.session.query(Task, title_hl, snippet).options(
+        joinedload(Task.creator),
+        joinedload(Task.assignee),
+        defer(Task.business_goal),
+        defer(Task.verification_result)
+    ).filter(document.op('@@')(tsquery))
+
+    if status:
+        query = query.filter(Task.status == status)
+    if priority:
+        query = query.filter(Task.priority == priority)
+
+    rows = query.order_by(desc(rank), Task.id.desc()).limit(limit).offset(offset).all()
+    return [SearchHit(task, render_highlight(t), render_highlight(s)) for task, t, s in rows]
+
+
+def _search_tasks_like(text, status, priority, limit, offset):
+    query = Task.query.options(joinedload(Task.creator), joinedload(Task.assignee))
+    for term in re.findall(r'\w+', text):
+        pattern = f'%{term}%'
+        query = query.filter(or_(Task.title.ilike(pattern), Task.business_goal.ilike(pattern)))
+
+    if status:
+        query = query.filter(Task.status == status)
+    if priority:
+        query = query.filter(Task.priority == priority)
+
+    rows = query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit).offset(offset).all()
+    return [SearchHit(task, escape(task.title), escape((task.business_goal or '')[:200])) for task in rows]
@@ -0,0 +1,111 @@
+"""
+仪表盘任务统计
+
+compute_task_stats 用一条条件聚合查询算出全部计数；开启 TASK_STATS_COUNTERS 时，
+任务写操作通过 record_* 函数在同一事务内增量更新 user_task_stats，仪表盘只需一次主键查询。
+"""
+from collections import Counter, defaultdict
+from flask import current_app
+from sqlalchemy import func, case, and_, or_
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import Task, TaskStatus, UserTaskStats
+
+COUNTED_STATUSES = {
+    TaskStatus.PENDING: 'tasks_pending',
+    TaskStatus.IN_PROGRESS: 'tasks_in_progress'
+}
+
+
+def compute_task_stats(user_id):
+    """一次分组聚合查询计算用户的任务统计"""
+    created = func.sum(case((Task.creator_id == user_id, 1), else_=0))
+    assigned = func.sum(case((Task.assignee_id == user_id, 1), else_=0))
+    pending = func.sum(case((and_(Task.assignee_id == user_id, Task.status == TaskStatus.PENDING), 1), else_=0))
+    in_progress = func.sum(case((and_(Task.assignee_id == user_id, Task.status == TaskStatus.IN_PROGRESS), 1), else_=0))
+
+    row = db.session.query(created, assigned, pending, in_progress).filter(
+        or_(Task.creator_id == user_id, Task.assignee_id == user_id)
+    ).one()
+
+    return {
+        'tasks_created': row[0] or 0,
+        'tasks_assigned': row[1] or 0,
+        'tasks_pending': row[2] or 0,
+        'tasks_in_progress': row[3] or 0
+    }
+
+
+def counters_enabled():
+    return current_app.config.get('TASK_STATS_COUNTERS', False)
+
+
+def get_dashboard_stats(user_id):
+    """读取仪表盘统计，计数表中没有记录时用聚合结果补齐"""
+    if not counters_enabled():
+        return compute_task_stats(user_id)
+
+    stats = db.session.get(UserTaskStats, user_id)
+    if stats:
+        return stats.to_dict()
+
+    values = compute_task_stats(user_id)
+    try:
+        db.session.add(UserTaskStats(user_id=user_id, **values))
+        db.session.commit()
+    except IntegrityError:
+        # 其他进程已经补齐了这一行
+        db.session.rollback()
+    return values
+
+
+def _increment(user_id, **deltas):
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not user_id or not deltas:
+        return
+    values = {getattr(UserTaskStats, k): getattr(UserTaskStats, k) + v for k, v in deltas.items()}
+    if UserTaskStats.query.filter_by(user_id=user_id).update(values, synchronize_session=False):
+        return
+
+    # 计数行不存在：在保存点中按task表插入，调用方的写入已在本事务中，聚合结果已包含本次变更；
+    # 其他事务同时插入了这一行（其聚合看不到本事务未提交的变更）时回滚保存点，再做增量更新
+    try:
+        with db.session.begin_nested():
+            db.session.add(UserTaskStats(user_id=user_id, **compute_task_stats(user_id)))
+    except IntegrityError:
+        UserTaskStats.query.filter_by(user_id=user_id).update(values, synchronize_session=False)
+
+
+def record_tasks_created(rows):
+    """新建任务后调用，与任务写入处于同一事务；rows 为 (creator_id, assignee_id, status) 元组"""
+    if not counters_enabled():
+        return
+
+    deltas = defaultdict(Counter)
+    for creator_id, assignee_id, status in rows:
+        deltas[creator_id]['tasks_created'] += 1
+        if assignee_id:
+            deltas[assignee_id]['tasks_assigned'] += 1
+            if status in COUNTED_STATUSES:
+                deltas[assignee_id][COUNTED_STATUSES[status]] += 1
+
+    for user_id, user_deltas in deltas.items():
+        _increment(user_id, **user_deltas)
+
+
+def record_status_changes(changes):
+    """任务状态变更后调用，与状态更新处于同一事务；changes 为 (assignee_id, old_status, new_status) 元组"""
+    if not counters_enabled():
+        return
+
+    deltas = defaultdict(Counter)
+    for assignee_id, old_status, new_status in changes:
+        if not assignee_id or old_status == new_status:
+            continue
+        if old_status in COUNTED_STATUSES:
+            deltas[assignee_id][COUNTED_STATUSES[old_status]] -= 1
+        if new_status in COUNTED_STATUSES:
+            deltas[assignee_id][COUNTED_STATUSES[new_status]] += 1
+
+    for user_id, user_deltas in deltas.items():
+        _increment(user_id, **user_deltas)
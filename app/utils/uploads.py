@@ -0,0 +1,592 @@
+"""
+文件上传
+
+表单上传和分块上传都按固定大小的块从请求流读取，同时计算大小和 SHA-256，内存占用与文件大小无关。
+表单上传直接写入存储后端（本地目录或 Azure Blob）。
+
+分块上传：客户端先创建上传会话，再按字节偏移逐块 PUT。每块追加写入临时目录中的部分文件，
+并在数据库中推进已接收的偏移；连接中断时已经写入的字节同样保留，客户端查询会话得到偏移后继续。
+同一会话同一时刻只允许一个请求写入（条件UPDATE领取租约），偏移不一致时返回当前偏移。
+整个文件的 SHA-256 在写入时增量计算；后续的块落在其他进程（或进程重启）时，从部分文件重新计算到当前偏移。
+部分文件保存在本地上传目录的 .partial 下（多实例部署时需要共享目录）。
+最后一块到达时校验客户端声明的校验和，记下整个文件的校验和，会话进入 processing 状态后请求立即返回；
+把部分文件写入存储后端（Blob 时是一次完整上传）由后台线程完成，再交给 content_store 登记并创建 File 记录，
+客户端查询会话得到结果。后台处理期间持续续约，中断（进程退出、租约过期）后由任一进程重新领取，
+内容写入由会话id决定的key，重试时不会产生第二份内容或第二条 File 记录。
+创建会话时声明的校验和与本人已上传的文件相同时，会话立即完成，不需要上传任何字节。
+
+直接上传（direct）：存储后端支持时，会话分配一个上传用的key，浏览器用只写的 SAS URL 把各块直接上传到 Blob Storage
+并提交，然后调用 finalize_direct：校验已提交内容的大小后会话同样进入 processing。后台线程先在服务端把内容复制到
+由会话id决定、从未签发过 SAS 的key并删除上传用的 blob（上传者手里的 SAS 此后无法再修改登记的内容），
+再按块读取复制后的内容计算 SHA-256（与声明的校验和比较，并作为去重的依据），最后创建 File 记录。
+"""
+import hashlib
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import or_, update
+from werkzeug.exceptions import ClientDisconnected
+from werkzeug.utils import secure_filename
+from app import db
+from app.models import File, UploadSession, UploadStatus
+from app.utils import content_store
+from app.utils.storage import storage
+
+READ_SIZE = 1024 * 1024
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+# 每个进程保留的增量哈希个数（正在上传的会话）
+_MAX_HASHERS = 64
+
+# 后台线程没有被唤醒时检查待处理会话的间隔（秒）
+_FINISH_POLL_INTERVAL = 5
+
+
+class UploadError(Exception):
+    """上传请求无法处理，status_code 为对应的HTTP状态码"""
+
+    def __init__(self, message, status_code=400, offset=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.offset = offset
+
+
+def copy_stream(source, target, hashers, limit=None):
+    """从 source 按块复制到 target 并更新 hashers，返回复制的字节数；客户端断开时返回已复制的部分"""
+    written = 0
+    try:
+        while limit is None or written < limit:
+            data = source.read(READ_SIZE if limit is None else min(READ_SIZE, limit - written))
+            if not data:
+                break
+            target.write(data)
+            for hasher in hashers:
+                hasher.update(data)
+            written += len(data)
+    except ClientDisconnected:
+        pass
+    return written
+
+
+def _new_file(content, filename, size, content_type, digest, uploader_id, task_id):
+    key, backend_name = content
+    return File(
+        filename=key,
+        original_filename=filename,
+        file_path=key,
+        storage=backend_name,
+        file_size=size,
+        file_type=content_type,
+        sha256=digest,
+        uploader_id=uploader_id,
+        task_id=task_id
+    )
+
+
+def save_file(upload, uploader_id, task_id=None):
+    """把表单上传的文件写入存储后端并返回未提交的 File 记录；相同内容已存在时只增加引用"""
+    filename = secure_filename(upload.filename) or 'upload'
+    content_type = upload.content_type or 'application/octet-stream'
+    backend = storage.default
+    key = content_store.new_key()
+    hasher = hashlib.sha256()
+    size = backend.save(key, upload.stream, [hasher], content_type)
+
+    digest = hasher.hexdigest()
+    content = content_store.store(backend, key, digest, size)
+    return _new_file(content, filename, size, content_type, digest, uploader_id, task_id)
+
+
+def _partial_folder():
+    folder = os.path.join(current_app.config['UPLOAD_FOLDER'], '.partial')
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def partial_path(session_id):
+    return os.path.join(_partial_folder(), session_id)
+
+
+class _Hashers:
+    """进程内的增量哈希：{会话id: (已哈希的偏移, sha256对象)}"""
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, session_id, offset):
+        """取出与偏移一致的哈希对象，没有时从部分文件重新计算"""
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+        if entry is not None and entry[0] == offset:
+            return entry[1]
+
+        hasher = hashlib.sha256()
+        if offset:
+            with open(partial_path(session_id), 'rb') as source:
+                copy_stream(source, _NullWriter, [hasher], limit=offset)
+        return hasher
+
+    def put(self, session_id, offset, hasher):
+        with self._lock:
+            self._entries[session_id] = (offset, hasher)
+            while len(self._entries) > _MAX_HASHERS:
+                self._entries.popitem(last=False)
+
+    def discard(self, session_id):
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+
+class _NullWriter:
+    @staticmethod
+    def write(data):
+        pass
+
+
+_hashers = _Hashers()
+
+
+def purge_expired_sessions():
+    """删除过期未完成会话的部分文件"""
+    expired = UploadSession.query.filter(
+        UploadSession.status == UploadStatus.ACTIVE,
+        UploadSession.expires_at < datetime.utcnow()
+    ).limit(100).all()
+    for session in expired:
+        session.status = UploadStatus.EXPIRED
+        _discard_content(session)
+    if expired:
+        db.session.commit()
+
+
+def _discard_content(session):
+    """删除未完成会话已经写入的内容：部分文件，或直接上传已提交的 blob（未提交的块由 Blob Storage 自动清理）"""
+    if session.storage_key is None:
+        _remove_partial(session.id)
+        return
+    try:
+        storage.backend(session.storage).delete(session.storage_key)
+    except Exception as e:
+        current_app.logger.error(f"Error deleting upload {session.storage_key}: {str(e)}")
+
+
+def _remove_partial(session_id):
+    _hashers.discard(session_id)
+    try:
+        os.remove(partial_path(session_id))
+    except FileNotFoundError:
+        pass
+
+
+def create_session(filename, size, content_type, uploader_id, task_id=None, sha256=None, direct=False):
+    """校验参数并创建上传会话；非法参数抛出 UploadError。direct 为真时浏览器直接上传到存储后端"""
+    config = current_app.config
+    filename = secure_filename(filename or '') or 'upload'
+    if not isinstance(size, int) or isinstance(size, bool) or size <= 0:
+        raise UploadError('size must be a positive integer')
+    if size > config['FILE_UPLOAD_MAX_SIZE']:
+        raise UploadError(f"File exceeds the {config['FILE_UPLOAD_MAX_SIZE']} byte limit", 413)
+    if sha256 is not None:
+        sha256 = str(sha256).lower()
+        if not SHA256_PATTERN.match(sha256):
+            raise UploadError('sha256 must be 64 hex characters')
+    if direct and not storage.default.direct_uploads:
+        raise UploadError('Direct uploads are not available with the configured storage', 409)
+
+    purge_expired_sessions()
+    session = UploadSession(
+        id=uuid.uuid4().hex,
+        filename=filename,
+        content_type=(content_type or 'application/octet-stream')[:100],
+        size=size,
+        sha256=sha256,
+        created_by=uploader_id,
+        task_id=task_id,
+        expires_at=datetime.utcnow() + timedelta(seconds=config['FILE_UPLOAD_SESSION_TTL'])
+    )
+    if direct:
+        session.storage = storage.default.name
+        session.storage_key = content_store.new_key()
+    db.session.add(session)
+
+    # 本人上传过相同内容：直接引用，不传输任何字节。
+    # 只凭声明的校验和就引用他人的内容等于泄露内容，其他人的重复上传在完成时才合并存储
+    content = None
+    if sha256 and File.query.filter_by(sha256=sha256, uploader_id=uploader_id).first() is not None:
+        content = content_store.acquire(sha256)
+    if content is not None:
+        _complete(session, content, sha256)
+    elif not direct:
+        open(partial_path(session.id), 'wb').close()
+    db.session.commit()
+    return session
+
+
+def _claim(session_id, offset):
+    """领取写入租约：会话进行中、偏移一致且没有其他写入者时成功"""
+    now = datetime.utcnow()
+    claimed = UploadSession.query.filter(
+        UploadSession.id == session_id,
+        UploadSession.status == UploadStatus.ACTIVE,
+        UploadSession.received == offset,
+        UploadSession.expires_at > now,
+        or_(UploadSession.lease_until.is_(None), UploadSession.lease_until < now)
+    ).update({
+        UploadSession.lease_until: now + timedelta(seconds=current_app.config['FILE_UPLOAD_LEASE_SECONDS'])
+    }, synchronize_session=False)
+    db.session.commit()
+    return bool(claimed)
+
+
+def write_chunk(session, offset, stream, length=None, chunk_sha256=None):
+    """把从 offset 开始的一块数据写入会话，返回更新后的会话；最后一块到达后会话进入 processing，由后台写入存储
+
+    length 为请求体长度（未知时写到声明的文件大小为止）；chunk_sha256 为这一块的校验和（可选），
+    不一致时丢弃这一块。偏移不一致或其他请求正在写入时抛出 UploadError(409)，其中带有当前偏移。
+    """
+    if session.status != UploadStatus.ACTIVE:
+        raise UploadError(f'Upload is {session.status.value}', 410)
+    if session.storage_key is not None:
+        raise UploadError('Direct uploads go to blob_url, then finalize', 409)
+    remaining = session.size - offset
+    if length is not None and length > remaining:
+        raise UploadError('Chunk extends past the declared file size', 416, offset=session.received)
+    if not _claim(session.id, offset):
+        db.session.refresh(session)
+        if session.status != UploadStatus.ACTIVE or session.expires_at <= datetime.utcnow():
+            raise UploadError('Upload session is no longer active', 410)
+        if session.received != offset:
+            raise UploadError('Offset does not match the bytes received so far', 409, offset=session.received)
+        raise UploadError('Another request is writing to this upload', 409, offset=session.received)
+
+    try:
+        hasher = _hashers.take(session.id, offset)
+        chunk_hasher = hashlib.sha256()
+        with open(partial_path(session.id), 'r+b') as target:
+            target.seek(offset)
+            written = copy_stream(stream, target, [hasher, chunk_hasher],
+                                  limit=remaining if length is None else length)
+
+        if chunk_sha256 and chunk_hasher.hexdigest() != chunk_sha256.lower():
+            # 丢弃这一块：偏移不前进，下次写入会覆盖这些字节
+            _hashers.discard(session.id)
+            raise UploadError('Chunk checksum mismatch', 422, offset=offset)
+
+        session.received = offset + written
+        session.expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['FILE_UPLOAD_SESSION_TTL'])
+        if session.received == session.size:
+            _received_all(session, hasher.hexdigest())
+        else:
+            _hashers.put(session.id, session.received, hasher)
+    finally:
+        session.lease_until = None
+        db.session.commit()
+    if session.status == UploadStatus.PROCESSING:
+        upload_finisher.notify()
+    return session
+
+
+def _received_all(session, digest):
+    """全部字节已到达：校验整个文件，写入存储交给后台（调用方提交）"""
+    _hashers.discard(session.id)
+    if session.sha256 and session.sha256 != digest:
+        session.status = UploadStatus.FAILED
+        session.error = 'File checksum mismatch'
+        _remove_partial(session.id)
+        return
+    session.sha256 = digest
+    session.status = UploadStatus.PROCESSING
+
+
+def _content_key(session_id):
+    """会话内容在存储后端中的key：由会话id决定，后台处理中断后重试时写入同一位置"""
+    return f'{session_id[:2]}/{session_id}'
+
+
+def _content_backend(session):
+    """后台处理把会话内容写入的存储后端"""
+    return storage.backend(session.storage) if session.storage_key is not None else storage.default
+
+
+def _complete(session, content, digest):
+    file = _new_file(content, session.filename, session.size, session.content_type,
+                     digest, session.created_by, session.task_id)
+    db.session.add(file)
+    db.session.flush()
+    session.file_id = file.id
+    session.received = session.size
+    session.status = UploadStatus.COMPLETED
+
+
+def finalize_direct(session):
+    """直接上传的内容提交后调用：校验大小后会话进入 processing，由后台复制、校验并创建 File 记录，返回更新后的会话
+
+    内容还没有提交（或大小不一致，可能仍在上传）时抛出 UploadError(409)，会话保持进行中可以再次调用；
+    已经在处理或已完成时直接返回会话。
+    """
+    if session.storage_key is None:
+        raise UploadError('Not a direct upload', 409)
+    if session.status in (UploadStatus.PROCESSING, UploadStatus.COMPLETED):
+        return session
+    if session.status != UploadStatus.ACTIVE:
+        raise UploadError(f'Upload is {session.status.value}', 410)
+    if not _claim(session.id, 0):
+        db.session.refresh(session)
+        if session.status in (UploadStatus.PROCESSING, UploadStatus.COMPLETED):
+            return session
+        raise UploadError('Upload is already being finalized', 409)
+
+    try:
+        size = storage.backend(session.storage).size(session.storage_key)
+        if size is None:
+            raise UploadError('Upload has not been committed', 409)
+        if size != session.size:
+            raise UploadError(f'Committed upload is {size} bytes, expected {session.size}', 409)
+        session.expires_at = datetime.utcnow() + timedelta(seconds=current_app.config['FILE_UPLOAD_SESSION_TTL'])
+        session.status = UploadStatus.PROCESSING
+    finally:
+        session.lease_until = None
+        db.session.commit()
+    upload_finisher.notify()
+    return session
+
+
+def abort_session(session):
+    if session.status == UploadStatus.ACTIVE:
+        session.status = UploadStatus.ABORTED
+        _discard_content(session)
+        db.session.commit()
+    return session
+
+
+class _Lease:
+    """后台处理期间的会话租约：定期续约，续约失败（已被其他进程接管）时 lost 为真"""
+
+    def __init__(self, app, session_id, until):
+        self.app = app
+        self.session_id = session_id
+        self.until = until
+        self.lost = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'upload-lease-{session_id[:8]}', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def update(self, **values):
+        """仍持有租约时立即提交对会话的修改，返回是否成功"""
+        with self._lock:
+            if not self.lost and not self._execute(values):
+                self.lost = True
+            return not self.lost
+
+    def _execute(self, values):
+        with self.app.app_context(), db.engine.begin() as conn:
+            return conn.execute(update(UploadSession).where(
+                UploadSession.id == self.session_id,
+                UploadSession.status == UploadStatus.PROCESSING,
+                UploadSession.lease_until == self.until
+            ).values(**values)).rowcount
+
+    def _run(self):
+        seconds = self.app.config['FILE_UPLOAD_LEASE_SECONDS']
+        while not self._stop.wait(seconds / 3):
+            until = datetime.utcnow() + timedelta(seconds=seconds)
+            with self._lock:
+                try:
+                    renewed = self._execute({'lease_until': until})
+                except Exception as e:
+                    self.app.logger.error(f"Could not renew upload lease {self.session_id}: {str(e)}")
+                    continue
+                if not renewed:
+                    self.lost = True
+                    return
+                self.until = until
+
+
+class UploadFinisher:
+    """后台完成 processing 状态的会话：把内容写入存储后端（直接上传时复制并校验）、登记并创建 File 记录
+
+    会话状态在数据库中，每个进程的工作线程都可以领取（条件UPDATE设置租约），
+    进程重启或处理中断后由租约过期的会话恢复。
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = threading.Lock()
+        self._threads = []
+        self._wakeup = threading.Condition()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['upload_finisher'] = self
+        # 与需求验证工作线程相同：由 run.py 或第一个请求启动，脚本和 flask 命令不领取会话
+        app.before_request(self._start_on_first_request)
+
+    def _start_on_first_request(self):
+        if not self._threads:
+            self.ensure_started()
+
+    def ensure_started(self):
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for i in range(len(self._threads), self.app.config['FILE_UPLOAD_FINALIZE_WORKERS']):
+                thread = threading.Thread(target=self._run, name=f'upload-finisher-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def notify(self):
+        self.ensure_started()
+        with self._wakeup:
+            self._wakeup.notify()
+
+    def _run(self):
+        while True:
+            claimed = None
+            try:
+                with self.app.app_context():
+                    claimed = self._claim()
+                    if claimed:
+                        self._process(*claimed)
+            except Exception as e:
+                self.app.logger.error(f"Upload finisher failed: {str(e)}")
+
+            if not claimed:
+                with self._wakeup:
+                    self._wakeup.wait(_FINISH_POLL_INTERVAL)
+
+    def _claim(self):
+        """领取一个没有租约（或租约过期）的 processing 会话，返回 (会话id, 租约到期时间)"""
+        now = datetime.utcnow()
+        available = or_(UploadSession.lease_until.is_(None), UploadSession.lease_until < now)
+        session_ids = db.session.query(UploadSession.id).filter(
+            UploadSession.status == UploadStatus.PROCESSING, available
+        ).order_by(UploadSession.updated_at).limit(10).all()
+        until = now + timedelta(seconds=self.app.config['FILE_UPLOAD_LEASE_SECONDS'])
+        for session_id, in session_ids:
+            claimed = UploadSession.query.filter(
+                UploadSession.id == session_id, UploadSession.status == UploadStatus.PROCESSING, available
+            ).update({UploadSession.lease_until: until}, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return session_id, until
+        db.session.commit()
+        return None
+
+    def _process(self, session_id, until):
+        session = db.session.get(UploadSession, session_id)
+        expired = session.expires_at < datetime.utcnow()
+        job = {
+            'id': session.id,
+            'size': session.size,
+            'content_type': session.content_type,
+            'storage': session.storage,
+            'storage_key': session.storage_key,
+            'sha256': session.sha256,
+            'verified': session.received == session.size
+        }
+        # 写入存储或校验可能需要很长时间，期间不保留数据库事务
+        db.session.commit()
+
+        backend = key = error = None
+        if not expired:
+            try:
+                with _Lease(self.app, session_id, until) as lease:
+                    if job['storage_key'] is None:
+                        backend, key = _store_partial(job)
+                    else:
+                        backend, key, error = _verify_direct(job, lease)
+                until = lease.until
+                if lease.lost:
+                    return
+            except Exception as e:
+                # 租约过期后重试，直到会话过期
+                self.app.logger.error(f"Could not store upload {session_id}: {str(e)}")
+                return
+
+        if not self._finish(session_id, until, backend, key, error):
+            self.app.logger.warning(f"Upload {session_id} was taken over by another worker")
+
+    def _finish(self, session_id, until, backend, key, error=None):
+        """仍持有租约时完成会话；backend 为None表示会话已过期，error 为校验失败的原因"""
+        held = UploadSession.query.filter(
+            UploadSession.id == session_id,
+            UploadSession.status == UploadStatus.PROCESSING,
+            UploadSession.lease_until == until
+        ).update({UploadSession.lease_until: None}, synchronize_session=False)
+        if not held:
+            db.session.rollback()
+            return False
+
+        session = db.session.get(UploadSession, session_id, populate_existing=True)
+        if backend is None or error:
+            session.status = UploadStatus.FAILED
+            session.error = error or 'Upload could not be stored before the session expired'
+            _discard_content(session)
+            _content_backend(session).delete(_content_key(session.id))
+        elif backend.size(key) == session.size:
+            _complete(session, content_store.store(backend, key, session.sha256, session.size), session.sha256)
+        else:
+            # 上次处理在登记前中断，并且内容作为重复内容已被删除：引用已有的那份（校验和已经过校验）
+            content = content_store.acquire(session.sha256) if session.received == session.size else None
+            if content is None:
+                session.status = UploadStatus.FAILED
+                session.error = 'Upload data is missing'
+            else:
+                _complete(session, content, session.sha256)
+        db.session.commit()
+        return True
+
+
+def _store_partial(job):
+    """把分块上传的部分文件写入存储后端，返回 (后端, key)；部分文件已经写入过时直接返回"""
+    backend = storage.default
+    key = _content_key(job['id'])
+    path = partial_path(job['id'])
+    if os.path.exists(path):
+        backend.put_file(key, path, job['content_type'])
+    return backend, key
+
+
+def _verify_direct(job, lease):
+    """把直接上传的内容复制到没有签发过 SAS 的 key 并删除上传用的 blob，再计算复制后内容的校验和；
+    返回 (后端, key, 失败原因)。校验通过时在租约内记下实际的校验和，之后与分块上传一样登记"""
+    backend = storage.backend(job['storage'])
+    key = _content_key(job['id'])
+    if job['storage_key'] != key:
+        if backend.size(job['storage_key']) is None:
+            return backend, key, 'Upload data is missing'
+        backend.copy(job['storage_key'], key)
+        if not lease.update(storage_key=key):
+            return backend, key, None
+        backend.delete(job['storage_key'])
+    if job['verified']:
+        return backend, key, None
+
+    size = backend.size(key)
+    if size != job['size']:
+        return backend, key, f"Committed upload is {size} bytes, expected {job['size']}"
+    hasher = hashlib.sha256()
+    for data in backend.iter_chunks(key):
+        hasher.update(data)
+    digest = hasher.hexdigest()
+    if job['sha256'] and job['sha256'] != digest:
+        return backend, key, 'File checksum mismatch'
+    lease.update(received=job['size'], sha256=digest)
+    return backend, key, None
+
+
+upload_finisher = UploadFinisher()
@@ -0,0 +1,215 @@
+"""
+需求验证（Azure OpenAI）
+
+对标题和业务目标打分并给出反馈。调用耗时较长，只应在后台任务中执行，
+请求处理函数通过 verification_jobs 提交任务；stream_requirement 供流式接口边生成边转发。
+"""
+import hashlib
+import json
+import random  # Temporary use, can be removed after connecting to Azure OpenAI
+import re
+import unicodedata
+from datetime import datetime
+from flask import current_app
+from app.utils.openai_client import openai_client, AzureOpenAIError
+
+# 修改提示词或请求参数时递增，使旧的缓存结果失效
+PROMPT_VERSION = '1'
+
+SYSTEM_PROMPT = (
+    "You are a senior data scientist and researcher at a large technology company. You are evaluating the "
+    "clarity and feasibility of a new requirement. Please provide a clarity score (0-100) and a feasibility "
+    "score (0-100), along with detailed feedback. Your feedback should identify any areas of ambiguity, "
+    "suggest what additional information might be needed, and assess if the requirement is technically "
+    "feasible with current technologies."
+)
+
+FEEDBACK_TEMPLATES = [
+    "The requirement is generally clear but could benefit from more specific metrics for success. Consider defining key performance indicators (KPIs) that would demonstrate successful implementation. The feasibility is good, though implementation timeline might need adjustment based on available resources.",
+    "Your business goal is well-defined, but the scope needs more precise boundaries. Try specifying which data sources will be used and exact time ranges. From a technical perspective, this is feasible but would require significant data processing capabilities.",
+    "This requirement has good clarity in terms of the business objective, but lacks detail on technical requirements. The feasibility depends on data availability and quality. Please provide more information about existing data infrastructure and quality."
+]
+
+
+def build_messages(title, business_goal):
+    return [
+        {
+            "role": "system",
+            "content": SYSTEM_PROMPT
+        },
+        {
+            "role": "user",
+            "content": f"Please evaluate this requirement:\nTitle: {title}\nBusiness Goal: {business_goal}\n\nProvide your analysis in this JSON format:\n```json\n{{\"clarity_score\": (number 0-100), \"feasibility_score\": (number 0-100), \"feedback\": \"Your detailed feedback here\"}}\n```"
+        }
+    ]
+
+
+def _normalize(text):
+    return re.sub(r'\s+', ' ', unicodedata.normalize('NFKC', text or '')).strip()
+
+
+def verification_cache_key(title, business_goal):
+    """验证结果的内容地址：规范化后的输入 + 模型部署 + API版本 + 提示词版本"""
+    config = current_app.config
+    raw = json.dumps([
+        _normalize(title),
+        _normalize(business_goal),
+        config['AZURE_OPENAI_DEPLOYMENT_NAME'],
+        config['AZURE_OPENAI_API_VERSION'],
+        PROMPT_VERSION
+    ], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def parse_verification(content):
+    """从模型回复中提取JSON结果，缺少字段时返回None"""
+    json_start = content.find('{')
+    json_end = content.rfind('}') + 1
+    if json_start < 0 or json_end <= json_start:
+        return None
+
+    result = json.loads(content[json_start:json_end])
+    if all(k in result for k in ['clarity_score', 'feasibility_score', 'feedback']):
+        return result
+    return None
+
+
+class StreamingResultParser:
+    """增量扫描模型输出，第一个完整的JSON对象闭合后立即解析出结果"""
+
+    def __init__(self):
+        self.text = ''
+        self.result = None
+        self._start = None
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._pos = 0
+
+    def feed(self, delta):
+        """追加一段输出；结果在本次追加中变为可用时返回结果字典，否则返回None"""
+        self.text += delta
+        if self.result is not None:
+            return None
+
+        while self._pos < len(self.text):
+            char = self.text[self._pos]
+            self._pos += 1
+            if self._start is None:
+                if char == '{':
+                    self._start, self._depth = self._pos - 1, 1
+                continue
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                self._depth += 1
+            elif char == '}':
+                self._depth -= 1
+                if self._depth == 0:
+                    candidate = self.text[self._start:self._pos]
+                    self._start = None
+                    try:
+                        result = json.loads(candidate)
+                    except ValueError:
+                        continue
+                    if isinstance(result, dict) and all(k in result for k in ['clarity_score', 'feasibility_score', 'feedback']):
+                        self.result = result
+                        return result
+        return None
+
+
+def stream_requirement(title, business_goal):
+    """流式评估需求，依次产出 ('token', 文本) 和最终的 ('result', 结果字典)
+
+    未配置 Azure OpenAI 时直接产出模拟结果；回复中没有完整结果时抛出 AzureOpenAIError。
+    """
+    if not openai_client.configured:
+        yield 'result', mock_verification()
+        return
+
+    parser = StreamingResultParser()
+    for delta in openai_client.chat_completion_stream({
+        "messages": build_messages(title, business_goal),
+        "temperature": 0.7,
+        "max_tokens": 800,
+        "n": 1
+    }):
+        yield 'token', delta
+        result = parser.feed(delta)
+        if result is not None:
+            yield 'result', result
+
+    if parser.result is None:
+        raise AzureOpenAIError('Azure OpenAI returned an unexpected response')
+
+
+def format_verification(result):
+    """把验证结果整理成保存到任务上的文本"""
+    return (f"Clarity: {result['clarity_score']}/100, Feasibility: {result['feasibility_score']}/100. "
+            f"{result['feedback']}")
+
+
+def _score(value):
+    return min(max(int(round(float(value))), 0), 100)
+
+
+def apply_verification(task, result):
+    """把验证结果写到任务上：分数、反馈文本、验证时间和模型部署；调用方负责状态变更和提交"""
+    clarity_score = _score(result['clarity_score'])
+    feasibility_score = _score(result['feasibility_score'])
+    task.verification_result = format_verification(result)
+    task.clarity_score = clarity_score
+    task.feasibility_score = feasibility_score
+    task.verified_at = datetime.utcnow()
+    task.verification_model = current_app.config['AZURE_OPENAI_DEPLOYMENT_NAME']
+
+
+def clear_verification(task):
+    """清除任务上已经不对应当前标题/业务目标的验证结果"""
+    task.verification_result = None
+    task.clarity_score = None
+    task.feasibility_score = None
+    task.verified_at = None
+    task.verification_model = None
+
+
+def mock_verification():
+    """Azure OpenAI 不可用时的模拟结果，实际部署时可以移除"""
+    return {
+        'clarity_score': random.randint(65, 95),
+        'feasibility_score': random.randint(60, 90),
+        'feedback': random.choice(FEEDBACK_TEMPLATES)
+    }
+
+
+def evaluate_requirement(title, business_goal):
+    """调用 Azure OpenAI 评估需求，返回包含 clarity_score/feasibility_score/feedback 的字典
+
+    未配置 Azure OpenAI 时返回模拟结果；已配置但调用失败或回复无法解析时抛出 AzureOpenAIError。
+    """
+    if not openai_client.configured:
+        current_app.logger.warning("Azure OpenAI is not configured, using mock data")
+        return mock_verification()
+
+    response_data = openai_client.chat_completion({
+        "messages": build_messages(title, business_goal),
+        "temperature": 0.7,
+        "max_tokens": 800,
+        "n": 1
+    })
+
+    try:
+        result = parse_verification(response_data['choices'][0]['message']['content'])
+    except (KeyError, IndexError, TypeError, ValueError) as e:
+        current_app.logger.error(f"Error parsing AI response: {str(e)}")
+        result = None
+    if result is None:
+        raise AzureOpenAIError('Azure OpenAI returned an unexpected response')
+    return result
@@ -0,0 +1,260 @@
+"""
+批量需求验证
+
+按过滤条件（状态、优先级、负责人、创建时间范围）选出任务，以有界并发调用 Azure OpenAI，
+每处理一批就把结果和断点（last_task_id）在同一事务中提交。批次记录在 verification_batch 表中，
+进程退出或中断后可以从断点继续；运行中的批次由后台线程定期刷新心跳（与一批调用要多久无关），
+心跳过期的批次才允许被接管。每次提交前在同一事务中确认批次仍由自己运行，被接管后放弃本批结果。
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import or_, update
+from app import db
+from app.models import Task, TaskStatus, TaskPriority, VerificationBatch, BatchStatus, ChangeAction
+from app.utils.verification import evaluate_requirement, verification_cache_key, apply_verification
+from app.utils.verification_cache import verification_cache
+from app.utils.openai_client import openai_client, AzureOpenAIError
+from app.utils.task_hooks import on_tasks_changed
+
+class BatchBusy(Exception):
+    """批次正在其他进程中运行或已经完成"""
+
+
+def parse_filters(data):
+    """校验过滤条件，返回可存储的字典；非法取值抛出 ValueError"""
+    filters = {}
+    if data.get('status'):
+        filters['status'] = TaskStatus(data['status']).value
+    if data.get('priority'):
+        filters['priority'] = TaskPriority(data['priority']).value
+    if data.get('assignee_id'):
+        filters['assignee_id'] = int(data['assignee_id'])
+    for key in ('created_since', 'created_before'):
+        if data.get(key):
+            filters[key] = datetime.fromisoformat(data[key]).isoformat()
+    return filters
+
+
+def filtered_query(filters):
+    query = Task.query
+    if 'status' in filters:
+        query = query.filter(Task.status == TaskStatus(filters['status']))
+    if 'priority' in filters:
+        query = query.filter(Task.priority == TaskPriority(filters['priority']))
+    if 'task_id' in filters:
+        query = query.filter(Task.id == filters['task_id'])
+    if 'assignee_id' in filters:
+        query = query.filter(Task.assignee_id == filters['assignee_id'])
+    if 'created_since' in filters:
+        query = query.filter(Task.created_at >= datetime.fromisoformat(filters['created_since']))
+    if 'created_before' in filters:
+        query = query.filter(Task.created_at < datetime.fromisoformat(filters['created_before']))
+    return query
+
+
+def create_batch(filters, concurrency, user_id=None):
+    """记录批次以及当前匹配的任务范围；之后新建的任务不在本批次内"""
+    query = filtered_query(filters)
+    batch = VerificationBatch(
+        status=BatchStatus.PAUSED,
+        filters=json.dumps(filters),
+        concurrency=concurrency,
+        max_task_id=query.with_entities(db.func.max(Task.id)).scalar() or 0,
+        total=query.count(),
+        created_by=user_id
+    )
+    db.session.add(batch)
+    db.session.commit()
+    return batch
+
+
+def active_batch_for_task(app, task_id):
+    """返回正在运行（心跳未过期）且还没有处理到该任务的批次中包含该任务的一个，没有时返回None"""
+    stale_before = datetime.utcnow() - timedelta(seconds=app.config['VERIFICATION_BATCH_STALE_AFTER'])
+    candidates = VerificationBatch.query.filter(
+        VerificationBatch.status == BatchStatus.RUNNING,
+        VerificationBatch.heartbeat_at >= stale_before,
+        VerificationBatch.last_task_id < task_id,
+        VerificationBatch.max_task_id >= task_id
+    ).order_by(VerificationBatch.id.desc()).all()
+    for batch in candidates:
+        if filtered_query(json.loads(batch.filters)).filter(Task.id == task_id).count():
+            return batch
+    return None
+
+
+def claim_batch(app, batch_id):
+    """把批次标记为由当前进程运行并返回运行者标识；其他进程正在运行（心跳未过期）或已完成时抛出 BatchBusy"""
+    worker = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+    stale_before = datetime.utcnow() - timedelta(seconds=app.config['VERIFICATION_BATCH_STALE_AFTER'])
+    claimed = VerificationBatch.query.filter(
+        VerificationBatch.id == batch_id,
+        or_(
+            VerificationBatch.status == BatchStatus.PAUSED,
+            db.and_(VerificationBatch.status == BatchStatus.RUNNING,
+                    or_(VerificationBatch.heartbeat_at.is_(None), VerificationBatch.heartbeat_at < stale_before))
+        )
+    ).update({
+        VerificationBatch.status: BatchStatus.RUNNING,
+        VerificationBatch.worker: worker,
+        VerificationBatch.heartbeat_at: datetime.utcnow()
+    }, synchronize_session=False)
+    db.session.commit()
+    if not claimed:
+        raise BatchBusy()
+    return worker
+
+
+class _Heartbeat:
+    """批次运行期间每隔 VERIFICATION_BATCH_STALE_AFTER 的1/4刷新一次心跳，批次已被接管或暂停时停止"""
+
+    def __init__(self, app, batch_id, worker):
+        self.app = app
+        self.batch_id = batch_id
+        self.worker = worker
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'verify-batch-{batch_id}-heartbeat', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.app.config['VERIFICATION_BATCH_STALE_AFTER'] / 4):
+            try:
+                with self.app.app_context(), db.engine.begin() as conn:
+                    owned = conn.execute(update(VerificationBatch).where(
+                        VerificationBatch.id == self.batch_id,
+                        VerificationBatch.worker == self.worker,
+                        VerificationBatch.status == BatchStatus.RUNNING
+                    ).values(heartbeat_at=datetime.utcnow())).rowcount
+            except Exception as e:
+                self.app.logger.error(f"Could not refresh verification batch {self.batch_id} heartbeat: {str(e)}")
+                continue
+            if not owned:
+                return
+
+
+def _evaluate(app, title, business_goal):
+    """在工作线程中执行一次验证，返回 (结果, 错误信息)"""
+    with app.app_context():
+        try:
+            if openai_client.configured:
+                key = verification_cache_key(title, business_goal)
+                return verification_cache.get_or_compute(key, lambda: evaluate_requirement(title, business_goal)), None
+            return evaluate_requirement(title, business_goal), None
+        except AzureOpenAIError as e:
+            return None, str(e)
+        except Exception as e:
+            app.logger.error(f"Error during batch verification: {str(e)}")
+            return None, 'Internal server error during verification'
+
+
+def _apply_results(batch, rows, outcomes):
+    """把一批结果写回任务，调用方负责提交"""
+    tasks = {task.id: task for task in Task.query.filter(Task.id.in_([row.id for row in rows]))}
+    changes = []
+    for row, (result, error) in zip(rows, outcomes):
+        task = tasks.get(row.id)
+        if task is None:
+            batch.skipped += 1
+            continue
+        if error is not None:
+            batch.failed += 1
+            batch.last_error = error[:500]
+            continue
+
+        old_status = task.status
+        try:
+            apply_verification(task, result)
+        except (TypeError, ValueError):
+            batch.failed += 1
+            batch.last_error = 'Azure OpenAI returned non-numeric scores'
+            continue
+        if task.status == TaskStatus.DRAFT:
+            task.status = TaskStatus.VERIFIED
+        changes.append((task.id, task.assignee_id, task.priority, task.priority, old_status, task.status))
+        batch.succeeded += 1
+
+    if changes:
+        on_tasks_changed(changes, ChangeAction.VERIFIED)
+
+
+def run_batch(app, batch_id, worker, progress=None):
+    """在当前线程中运行（或继续）已领取的批次，直到完成；progress(batch) 在每次提交后调用"""
+    with app.app_context():
+        batch = db.session.get(VerificationBatch, batch_id)
+        filters = json.loads(batch.filters)
+        chunk_size = app.config['VERIFICATION_BATCH_COMMIT_SIZE']
+
+        try:
+            with ThreadPoolExecutor(max_workers=batch.concurrency, thread_name_prefix=f'verify-batch-{batch_id}') as pool, \
+                    _Heartbeat(app, batch_id, worker):
+                while True:
+                    rows = filtered_query(filters).with_entities(Task.id, Task.title, Task.business_goal).filter(
+                        Task.id > batch.last_task_id,
+                        Task.id <= batch.max_task_id
+                    ).order_by(Task.id).limit(chunk_size).all()
+                    if not rows:
+                        break
+                    # 调用上游期间不保留数据库事务，心跳线程才能写入
+                    db.session.commit()
+
+                    started = time.monotonic()
+                    pending = [row for row in rows if row.title and row.business_goal]
+                    outcomes = list(pool.map(lambda row: _evaluate(app, row.title, row.business_goal), pending))
+
+                    # 条件UPDATE在提交前锁住批次行：批次已被其他进程接管时放弃本批结果
+                    owned = VerificationBatch.query.filter_by(id=batch_id, worker=worker).update(
+                        {VerificationBatch.heartbeat_at: datetime.utcnow()}, synchronize_session=False
+                    )
+                    if not owned:
+                        raise BatchBusy()
+                    batch.skipped += len(rows) - len(pending)
+                    _apply_results(batch, pending, outcomes)
+                    batch.last_task_id = rows[-1].id
+                    batch.active_seconds += time.monotonic() - started
+                    db.session.commit()
+
+                    if progress is not None:
+                        progress(batch)
+
+            batch.status = BatchStatus.COMPLETED
+            batch.finished_at = datetime.utcnow()
+            db.session.commit()
+        except BaseException:
+            # 中断（包括 Ctrl+C）时保留已提交的断点，批次可以继续
+            db.session.rollback()
+            VerificationBatch.query.filter_by(id=batch_id, worker=worker).update(
+                {VerificationBatch.status: BatchStatus.PAUSED}, synchronize_session=False
+            )
+            db.session.commit()
+            raise
+
+        if progress is not None:
+            progress(batch)
+        return batch
+
+
+def start_batch(app, batch_id):
+    """领取批次并在后台线程中运行，供HTTP接口调用；无法领取时抛出 BatchBusy"""
+    worker = claim_batch(app, batch_id)
+
+    def target():
+        try:
+            run_batch(app, batch_id, worker)
+        except Exception as e:
+            app.logger.error(f"Verification batch {batch_id} stopped: {str(e)}")
+
+    thread = threading.Thread(target=target, name=f'verify-batch-{batch_id}', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,161 @@
+"""
+需求验证结果缓存
+
+两级缓存：进程内有界LRU + 数据库表 verification_cache（带过期时间，所有进程共享、重启后保留）。
+键由 verification_cache_key 计算，相同输入在同一模型部署和提示词版本下得到同一个键。
+同一进程内相同键的并发计算通过 single-flight 合并，只有一个线程调用上游。
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models import VerificationCacheEntry
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class VerificationCache:
+    def __init__(self, app=None):
+        self.app = None
+        self.enabled = False
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._last_purge = 0
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        self.enabled = app.config.get('VERIFICATION_CACHE_ENABLED', False)
+        app.extensions['verification_cache'] = self
+
+    def get(self, key):
+        """依次查询内存和数据库，未命中或已过期时返回None"""
+        if not self.enabled:
+            return None
+
+        now = datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                result, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return result
+                del self._entries[key]
+
+        row = db.session.get(VerificationCacheEntry, key)
+        if row is None or row.expires_at <= now:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        result = json.loads(row.result)
+        with self._lock:
+            self.db_hits += 1
+            self._remember(key, result, row.expires_at)
+        return result
+
+    def put(self, key, result):
+        if not self.enabled:
+            return
+
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.app.config['VERIFICATION_CACHE_TTL'])
+        with self._lock:
+            self._remember(key, result, expires_at)
+
+        row = db.session.get(VerificationCacheEntry, key)
+        if row is None:
+            row = VerificationCacheEntry(key=key)
+            db.session.add(row)
+        row.result = json.dumps(result)
+        row.created_at = now
+        row.expires_at = expires_at
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # 其他进程同时写入了同一个键，结果等价
+            db.session.rollback()
+
+        self._purge_expired()
+
+    def get_or_compute(self, key, compute):
+        """命中缓存直接返回；否则同一键只有一个线程执行compute()，其余线程等待其结果"""
+        result = self.get(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+            self.put(key, flight.result)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def _remember(self, key, result, expires_at):
+        # 调用方持有 self._lock
+        self._entries[key] = (result, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.app.config['VERIFICATION_CACHE_MAX_ENTRIES']:
+            self._entries.popitem(last=False)
+
+    def _purge_expired(self):
+        """每个进程每小时最多清理一次过期记录"""
+        now = time.monotonic()
+        if now - self._last_purge < 3600:
+            return
+        self._last_purge = now
+        VerificationCacheEntry.query.filter(
+            VerificationCacheEntry.expires_at <= datetime.utcnow()
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pid': os.getpid(),
+                'enabled': self.enabled,
+                'entries': len(self._entries),
+                'memory_hits': self.memory_hits,
+                'db_hits': self.db_hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced
+            }
+
+
+verification_cache = VerificationCache()
@@ -0,0 +1,286 @@
+"""
+需求验证后台任务
+
+请求处理函数只负责写入一条排队中的 verification_job 并立即返回任务id，
+每个进程的固定数量工作线程从表中领取任务（条件UPDATE保证同一任务只被一个进程领取）
+并调用 Azure OpenAI。任务和结果都在数据库中，工作线程随 web 进程启动（脚本不领取任务），进程重启后排队中的任务会被继续执行。
+执行期间工作线程定期续约，租约过期（进程已退出）的任务重新排队；结果只在仍由本线程持有任务时写入，
+被接管的任务不会被原来的工作线程覆盖。
+
+提交时先查结果缓存，命中则直接返回已完成的任务；同一用户对相同输入的重复提交合并到进行中的任务；
+其他进程正在执行相同输入的任务时，工作线程等待其结果写入缓存而不再重复调用上游。
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, update
+from app import db
+from app.models import VerificationJob, JobStatus
+from app.utils.verification import evaluate_requirement, verification_cache_key
+from app.utils.verification_cache import verification_cache
+from app.utils.openai_client import openai_client, AzureOpenAIError
+
+
+class QueueFull(Exception):
+    """排队中的任务已达上限"""
+
+
+class _JobLease:
+    """执行期间的任务租约：后台线程每隔租约的1/3续约一次，任务已被接管（worker 不再是自己）时停止"""
+
+    def __init__(self, app, job_id, worker_id):
+        self.app = app
+        self.job_id = job_id
+        self.worker_id = worker_id
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'verification-lease-{job_id[:8]}', daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        seconds = self.app.config['VERIFICATION_JOB_LEASE_SECONDS']
+        while not self._stop.wait(seconds / 3):
+            try:
+                with self.app.app_context(), db.engine.begin() as conn:
+                    renewed = conn.execute(update(VerificationJob).where(
+                        VerificationJob.id == self.job_id,
+                        VerificationJob.status == JobStatus.RUNNING,
+                        VerificationJob.worker == self.worker_id
+                    ).values(lease_until=datetime.utcnow() + timedelta(seconds=seconds))).rowcount
+            except Exception as e:
+                self.app.logger.error(f"Could not renew verification job lease {self.job_id}: {str(e)}")
+                continue
+            if not renewed:
+                return
+
+
+class VerificationWorkerPool:
+    def __init__(self, app=None):
+        self.app = None
+        self.worker_id = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self._lock = threading.Lock()
+        self._threads = []
+        self._wakeup = threading.Condition()
+        self._finished = threading.Condition()
+        self._last_recovery = 0
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['verification_pool'] = self
+        # 工作线程只在 web 进程中运行：run.py 启动时调用 ensure_started 领取遗留的排队任务并恢复超时任务，
+        # 其他方式（flask run、测试）由第一个请求启动；脚本和 flask 命令从不领取任务
+        app.before_request(self._start_on_first_request)
+
+    def _start_on_first_request(self):
+        if not self._threads:
+            self.ensure_started()
+
+    def submit(self, title, business_goal, user_id):
+        """写入排队任务并唤醒工作线程，队列已满时抛出 QueueFull；缓存命中时返回已完成的任务"""
+        cache_key = verification_cache_key(title, business_goal)
+        cached = verification_cache.get(cache_key)
+        if cached is not None:
+            now = datetime.utcnow()
+            job = VerificationJob(
+                id=uuid.uuid4().hex,
+                status=JobStatus.SUCCEEDED,
+                title=title,
+                business_goal=business_goal,
+                cache_key=cache_key,
+                result=json.dumps(cached),
+                created_by=user_id,
+                created_at=now,
+                finished_at=now
+            )
+            db.session.add(job)
+            db.session.commit()
+            return job
+
+        pending = VerificationJob.query.filter(
+            VerificationJob.cache_key == cache_key,
+            VerificationJob.status.in_([JobStatus.QUEUED, JobStatus.RUNNING]),
+            VerificationJob.created_by == user_id
+        ).first()
+        if pending is not None:
+            return pending
+
+        queued = VerificationJob.query.filter_by(status=JobStatus.QUEUED).count()
+        if queued >= self.app.config['VERIFICATION_QUEUE_SIZE']:
+            raise QueueFull()
+
+        job = VerificationJob(
+            id=uuid.uuid4().hex,
+            status=JobStatus.QUEUED,
+            title=title,
+            business_goal=business_goal,
+            cache_key=cache_key,
+            created_by=user_id
+        )
+        db.session.add(job)
+        db.session.commit()
+
+        self.ensure_started()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job
+
+    def wait(self, job_id, timeout):
+        """长轮询：等待任务结束或超时，返回最新的任务记录"""
+        self.ensure_started()
+        deadline = time.monotonic() + timeout
+        while True:
+            job = db.session.get(VerificationJob, job_id, populate_existing=True)
+            remaining = deadline - time.monotonic()
+            if job is None or job.is_finished or remaining <= 0:
+                return job
+            # 本进程完成任务时会立即唤醒；其他进程完成的任务靠定期重新查询发现
+            with self._finished:
+                self._finished.wait(min(remaining, 0.5))
+
+    def ensure_started(self):
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            for i in range(len(self._threads), self.app.config['VERIFICATION_WORKERS']):
+                thread = threading.Thread(target=self._run, name=f'verification-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _run(self):
+        interval = self.app.config['VERIFICATION_POLL_INTERVAL']
+        while True:
+            job_id = None
+            try:
+                with self.app.app_context():
+                    self._recover_stale()
+                    job_id = self._claim()
+                    if job_id:
+                        self._execute(job_id)
+                    db.session.remove()
+            except Exception as e:
+                self.app.logger.error(f"Verification worker failed: {str(e)}")
+
+            if not job_id:
+                with self._wakeup:
+                    self._wakeup.wait(interval)
+
+    def _claim(self):
+        """领取最早的排队任务，返回任务id；没有可领取的任务时返回None"""
+        while True:
+            job_id = db.session.query(VerificationJob.id).filter_by(
+                status=JobStatus.QUEUED
+            ).order_by(VerificationJob.created_at).limit(1).scalar()
+            if job_id is None:
+                return None
+
+            now = datetime.utcnow()
+            claimed = VerificationJob.query.filter_by(id=job_id, status=JobStatus.QUEUED).update({
+                VerificationJob.status: JobStatus.RUNNING,
+                VerificationJob.worker: self.worker_id,
+                VerificationJob.started_at: now,
+                VerificationJob.lease_until: now + timedelta(seconds=self.app.config['VERIFICATION_JOB_LEASE_SECONDS']),
+                VerificationJob.attempts: VerificationJob.attempts + 1
+            }, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return job_id
+
+    def _execute(self, job_id):
+        job = db.session.get(VerificationJob, job_id)
+        # 调用上游期间不保留数据库事务（续约线程需要写入），任务记录只作为只读的输入
+        db.session.expunge(job)
+        db.session.rollback()
+        values = {}
+        with _JobLease(self.app, job_id, self.worker_id):
+            try:
+                if job.cache_key and openai_client.configured:
+                    result = verification_cache.get_or_compute(job.cache_key, lambda: self._evaluate(job))
+                else:
+                    result = evaluate_requirement(job.title, job.business_goal)
+                values[VerificationJob.result] = json.dumps(result)
+                values[VerificationJob.status] = JobStatus.SUCCEEDED
+            except AzureOpenAIError as e:
+                self.app.logger.warning(f"Verification job {job_id} failed: {str(e)}")
+                values[VerificationJob.error] = str(e)
+                values[VerificationJob.status] = JobStatus.FAILED
+            except Exception as e:
+                self.app.logger.error(f"Error during verification: {str(e)}")
+                values[VerificationJob.error] = 'Internal server error during verification'
+                values[VerificationJob.status] = JobStatus.FAILED
+        values[VerificationJob.finished_at] = datetime.utcnow()
+        values[VerificationJob.lease_until] = None
+
+        # 任务被重新排队并由其他工作线程领取后，不再写入本线程的结果
+        owned = VerificationJob.query.filter_by(
+            id=job_id, status=JobStatus.RUNNING, worker=self.worker_id
+        ).update(values, synchronize_session=False)
+        db.session.commit()
+        if not owned:
+            self.app.logger.warning(f"Verification job {job_id} was taken over by another worker")
+
+        with self._finished:
+            self._finished.notify_all()
+
+    def _evaluate(self, job):
+        """其他进程正在执行相同输入的任务时等待其结果，否则调用上游"""
+        deadline = time.monotonic() + self.app.config['VERIFICATION_JOB_TIMEOUT']
+        while time.monotonic() < deadline:
+            peer = VerificationJob.query.filter(
+                VerificationJob.cache_key == job.cache_key,
+                VerificationJob.status == JobStatus.RUNNING,
+                VerificationJob.worker != self.worker_id,
+                VerificationJob.started_at < job.started_at
+            ).first()
+            if peer is None:
+                break
+            db.session.rollback()
+            time.sleep(0.5)
+            result = verification_cache.get(job.cache_key)
+            if result is not None:
+                return result
+
+        return evaluate_requirement(job.title, job.business_goal)
+
+    def _recover_stale(self):
+        """租约过期的任务视为工作进程已退出：未超过重试次数的重新排队，否则标记失败"""
+        now = time.monotonic()
+        if now - self._last_recovery < self.app.config['VERIFICATION_JOB_LEASE_SECONDS'] / 2:
+            return
+        self._last_recovery = now
+
+        utcnow = datetime.utcnow()
+        stale = VerificationJob.query.filter(
+            VerificationJob.status == JobStatus.RUNNING,
+            or_(
+                VerificationJob.lease_until < utcnow,
+                # 没有租约的旧任务按执行时间判断
+                and_(VerificationJob.lease_until.is_(None),
+                     VerificationJob.started_at < utcnow - timedelta(seconds=self.app.config['VERIFICATION_JOB_TIMEOUT']))
+            )
+        )
+        max_attempts = self.app.config['VERIFICATION_MAX_ATTEMPTS']
+        stale.filter(VerificationJob.attempts >= max_attempts).update({
+            VerificationJob.status: JobStatus.FAILED,
+            VerificationJob.error: 'Verification timed out',
+            VerificationJob.finished_at: datetime.utcnow(),
+            VerificationJob.lease_until: None
+        }, synchronize_session=False)
+        stale.filter(VerificationJob.attempts < max_attempts).update({
+            VerificationJob.status: JobStatus.QUEUED,
+            VerificationJob.worker: None,
+            VerificationJob.lease_until: None
+        }, synchronize_session=False)
+        db.session.commit()
+
+
+verification_pool = VerificationWorkerPool()
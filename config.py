@@ -17,15 +17,57 @@ class Config:
     UPLOAD_FOLDER = os.path.join(basedir, 'app', 'static', 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max upload
     
+    # Chunked uploads for large files: every PUT carries at most one chunk (keep it below MAX_CONTENT_LENGTH);
+    # unfinished sessions expire after FILE_UPLOAD_SESSION_TTL seconds
+    FILE_UPLOAD_CHUNK_SIZE = int(os.environ.get('FILE_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024))
+    FILE_UPLOAD_MAX_SIZE = int(os.environ.get('FILE_UPLOAD_MAX_SIZE', 10 * 1024 * 1024 * 1024))
+    FILE_UPLOAD_SESSION_TTL = int(os.environ.get('FILE_UPLOAD_SESSION_TTL', 24 * 3600))
+    FILE_UPLOAD_LEASE_SECONDS = int(os.environ.get('FILE_UPLOAD_LEASE_SECONDS', 120))
+    # Once every byte has arrived, background threads (per process) store the file and create its record
+    FILE_UPLOAD_FINALIZE_WORKERS = int(os.environ.get('FILE_UPLOAD_FINALIZE_WORKERS', 2))
+    
+    # Download offload: 'x-sendfile' (Apache mod_xsendfile, lighttpd) or 'x-accel-redirect' (nginx) lets the
+    # fronting web server send file contents and handle Range after download_file has authorized the request;
+    # for nginx, ACCEL_PREFIX must be an internal location aliased to UPLOAD_FOLDER. Empty serves from Python.
+    FILE_DOWNLOAD_OFFLOAD = os.environ.get('FILE_DOWNLOAD_OFFLOAD', '').lower()
+    FILE_DOWNLOAD_ACCEL_PREFIX = os.environ.get('FILE_DOWNLOAD_ACCEL_PREFIX', '/protected-uploads/')
+    
     # Azure Blob Storage (production environment)
     AZURE_STORAGE_CONNECTION_STRING = os.environ.get('AZURE_STORAGE_CONNECTION_STRING')
     AZURE_STORAGE_CONTAINER_NAME = os.environ.get('AZURE_STORAGE_CONTAINER_NAME', 'file-uploads')
+    # Storage backend for uploaded files: 'local' (UPLOAD_FOLDER) or 'azure'; empty follows USE_AZURE_STORAGE.
+    # Blob uploads stream from the request in BLOCK_SIZE blocks, MAX_CONCURRENCY of them in flight at once
+    # (memory per upload is roughly BLOCK_SIZE * MAX_CONCURRENCY); files up to SINGLE_PUT_SIZE go in one request.
+    STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', '').lower()
+    AZURE_STORAGE_MAX_CONCURRENCY = int(os.environ.get('AZURE_STORAGE_MAX_CONCURRENCY', 4))
+    AZURE_STORAGE_BLOCK_SIZE = int(os.environ.get('AZURE_STORAGE_BLOCK_SIZE', 8 * 1024 * 1024))
+    AZURE_STORAGE_SINGLE_PUT_SIZE = int(os.environ.get('AZURE_STORAGE_SINGLE_PUT_SIZE', 8 * 1024 * 1024))
+    AZURE_STORAGE_DOWNLOAD_CHUNK_SIZE = int(os.environ.get('AZURE_STORAGE_DOWNLOAD_CHUNK_SIZE', 4 * 1024 * 1024))
+    # Redirect blob downloads to a short-lived read-only SAS URL once download_file has authorized the user,
+    # so attachment bytes never pass through the app. SAS URLs are cached per process and re-signed when
+    # fewer than SAS_REFRESH seconds of their SAS_TTL remain.
+    AZURE_STORAGE_DOWNLOAD_REDIRECT = os.environ.get('AZURE_STORAGE_DOWNLOAD_REDIRECT', 'false').lower() == 'true'
+    AZURE_STORAGE_SAS_TTL = int(os.environ.get('AZURE_STORAGE_SAS_TTL', 15 * 60))
+    AZURE_STORAGE_SAS_REFRESH = int(os.environ.get('AZURE_STORAGE_SAS_REFRESH', 5 * 60))
+    AZURE_STORAGE_SAS_CACHE_MAX_ENTRIES = int(os.environ.get('AZURE_STORAGE_SAS_CACHE_MAX_ENTRIES', 10000))
     
     # Azure OpenAI configuration
     AZURE_OPENAI_API_KEY = os.environ.get('AZURE_OPENAI_API_KEY', '')
     AZURE_OPENAI_ENDPOINT = os.environ.get('AZURE_OPENAI_ENDPOINT', '')
     AZURE_OPENAI_DEPLOYMENT_NAME = os.environ.get('AZURE_OPENAI_DEPLOYMENT_NAME', 'gpt-4o-mini')
     AZURE_OPENAI_API_VERSION = os.environ.get('AZURE_OPENAI_API_VERSION', '2025-04-15')
+    AZURE_OPENAI_CONNECT_TIMEOUT = float(os.environ.get('AZURE_OPENAI_CONNECT_TIMEOUT', 5))
+    AZURE_OPENAI_READ_TIMEOUT = float(os.environ.get('AZURE_OPENAI_READ_TIMEOUT', 60))
+    AZURE_OPENAI_MAX_RETRIES = int(os.environ.get('AZURE_OPENAI_MAX_RETRIES', 4))
+    AZURE_OPENAI_BACKOFF_BASE = float(os.environ.get('AZURE_OPENAI_BACKOFF_BASE', 1.0))
+    AZURE_OPENAI_BACKOFF_MAX = float(os.environ.get('AZURE_OPENAI_BACKOFF_MAX', 30))
+    AZURE_OPENAI_POOL_SIZE = int(os.environ.get('AZURE_OPENAI_POOL_SIZE', 10))
+    # Deployment quota shared by all worker processes (0 disables the limiter);
+    # Azure enforces quotas over short windows, so the bucket holds BURST_SECONDS worth of quota
+    AZURE_OPENAI_RPM_LIMIT = int(os.environ.get('AZURE_OPENAI_RPM_LIMIT', 0))
+    AZURE_OPENAI_TPM_LIMIT = int(os.environ.get('AZURE_OPENAI_TPM_LIMIT', 0))
+    AZURE_OPENAI_RATE_LIMIT_BURST_SECONDS = float(os.environ.get('AZURE_OPENAI_RATE_LIMIT_BURST_SECONDS', 10))
+    AZURE_OPENAI_RATE_LIMIT_MAX_WAIT = float(os.environ.get('AZURE_OPENAI_RATE_LIMIT_MAX_WAIT', 10))
     
     # Azure Application Insights
     APPLICATIONINSIGHTS_CONNECTION_STRING = os.environ.get('APPLICATIONINSIGHTS_CONNECTION_STRING')
@@ -43,6 +85,68 @@ class Config:
     ENTRA_REDIRECT_PATH = os.environ.get('ENTRA_REDIRECT_PATH', '/auth/callback')
     ENTRA_SCOPE = os.environ.get('ENTRA_SCOPE', 'user.read')
     
+    # Dashboard statistics: keep per-user counters in user_task_stats instead of
+    # aggregating over the task table on every dashboard load
+    TASK_STATS_COUNTERS = os.environ.get('TASK_STATS_COUNTERS', 'true').lower() == 'true'
+    
+    # JSON API configuration
+    API_PAGE_SIZE = int(os.environ.get('API_PAGE_SIZE', 50))
+    API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+    API_BULK_MAX_ITEMS = int(os.environ.get('API_BULK_MAX_ITEMS', 5000))
+    CHANGE_FEED_MAX_BATCH = int(os.environ.get('CHANGE_FEED_MAX_BATCH', 1000))
+    
+    # Bump to invalidate browser-cached task pages after template changes
+    PAGE_ETAG_VERSION = os.environ.get('PAGE_ETAG_VERSION', '1')
+    
+    # Task list page cache (per process, LRU bounded)
+    PAGE_CACHE_ENABLED = os.environ.get('PAGE_CACHE_ENABLED', 'true').lower() == 'true'
+    PAGE_CACHE_MAX_ENTRIES = int(os.environ.get('PAGE_CACHE_MAX_ENTRIES', 2000))
+    
+    # Server-Sent Events: each worker process polls the task change log once per
+    # interval and fans events out to its connected clients
+    SSE_POLL_INTERVAL = float(os.environ.get('SSE_POLL_INTERVAL', 1.0))
+    SSE_KEEPALIVE_INTERVAL = int(os.environ.get('SSE_KEEPALIVE_INTERVAL', 15))
+    SSE_QUEUE_SIZE = int(os.environ.get('SSE_QUEUE_SIZE', 100))
+    # Every open stream holds one server thread, so each process serves at most SSE_MAX_CONNECTIONS
+    # streams and answers 503 beyond that (pages then fall back to manual refresh); web.config runs
+    # 4 processes. Thousands of idle streams need an async worker such as gunicorn -k gevent.
+    SSE_MAX_CONNECTIONS = int(os.environ.get('SSE_MAX_CONNECTIONS', 100))
+    
+    # Requirement verification runs in background worker threads; the API returns a
+    # job id immediately and clients poll (or long-poll) for the result
+    VERIFICATION_WORKERS = int(os.environ.get('VERIFICATION_WORKERS', 4))
+    VERIFICATION_QUEUE_SIZE = int(os.environ.get('VERIFICATION_QUEUE_SIZE', 200))
+    VERIFICATION_POLL_INTERVAL = float(os.environ.get('VERIFICATION_POLL_INTERVAL', 2.0))
+    VERIFICATION_JOB_TIMEOUT = int(os.environ.get('VERIFICATION_JOB_TIMEOUT', 600))
+    # A running job renews its lease every third of this; a job whose lease lapsed (its process
+    # exited) is requeued, and only the worker that still owns the job may write its result
+    VERIFICATION_JOB_LEASE_SECONDS = int(os.environ.get('VERIFICATION_JOB_LEASE_SECONDS', 60))
+    VERIFICATION_MAX_ATTEMPTS = int(os.environ.get('VERIFICATION_MAX_ATTEMPTS', 3))
+    VERIFICATION_LONG_POLL_MAX = int(os.environ.get('VERIFICATION_LONG_POLL_MAX', 30))
+    
+    # Verification result cache: per-process LRU in front of the verification_cache table
+    VERIFICATION_CACHE_ENABLED = os.environ.get('VERIFICATION_CACHE_ENABLED', 'true').lower() == 'true'
+    VERIFICATION_CACHE_TTL = int(os.environ.get('VERIFICATION_CACHE_TTL', 7 * 24 * 3600))
+    VERIFICATION_CACHE_MAX_ENTRIES = int(os.environ.get('VERIFICATION_CACHE_MAX_ENTRIES', 1000))
+    
+    # Batch verification: concurrent LLM calls per batch and tasks per commit;
+    # a running batch whose heartbeat is older than STALE_AFTER seconds can be resumed elsewhere
+    VERIFICATION_BATCH_CONCURRENCY = int(os.environ.get('VERIFICATION_BATCH_CONCURRENCY', 4))
+    VERIFICATION_BATCH_MAX_CONCURRENCY = int(os.environ.get('VERIFICATION_BATCH_MAX_CONCURRENCY', 16))
+    VERIFICATION_BATCH_COMMIT_SIZE = int(os.environ.get('VERIFICATION_BATCH_COMMIT_SIZE', 50))
+    VERIFICATION_BATCH_STALE_AFTER = int(os.environ.get('VERIFICATION_BATCH_STALE_AFTER', 900))
+    
+    # Near-duplicate requirement detection: MinHash signatures of title + business goal in an LSH index.
+    # Lookups read the candidates from the task_lsh_band primary key (16 index seeks per lookup).
+    # DUPLICATE_INDEX_IN_MEMORY additionally keeps a copy of the whole index in every process: roughly
+    # 250 MB per 100k tasks per process, so only enable it for small task tables.
+    # THRESHOLD is the estimated Jaccard similarity.
+    DUPLICATE_DETECTION_ENABLED = os.environ.get('DUPLICATE_DETECTION_ENABLED', 'true').lower() == 'true'
+    DUPLICATE_INDEX_IN_MEMORY = os.environ.get('DUPLICATE_INDEX_IN_MEMORY', 'false').lower() == 'true'
+    DUPLICATE_THRESHOLD = float(os.environ.get('DUPLICATE_THRESHOLD', 0.6))
+    DUPLICATE_MAX_RESULTS = int(os.environ.get('DUPLICATE_MAX_RESULTS', 5))
+    DUPLICATE_MAX_CANDIDATES = int(os.environ.get('DUPLICATE_MAX_CANDIDATES', 200))
+    
     # Logging configuration
     LOG_TO_STDOUT = os.environ.get('LOG_TO_STDOUT', 'false').lower() == 'true'
     
@@ -0,0 +1,51 @@
+"""
+为已有任务补建相似需求索引（MinHash 签名和 LSH 分桶）
+
+新建任务在创建时自动写入索引，这里只处理还没有签名的任务；
+修改 app/utils/duplicates.py 中的签名参数后用 --rebuild 全部重建。
+
+示例：
+    python index_duplicates.py
+    python index_duplicates.py --rebuild --chunk-size 2000
+"""
+import argparse
+import os
+import time
+from app import create_app, db
+from app.models import Task, TaskSignature, TaskLshBand
+from app.utils.duplicates import duplicate_index
+
+parser = argparse.ArgumentParser(description='Build the near-duplicate index for existing tasks')
+parser.add_argument('--rebuild', action='store_true', help='drop all signatures and index every task again')
+parser.add_argument('--chunk-size', type=int, default=1000, help='tasks per commit')
+args = parser.parse_args()
+
+app = create_app(os.environ.get('FLASK_ENV', 'default'))
+
+with app.app_context():
+    if not duplicate_index.enabled:
+        raise SystemExit('Duplicate detection is disabled (DUPLICATE_DETECTION_ENABLED=false)')
+
+    if args.rebuild:
+        TaskLshBand.query.delete()
+        TaskSignature.query.delete()
+        db.session.commit()
+        print('已删除全部签名')
+
+    started = time.monotonic()
+    indexed = 0
+    last_id = 0
+    while True:
+        rows = db.session.query(Task.id, Task.title, Task.business_goal).outerjoin(
+            TaskSignature, TaskSignature.task_id == Task.id
+        ).filter(TaskSignature.id.is_(None), Task.id > last_id).order_by(Task.id).limit(args.chunk_size).all()
+        if not rows:
+            break
+
+        duplicate_index.index_tasks(rows)
+        db.session.commit()
+        last_id = rows[-1].id
+        indexed += len(rows)
+        print(f'{indexed} tasks indexed ({indexed / (time.monotonic() - started):.0f}/s)', flush=True)
+
+    print(f'完成，共处理 {indexed} 个任务')
@@ -0,0 +1,184 @@
+"""
+需求验证接口压测
+
+以指定并发调用验证接口并统计延迟分位数、吞吐量和错误分布，配合 mock_azure_openai.py 可以离线比较
+连接池、缓存、异步任务等改动的效果。
+
+模式：
+    job     POST /tasks/api/verify 后长轮询任务结果（端到端延迟）
+    submit  只测 POST /tasks/api/verify 的响应时间（请求线程是否被占用）
+    stream  POST /tasks/api/verify/stream，另外统计首个事件到达时间
+
+示例：
+    python loadtest_verify.py --base-url http://127.0.0.1:5000 --mode job --concurrency 20 --requests 200
+    python loadtest_verify.py --mode stream --concurrency 10 --duration 60 --repeat-ratio 0.5
+"""
+import argparse
+import math
+import random
+import re
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import requests
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def login(base_url, email, password):
+    session = requests.Session()
+    page = session.get(f'{base_url}/auth/login', timeout=10)
+    token = re.search(r'name="csrf_token"[^>]*value="([^"]+)"', page.text)
+    data = {'email': email, 'password': password, 'remember_me': 'y'}
+    if token:
+        data['csrf_token'] = token.group(1)
+    response = session.post(f'{base_url}/auth/login', data=data, timeout=10, allow_redirects=False)
+    if response.status_code != 302 or '/auth/login' in response.headers.get('Location', ''):
+        raise SystemExit(f'Login failed for {email} (HTTP {response.status_code})')
+    return session
+
+
+class Payloads:
+    """按 repeat_ratio 的比例复用已经发送过的输入，用于观察结果缓存的效果"""
+
+    def __init__(self, repeat_ratio, pool_size=20):
+        self.repeat_ratio = repeat_ratio
+        self.pool = [self._fresh() for _ in range(pool_size)]
+
+    @staticmethod
+    def _fresh():
+        tag = uuid.uuid4().hex[:8]
+        return {
+            'title': f'Load test requirement {tag}',
+            'business_goal': f'Estimate weekly churn for segment {tag} and explain the top drivers to the sales team.'
+        }
+
+    def next(self):
+        if random.random() < self.repeat_ratio:
+            return random.choice(self.pool)
+        return self._fresh()
+
+
+def run_job(session, base_url, payload, timeout):
+    """返回 (结果类型, 首个结果到达时间)"""
+    response = session.post(f'{base_url}/tasks/api/verify', json=payload, timeout=timeout)
+    if response.status_code not in (200, 202):
+        return f'http_{response.status_code}', None
+    job = response.json()
+    deadline = time.monotonic() + timeout
+    while job['status'] not in ('succeeded', 'failed'):
+        if time.monotonic() > deadline:
+            return 'timeout', None
+        job = session.get(f"{base_url}{job['poll_url']}", params={'wait': 25}, timeout=timeout).json()
+    return ('ok' if job['status'] == 'succeeded' else f"job_failed: {job.get('error')}"), None
+
+
+def run_submit(session, base_url, payload, timeout):
+    response = session.post(f'{base_url}/tasks/api/verify', json=payload, timeout=timeout)
+    return ('ok' if response.status_code in (200, 202) else f'http_{response.status_code}'), None
+
+
+def run_stream(session, base_url, payload, timeout):
+    started = time.monotonic()
+    response = session.post(f'{base_url}/tasks/api/verify/stream', json=payload, timeout=timeout, stream=True)
+    if response.status_code != 200:
+        return f'http_{response.status_code}', None
+    first_event = None
+    outcome = 'no_result'
+    event = None
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith('event:'):
+            event = line[len('event:'):].strip()
+            if first_event is None:
+                first_event = time.monotonic() - started
+        elif line.startswith('data:') and event == 'result':
+            outcome = 'ok'
+        elif line.startswith('data:') and event == 'error':
+            outcome = f'stream_error: {line[len("data:"):].strip()}'
+    response.close()
+    return outcome, first_event
+
+
+RUNNERS = {'job': run_job, 'submit': run_submit, 'stream': run_stream}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the requirement verification endpoints')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5000')
+    parser.add_argument('--email', default='pm@test.com')
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--mode', choices=sorted(RUNNERS), default='job')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--requests', type=int, default=100, help='total requests (ignored with --duration)')
+    parser.add_argument('--duration', type=float, help='run for this many seconds instead of a fixed count')
+    parser.add_argument('--repeat-ratio', type=float, default=0.0, help='fraction of requests reusing earlier inputs')
+    parser.add_argument('--timeout', type=float, default=120)
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip('/')
+    runner = RUNNERS[args.mode]
+    payloads = Payloads(args.repeat_ratio)
+    sessions = threading.local()
+    lock = threading.Lock()
+    latencies, first_events = [], []
+    outcomes = Counter()
+    issued = 0
+    deadline = time.monotonic() + args.duration if args.duration else None
+
+    def claim():
+        nonlocal issued
+        with lock:
+            if deadline is None and issued >= args.requests:
+                return False
+            issued += 1
+        return deadline is None or time.monotonic() < deadline
+
+    def worker():
+        if not hasattr(sessions, 'session'):
+            sessions.session = login(base_url, args.email, args.password)
+        while claim():
+            started = time.monotonic()
+            try:
+                outcome, first_event = runner(sessions.session, base_url, payloads.next(), args.timeout)
+            except requests.RequestException as e:
+                outcome, first_event = f'exception: {e.__class__.__name__}', None
+            elapsed = time.monotonic() - started
+            with lock:
+                outcomes[outcome] += 1
+                if outcome == 'ok':
+                    latencies.append(elapsed)
+                    if first_event is not None:
+                        first_events.append(first_event)
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(args.concurrency)]:
+            future.result()
+    wall = time.monotonic() - started
+
+    total = sum(outcomes.values())
+    print(f'mode={args.mode} concurrency={args.concurrency} requests={total} wall={wall:.1f}s')
+    print(f'throughput: {outcomes["ok"] / wall:.2f} ok/s ({total / wall:.2f} req/s)')
+    if latencies:
+        print('latency (s): p50={:.3f} p95={:.3f} p99={:.3f} mean={:.3f} max={:.3f}'.format(
+            percentile(latencies, 50), percentile(latencies, 95), percentile(latencies, 99),
+            statistics.mean(latencies), max(latencies)))
+    if first_events:
+        print('first event (s): p50={:.3f} p95={:.3f} p99={:.3f}'.format(
+            percentile(first_events, 50), percentile(first_events, 95), percentile(first_events, 99)))
+    print('outcomes:')
+    for outcome, count in outcomes.most_common():
+        print(f'  {outcome}: {count} ({count / total:.1%})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,37 @@
+"""add task pg search index
+
+Revision ID: a6e4c9f2d813
+Revises: f8d2b6e4a170
+Create Date: 2025-07-02 10:18:44.217305
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a6e4c9f2d813'
+down_revision = 'f8d2b6e4a170'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # PostgreSQL 下的全文检索索引，表达式必须与 app/utils/task_search.py 中的 _pg_document 一致；
+    # SQLite 使用 task_fts（d91a2c6f7e35），其他数据库由应用退化为LIKE查询
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("""
+        CREATE INDEX ix_task_fts ON task USING gin ((
+            setweight(to_tsvector('simple'::regconfig, coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('simple'::regconfig, coalesce(business_goal, '')), 'B')
+        ))
+    """)
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute("DROP INDEX IF EXISTS ix_task_fts")
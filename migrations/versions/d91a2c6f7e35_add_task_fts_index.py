@@ -0,0 +1,58 @@
+"""add task fts index
+
+Revision ID: d91a2c6f7e35
+Revises: c3e8f5a1d204
+Create Date: 2025-06-09 11:02:33.904716
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd91a2c6f7e35'
+down_revision = 'c3e8f5a1d204'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # FTS5 仅在SQLite下可用，其他数据库由应用退化为LIKE查询
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("""
+        CREATE VIRTUAL TABLE task_fts USING fts5(
+            title, business_goal,
+            content='task', content_rowid='id',
+            tokenize='porter unicode61 remove_diacritics 2'
+        )
+    """)
+    op.execute("""
+        CREATE TRIGGER task_fts_ai AFTER INSERT ON task BEGIN
+            INSERT INTO task_fts(rowid, title, business_goal) VALUES (new.id, new.title, new.business_goal);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER task_fts_ad AFTER DELETE ON task BEGIN
+            INSERT INTO task_fts(task_fts, rowid, title, business_goal) VALUES ('delete', old.id, old.title, old.business_goal);
+        END
+    """)
+    op.execute("""
+        CREATE TRIGGER task_fts_au AFTER UPDATE OF title, business_goal ON task BEGIN
+            INSERT INTO task_fts(task_fts, rowid, title, business_goal) VALUES ('delete', old.id, old.title, old.business_goal);
+            INSERT INTO task_fts(rowid, title, business_goal) VALUES (new.id, new.title, new.business_goal);
+        END
+    """)
+    # 回填已有任务
+    op.execute("INSERT INTO task_fts(task_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS task_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS task_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS task_fts_ai")
+    op.execute("DROP TABLE IF EXISTS task_fts")
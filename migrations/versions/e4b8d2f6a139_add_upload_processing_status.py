@@ -0,0 +1,46 @@
+"""add upload processing status
+
+Revision ID: e4b8d2f6a139
+Revises: d2a6f4c8e915
+Create Date: 2025-07-02 15:12:48.306517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e4b8d2f6a139'
+down_revision = 'd2a6f4c8e915'
+branch_labels = None
+depends_on = None
+
+OLD_STATUS = sa.Enum('ACTIVE', 'COMPLETED', 'FAILED', 'ABORTED', 'EXPIRED', name='uploadstatus')
+NEW_STATUS = sa.Enum('ACTIVE', 'PROCESSING', 'COMPLETED', 'FAILED', 'ABORTED', 'EXPIRED', name='uploadstatus')
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # 原生枚举类型只能追加取值，且不能在事务中执行
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE uploadstatus ADD VALUE IF NOT EXISTS 'PROCESSING'")
+        return
+
+    with op.batch_alter_table('upload_session', schema=None) as batch_op:
+        batch_op.alter_column('status',
+               existing_type=OLD_STATUS,
+               type_=NEW_STATUS,
+               existing_nullable=False)
+
+
+def downgrade():
+    op.execute("UPDATE upload_session SET status = 'FAILED', lease_until = NULL WHERE status = 'PROCESSING'")
+    if op.get_bind().dialect.name == 'postgresql':
+        # PostgreSQL 不支持删除枚举取值，保留 PROCESSING
+        return
+
+    with op.batch_alter_table('upload_session', schema=None) as batch_op:
+        batch_op.alter_column('status',
+               existing_type=NEW_STATUS,
+               type_=OLD_STATUS,
+               existing_nullable=False)
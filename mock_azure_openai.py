@@ -0,0 +1,249 @@
+"""
+本地 Azure OpenAI chat completions 模拟服务
+
+用于在没有真实 Azure 端点时压测 /tasks/api/verify：响应时间按指定分布采样，
+可以按比例注入 500 错误和 429 限流，支持 stream=True 的 SSE 流式输出，
+也可以用 --rpm/--tpm 模拟部署配额。只依赖标准库。
+
+示例：
+    python mock_azure_openai.py --port 8900 --latency lognormal --latency-mean 3 --throttle-rate 0.05
+    # 然后在 .env 中设置
+    AZURE_OPENAI_ENDPOINT=http://127.0.0.1:8900
+    AZURE_OPENAI_API_KEY=local
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PATH_PATTERN = re.compile(r'^/openai/deployments/(?P<deployment>[^/]+)/chat/completions$')
+
+FEEDBACK_WORDS = (
+    "The requirement states a clear business objective but the success metrics, data sources and time "
+    "range should be made explicit. Consider listing the stakeholders who will consume the output and "
+    "how often it must be refreshed. Technically this is feasible with the current data platform provided "
+    "the upstream tables are available and of sufficient quality."
+).split()
+
+
+class Bucket:
+    """模拟部署配额的令牌桶（按分钟补充）"""
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self, amount):
+        """扣减成功返回 (True, 剩余)，否则返回 (False, 需要等待的秒数)"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= amount:
+                self.tokens -= amount
+                return True, self.tokens
+            return False, (amount - self.tokens) / self.rate
+
+
+def sample_latency(args):
+    if args.latency == 'fixed':
+        value = args.latency_mean
+    elif args.latency == 'uniform':
+        value = random.uniform(args.latency_min, args.latency_max)
+    elif args.latency == 'normal':
+        value = random.gauss(args.latency_mean, args.latency_sd)
+    else:
+        # 对数正态：按给定的均值和标准差换算参数，长尾更接近真实的LLM响应时间
+        variance = args.latency_sd ** 2
+        sigma = math.sqrt(math.log(1 + variance / args.latency_mean ** 2))
+        mu = math.log(args.latency_mean) - sigma ** 2 / 2
+        value = random.lognormvariate(mu, sigma)
+    return min(max(value, args.latency_min), args.latency_max)
+
+
+def build_completion(messages, completion_tokens):
+    """根据提示词生成确定性的评分和反馈，相同输入得到相同结果"""
+    digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode('utf-8')).digest()
+    words = [FEEDBACK_WORDS[(digest[i % len(digest)] + i) % len(FEEDBACK_WORDS)] for i in range(completion_tokens)]
+    result = {
+        'clarity_score': 50 + digest[0] % 50,
+        'feasibility_score': 50 + digest[1] % 50,
+        'feedback': ' '.join(words).capitalize() + '.'
+    }
+    return f"Here is my evaluation:\n```json\n{json.dumps(result)}\n```"
+
+
+def make_handler(args, request_bucket, token_bucket, stats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, format, *values):
+            if args.verbose:
+                super().log_message(format, *values)
+
+        def _json(self, status, body, headers=None):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _throttle(self, retry_after):
+            self._json(429, {'error': {'code': '429', 'message': 'Requests to the deployment have exceeded the rate limit.'}}, {
+                'Retry-After': str(max(1, math.ceil(retry_after))),
+                'retry-after-ms': str(int(retry_after * 1000))
+            })
+
+        def _chunk(self, data):
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            self.wfile.flush()
+
+        def do_POST(self):
+            path, _, _ = self.path.partition('?')
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length)
+            if not PATH_PATTERN.match(path):
+                self._json(404, {'error': {'code': '404', 'message': 'Resource not found'}})
+                return
+            if args.api_key and self.headers.get('api-key') != args.api_key:
+                self._json(401, {'error': {'code': '401', 'message': 'Access denied due to invalid subscription key.'}})
+                return
+
+            payload = json.loads(body or b'{}')
+            messages = payload.get('messages', [])
+            prompt_tokens = sum(len(m.get('content') or '') for m in messages) // 4 + 4 * len(messages)
+            completion_tokens = min(args.completion_tokens, payload.get('max_tokens') or args.completion_tokens)
+            stats.record('requests')
+
+            # 配额检查（与 Azure 一样，在处理之前按 max_tokens 预估扣减）
+            if request_bucket:
+                granted, value = request_bucket.take(1)
+                if not granted:
+                    stats.record('throttled')
+                    self._throttle(value)
+                    return
+            if token_bucket:
+                granted, value = token_bucket.take(prompt_tokens + (payload.get('max_tokens') or 0))
+                if not granted:
+                    stats.record('throttled')
+                    self._throttle(value)
+                    return
+
+            roll = random.random()
+            if roll < args.throttle_rate:
+                stats.record('throttled')
+                self._throttle(random.uniform(0.5, 2))
+                return
+            if roll < args.throttle_rate + args.error_rate:
+                stats.record('errors')
+                time.sleep(sample_latency(args) / 4)
+                self._json(500, {'error': {'code': 'InternalServerError', 'message': 'The server had an error processing your request.'}})
+                return
+
+            content = build_completion(messages, completion_tokens)
+            headers = {}
+            if request_bucket:
+                headers['x-ratelimit-remaining-requests'] = str(int(request_bucket.tokens))
+            if token_bucket:
+                headers['x-ratelimit-remaining-tokens'] = str(int(token_bucket.tokens))
+
+            if payload.get('stream'):
+                self._stream(content, headers)
+            else:
+                time.sleep(sample_latency(args))
+                self._json(200, {
+                    'id': 'chatcmpl-local',
+                    'object': 'chat.completion',
+                    'model': args.model,
+                    'choices': [{'index': 0, 'finish_reason': 'stop',
+                                 'message': {'role': 'assistant', 'content': content}}],
+                    'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                              'total_tokens': prompt_tokens + completion_tokens}
+                }, headers)
+            stats.record('completed')
+
+        def _stream(self, content, headers):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.end_headers()
+
+            def event(data):
+                self._chunk(b'data: ' + json.dumps(data).encode('utf-8') + b'\n\n')
+
+            time.sleep(args.ttft)
+            event({'choices': [], 'prompt_filter_results': [{'prompt_index': 0, 'content_filter_results': {}}]})
+            event({'choices': [{'index': 0, 'delta': {'role': 'assistant', 'content': ''}}]})
+            # 按空白切分成近似的令牌，匀速输出
+            pieces = re.findall(r'\S+\s*|\s+', content)
+            delay = 1.0 / args.tokens_per_second
+            for piece in pieces:
+                event({'choices': [{'index': 0, 'delta': {'content': piece}}]})
+                time.sleep(delay)
+            event({'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+            self._chunk(b'data: [DONE]\n\n')
+            self._chunk(b'')
+
+    return Handler
+
+
+class Stats:
+    def __init__(self):
+        self.counts = {}
+        self.lock = threading.Lock()
+
+    def record(self, key):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local stand-in for the Azure OpenAI chat completions API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--api-key', help='require this api-key header')
+    parser.add_argument('--model', default='gpt-4o-mini')
+    parser.add_argument('--latency', choices=['fixed', 'uniform', 'normal', 'lognormal'], default='lognormal')
+    parser.add_argument('--latency-mean', type=float, default=3.0, help='seconds')
+    parser.add_argument('--latency-sd', type=float, default=2.0, help='seconds (normal/lognormal)')
+    parser.add_argument('--latency-min', type=float, default=0.05, help='seconds, also the uniform lower bound')
+    parser.add_argument('--latency-max', type=float, default=30.0, help='seconds, also the uniform upper bound')
+    parser.add_argument('--ttft', type=float, default=0.3, help='time to first token when streaming, seconds')
+    parser.add_argument('--tokens-per-second', type=float, default=60.0, help='streaming output speed')
+    parser.add_argument('--completion-tokens', type=int, default=120, help='feedback length in words')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 500')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--rpm', type=int, default=0, help='simulated requests-per-minute quota')
+    parser.add_argument('--tpm', type=int, default=0, help='simulated tokens-per-minute quota')
+    parser.add_argument('--verbose', action='store_true')
+    args = parser.parse_args()
+
+    stats = Stats()
+    handler = make_handler(args, Bucket(args.rpm) if args.rpm else None, Bucket(args.tpm) if args.tpm else None, stats)
+    server = ThreadingHTTPServer((args.host, args.port), handler)
+    server.daemon_threads = True
+    print(f'Azure OpenAI stand-in listening on http://{args.host}:{server.server_port}', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f'Requests: {stats.counts}')
+
+
+if __name__ == '__main__':
+    main()
@@ -13,7 +13,7 @@ logger = logging.getLogger(__name__)
 
 logger.info("Starting application initialization...")
 
-from app import create_app
+from app import create_app, start_background_workers
 
 # 从环境变量中获取配置，默认为production
 config_name = os.environ.get('FLASK_ENV', 'production')
@@ -22,6 +22,11 @@ logger.info(f"Using configuration: {config_name}")
 app = create_app(config_name)
 logger.info("Application created successfully")
 
+# web 进程启动时就开始处理遗留的后台任务，不等第一个请求；
+# flask 命令（db upgrade 等）也会导入 run.py，这时不启动（flask run 由第一个请求启动）
+if os.environ.get('FLASK_RUN_FROM_CLI') != 'true':
+    start_background_workers(app)
+
 if __name__ == '__main__':
     # 从环境变量中获取端口，默认为5000
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,46 @@
+import os
+import pytest
+from flask_migrate import upgrade
+from config import config, TestingConfig
+from app import create_app, db
+from app.models import User
+
+MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+
+@pytest.fixture
+def app(tmp_path):
+    """每个测试使用独立的SQLite数据库和上传目录，表结构由迁移创建"""
+    class PytestConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = 'sqlite:///' + str(tmp_path / 'test.db')
+        UPLOAD_FOLDER = str(tmp_path / 'uploads')
+        # 不启动后台工作线程，测试直接调用后台处理
+        VERIFICATION_WORKERS = 0
+        FILE_UPLOAD_FINALIZE_WORKERS = 0
+
+    config['pytest'] = PytestConfig
+    app = create_app('pytest')
+    with app.app_context():
+        upgrade(directory=MIGRATIONS)
+        db.session.add_all([
+            User(email='pm@test.com', password='password123', username='PM'),
+            User(email='researcher@test.com', password='password123', username='Researcher')
+        ])
+        db.session.commit()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+    del config['pytest']
+
+
+def login(app, email):
+    client = app.test_client()
+    response = client.post('/auth/login', data={'email': email, 'password': 'password123'})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.fixture
+def client(app):
+    return login(app, 'pm@test.com')
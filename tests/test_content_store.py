@@ -0,0 +1,81 @@
+import hashlib
+import io
+import os
+from datetime import date
+from app import db
+from app.models import File, FileBlob, Task, TaskStatus, TaskPriority
+from app.utils.storage import storage
+from tests.conftest import login
+
+CONTENT = os.urandom(4096)
+DIGEST = hashlib.sha256(CONTENT).hexdigest()
+
+
+def _upload(client, name):
+    response = client.post('/files/upload', data={'file': [(io.BytesIO(CONTENT), name)]},
+                           content_type='multipart/form-data')
+    assert response.status_code == 302
+
+
+def _content_path(app):
+    with app.app_context():
+        return storage.default.path(db.session.get(FileBlob, DIGEST).path)
+
+
+def _ref_count(app):
+    with app.app_context():
+        blob = db.session.get(FileBlob, DIGEST)
+        return None if blob is None else blob.ref_count
+
+
+def test_same_content_from_two_users_is_stored_once(app, client):
+    _upload(client, 'a.bin')
+    _upload(login(app, 'researcher@test.com'), 'b.bin')
+
+    assert _ref_count(app) == 2
+    with app.app_context():
+        files = File.query.filter_by(sha256=DIGEST).all()
+        assert {file.uploader_id for file in files} == {1, 2}
+        assert files[0].file_path == files[1].file_path
+    # 第二次上传写入的副本已经删除
+    stored = [name for _, _, names in os.walk(app.config['UPLOAD_FOLDER']) for name in names]
+    assert len(stored) == 1
+
+
+def test_content_is_removed_only_when_the_last_reference_goes(app, client):
+    _upload(client, 'a.bin')
+    _upload(client, 'b.bin')
+    path = _content_path(app)
+    with app.app_context():
+        task = Task(title='Task with a file', business_goal='goal', creator_id=1, deadline=date.today(),
+                    status=TaskStatus.DRAFT, priority=TaskPriority.LOW)
+        db.session.add(task)
+        db.session.commit()
+        first, second = File.query.filter_by(sha256=DIGEST).order_by(File.id).all()
+        second.task_id = task.id
+        db.session.commit()
+        first_id, task_id = first.id, task.id
+
+    assert client.post(f'/files/{first_id}/delete').status_code == 302
+    assert _ref_count(app) == 1
+    assert os.path.exists(path)
+
+    # 删除任务时级联删除其文件，最后一个引用释放后内容随之删除
+    with app.app_context():
+        db.session.delete(db.session.get(Task, task_id))
+        db.session.commit()
+    assert _ref_count(app) is None
+    assert not os.path.exists(path)
+
+
+def test_rolled_back_delete_keeps_the_content(app, client):
+    _upload(client, 'a.bin')
+    path = _content_path(app)
+    with app.app_context():
+        db.session.delete(File.query.filter_by(sha256=DIGEST).one())
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+
+    assert _ref_count(app) == 1
+    assert os.path.exists(path)
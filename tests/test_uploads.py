@@ -0,0 +1,91 @@
+import hashlib
+from datetime import datetime, timedelta
+from app import db
+from app.models import File, UploadSession, UploadStatus
+from app.utils.uploads import upload_finisher
+
+CONTENT = b'0123456789abcdefghij'
+
+
+def _create(client, **extra):
+    response = client.post('/files/uploads', json=dict({'filename': 'data.bin', 'size': len(CONTENT)}, **extra))
+    assert response.status_code == 201
+    return response.get_json()
+
+
+def _put(client, url, start, data, **headers):
+    headers['Content-Range'] = f'bytes {start}-{start + len(data) - 1}/{len(CONTENT)}'
+    return client.put(url, data=data, headers=headers)
+
+
+def _upload_to_processing(client):
+    upload = _create(client)
+    response = _put(client, upload['upload_url'], 0, CONTENT)
+    assert response.status_code == 202
+    assert response.get_json()['status'] == 'processing'
+    return upload
+
+
+def test_resume_with_offset_mismatch_returns_current_offset(client):
+    upload = _create(client)
+    url = upload['upload_url']
+    response = _put(client, url, 0, CONTENT[:8])
+    assert response.status_code == 200
+    assert response.get_json()['offset'] == 8
+
+    # 重发已经写入的块（例如没有收到响应的客户端）：409 并告知从哪里继续
+    response = _put(client, url, 0, CONTENT[:8])
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 8
+
+    response = _put(client, url, 12, CONTENT[12:])
+    assert response.status_code == 409
+    assert response.get_json()['offset'] == 8
+
+    response = _put(client, url, 8, CONTENT[8:])
+    assert response.status_code == 202
+    assert client.get(url).get_json()['offset'] == len(CONTENT)
+
+
+def test_chunk_checksum_mismatch_discards_the_chunk(app, client):
+    upload = _create(client)
+    url = upload['upload_url']
+    response = _put(client, url, 0, CONTENT[:10], **{'X-Chunk-SHA256': hashlib.sha256(b'other').hexdigest()})
+    assert response.status_code == 422
+    assert response.get_json()['offset'] == 0
+    assert client.get(url).get_json()['offset'] == 0
+
+    # 同一偏移重发正确的数据后继续，整个文件的校验和不受丢弃的块影响
+    response = _put(client, url, 0, CONTENT[:10], **{'X-Chunk-SHA256': hashlib.sha256(CONTENT[:10]).hexdigest()})
+    assert response.status_code == 200
+    assert _put(client, url, 10, CONTENT[10:]).status_code == 202
+    with app.app_context():
+        session = db.session.get(UploadSession, upload['upload_id'])
+        assert session.sha256 == hashlib.sha256(CONTENT).hexdigest()
+
+
+def test_finisher_takes_over_after_lease_expiry(app, client):
+    upload = _upload_to_processing(client)
+    with app.app_context():
+        first = upload_finisher._claim()
+        assert first[0] == upload['upload_id']
+        # 租约有效期间其他工作线程不能领取
+        assert upload_finisher._claim() is None
+
+        # 第一个工作线程停止响应，租约过期后由其他工作线程接管并完成
+        UploadSession.query.filter_by(id=upload['upload_id']).update(
+            {UploadSession.lease_until: datetime.utcnow() - timedelta(seconds=1)}, synchronize_session=False
+        )
+        db.session.commit()
+        second = upload_finisher._claim()
+        assert second[0] == upload['upload_id']
+        upload_finisher._process(*second)
+
+        # 原来的工作线程恢复后不能再完成会话，也不会创建第二条 File 记录
+        assert not upload_finisher._finish(first[0], first[1], None, None)
+        session = db.session.get(UploadSession, upload['upload_id'], populate_existing=True)
+        assert session.status == UploadStatus.COMPLETED
+        assert File.query.count() == 1
+
+    response = client.get(client.get(upload['upload_url']).get_json()['file_url'])
+    assert response.data == CONTENT
@@ -0,0 +1,64 @@
+"""
+批量验证任务
+
+示例：
+    python verify_tasks.py --status draft --concurrency 8
+    python verify_tasks.py --created-since 2025-06-01
+    python verify_tasks.py --resume 3
+"""
+import argparse
+import os
+import sys
+from app import create_app, db
+from app.models import VerificationBatch
+from app.utils.verification_batch import parse_filters, create_batch, claim_batch, run_batch, BatchBusy
+
+parser = argparse.ArgumentParser(description='Verify many tasks with Azure OpenAI')
+parser.add_argument('--status', help='only tasks in this status, e.g. draft')
+parser.add_argument('--priority', help='only tasks with this priority')
+parser.add_argument('--assignee-id', type=int, help='only tasks assigned to this user')
+parser.add_argument('--created-since', help='only tasks created on or after this date (YYYY-MM-DD)')
+parser.add_argument('--created-before', help='only tasks created before this date (YYYY-MM-DD)')
+parser.add_argument('--concurrency', type=int, help='concurrent Azure OpenAI calls')
+parser.add_argument('--resume', type=int, metavar='BATCH_ID', help='continue an interrupted batch')
+args = parser.parse_args()
+
+app = create_app(os.environ.get('FLASK_ENV', 'default'))
+
+
+def report(batch):
+    rate = batch.processed / batch.active_seconds if batch.active_seconds else 0
+    print(f'[batch {batch.id}] {batch.processed}/{batch.total} '
+          f'(ok {batch.succeeded}, failed {batch.failed}, skipped {batch.skipped}) '
+          f'{rate:.2f} tasks/s {batch.status.value}', flush=True)
+
+
+with app.app_context():
+    if args.resume:
+        batch = db.session.get(VerificationBatch, args.resume)
+        if batch is None:
+            sys.exit(f'Batch {args.resume} not found')
+    else:
+        filters = parse_filters({
+            'status': args.status,
+            'priority': args.priority,
+            'assignee_id': args.assignee_id,
+            'created_since': args.created_since,
+            'created_before': args.created_before
+        })
+        concurrency = min(args.concurrency or app.config['VERIFICATION_BATCH_CONCURRENCY'],
+                          app.config['VERIFICATION_BATCH_MAX_CONCURRENCY'])
+        batch = create_batch(filters, concurrency)
+        print(f'Created batch {batch.id} with {batch.total} tasks, resume with --resume {batch.id}')
+    batch_id = batch.id
+
+    try:
+        worker = claim_batch(app, batch_id)
+    except BatchBusy:
+        sys.exit(f'Batch {batch_id} is already running or has completed')
+
+try:
+    run_batch(app, batch_id, worker, progress=report)
+except KeyboardInterrupt:
+    print(f'Interrupted, resume with: python verify_tasks.py --resume {batch_id}')
+    sys.exit(1)